@@ -0,0 +1,251 @@
+import argparse
+import random
+import sys
+import time
+from collections import OrderedDict
+from bitboard import get_geometry, iter_bits
+
+# Состояния клетки в знаниях ИИ (неизвестная клетка в хеш не входит)
+CLOSED, HIT, SUNK = 0, 1, 2
+
+
+class ZobristHasher:
+    """Случайные ключи Зобриста для знаний о доске одних правил
+
+    Хеш знаний - XOR ключей всех известных клеток (по их состоянию) и
+    ключей оставшегося флота. Ключи клеток заданы для каждой симметрии
+    доски, так что хеши всех отражений и поворотов считаются вместе.
+    """
+
+    def __init__(self, rules, seed=0):
+        self.rules = rules
+        self.geometry = get_geometry(rules.width, rules.height)
+        self.symmetries = self.geometry.symmetries()
+        rng = random.Random(seed)
+        base = [[rng.getrandbits(64) for _ in range(self.geometry.size)] for _ in (CLOSED, HIT, SUNK)]
+        # cell_keys[состояние][клетка] - ключи клетки во всех симметриях
+        self.cell_keys = [[tuple(keys[symmetry[index]] for symmetry in self.symmetries)
+                           for index in range(self.geometry.size)] for keys in base]
+        self.fleet_keys = {length: [rng.getrandbits(64) for _ in range(rules.fleet.count(length))]
+                           for length in set(rules.fleet)}
+
+    def fleet_hash(self, remaining_fleet):
+        """Ключ оставшегося флота (одинаков во всех симметриях)"""
+        value = 0
+        for length in set(remaining_fleet):
+            for key in self.fleet_keys[length][:remaining_fleet.count(length)]:
+                value ^= key
+        return value
+
+
+class KnowledgeHash:
+    """Инкрементальный хеш знаний ИИ одной партии
+
+    update сравнивает маски нового открытого снимка доски с прошлыми и
+    пересчитывает хеши только по изменившимся клеткам. canonical -
+    наименьший из хешей всех симметрий и номер этой симметрии: одинаковые
+    с точностью до поворота или отражения позиции получают один ключ.
+    """
+
+    def __init__(self, hasher):
+        self.hasher = hasher
+        self.hashes = [0] * len(hasher.symmetries)
+        self.masks = [0, 0, 0]
+        self.fleet = ()
+        self.fleet_hash = hasher.fleet_hash(())
+
+    def update(self, snapshot):
+        """Учет нового снимка; возвращает canonical()"""
+        masks = (snapshot.miss_mask | snapshot.halo_mask,
+                 snapshot.hit_mask & ~snapshot.sunk_mask,
+                 snapshot.sunk_mask)
+        hashes = self.hashes
+        for state, (old, new) in enumerate(zip(self.masks, masks)):
+            keys = self.hasher.cell_keys[state]
+            for index in iter_bits(old ^ new):
+                hashes[:] = [value ^ key for value, key in zip(hashes, keys[index])]
+        self.masks = list(masks)
+        if snapshot.remaining_fleet != self.fleet:
+            self.fleet = snapshot.remaining_fleet
+            self.fleet_hash = self.hasher.fleet_hash(self.fleet)
+        return self.canonical()
+
+    def canonical(self):
+        """(ключ, номер симметрии), в которой ключ наименьший"""
+        value, symmetry = min((value, symmetry) for symmetry, value in enumerate(self.hashes))
+        return value ^ self.fleet_hash, symmetry
+
+
+class DecisionCache:
+    """LRU-кеш решений ИИ (тепловых карт) с ограничением по памяти
+
+    Значения хранятся в канонической ориентации доски; to_canonical и
+    from_canonical переводят массив клеток между ориентациями. Размер
+    значения оценивается по nbytes (массивы NumPy) или sys.getsizeof.
+    """
+
+    # Оценка накладных расходов на запись: ключ, узел словаря
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _size(self, value):
+        return getattr(value, "nbytes", None) or sys.getsizeof(value)
+
+    def get(self, key):
+        """Значение по ключу или None"""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Запись значения; старые записи вытесняются при превышении памяти"""
+        if key in self._entries:
+            self.bytes -= self._size(self._entries.pop(key)) + self.ENTRY_OVERHEAD
+        self._entries[key] = value
+        self.bytes += self._size(value) + self.ENTRY_OVERHEAD
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self.bytes -= self._size(old) + self.ENTRY_OVERHEAD
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    @property
+    def hit_rate(self):
+        """Доля запросов, найденных в кеше"""
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    def stats(self):
+        """Статистика кеша"""
+        return {"entries": len(self._entries), "bytes": self.bytes, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": self.hit_rate}
+
+
+def to_canonical(values, symmetry):
+    """Массив значений клеток (H, W) в канонической ориентации (плоский)"""
+    import numpy as np
+    canonical = np.empty(values.size, dtype=values.dtype)
+    canonical[np.asarray(symmetry)] = values.ravel()
+    return canonical
+
+
+def from_canonical(canonical, symmetry, width, height):
+    """Массив значений клеток из канонической ориентации обратно в (H, W)"""
+    import numpy as np
+    return canonical[np.asarray(symmetry)].reshape(height, width)
+
+
+# Общие кеши и хешеры процесса: переживают отдельные партии
+_hashers = {}
+_caches = {}
+
+
+def get_hasher(rules):
+    """Общий хешер для правил"""
+    hasher = _hashers.get(rules.key())
+    if hasher is None:
+        hasher = _hashers[rules.key()] = ZobristHasher(rules)
+    return hasher
+
+
+def get_cache(name, max_bytes=64 * 1024 * 1024):
+    """Общий кеш решений по имени (например, стратегии и правил)"""
+    cache = _caches.get(name)
+    if cache is None:
+        cache = _caches[name] = DecisionCache(max_bytes)
+    return cache
+
+
+class HeatMapMemo:
+    """Кеш тепловых карт одной стратегии для ИИ одной партии
+
+    lookup по открытому снимку доски возвращает сохраненную карту (H, W)
+    для той же позиции с точностью до симметрии или None; store сохраняет
+    карту, рассчитанную для последнего запрошенного снимка. Кеш общий для
+    всех партий процесса, поэтому сохранять можно только карты, которые
+    однозначно определяются позицией (не случайные выборки).
+    """
+
+    def __init__(self, name, rules, max_bytes=64 * 1024 * 1024):
+        self.rules = rules
+        self.cache = get_cache(f"{name}:{rules.key()}", max_bytes)
+        self.knowledge = KnowledgeHash(get_hasher(rules))
+        self._key = None
+        self._symmetry = None
+
+    def lookup(self, snapshot):
+        self._key, symmetry = self.knowledge.update(snapshot)
+        self._symmetry = self.knowledge.hasher.symmetries[symmetry]
+        canonical = self.cache.get(self._key)
+        if canonical is None:
+            return None
+        return from_canonical(canonical, self._symmetry, self.rules.width, self.rules.height)
+
+    def store(self, values):
+        self.cache.put(self._key, to_canonical(values, self._symmetry))
+
+
+def main():
+    """Сравнение скорости ИИ с кешем и без на серии партий"""
+    from ai_registry import get_strategy
+    from engine import GameSession
+    from rules import Rules
+    from seeding import derive_seed
+
+    parser = argparse.ArgumentParser(description="Кеш решений ИИ на серии партий")
+    # Кешируются только детерминированные карты: частоты SamplingAI - случайная выборка
+    parser.add_argument("--ai", choices=("density",), default="density", help="стратегия ИИ")
+    parser.add_argument("--games", type=int, default=200, help="количество партий")
+    parser.add_argument("--touch", action="store_true", help="корабли могут касаться")
+    parser.add_argument("--bend", action="store_true", help="изогнутые корабли")
+    parser.add_argument("--seed", type=int, default=1, help="зерно генератора случайных чисел")
+    args = parser.parse_args()
+
+    rules = Rules(allow_touching=args.touch, allow_bending=args.bend)
+    ai_class = get_strategy(args.ai).load()
+
+    def play(use_cache):
+        started = time.perf_counter()
+        shots = 0
+        for game in range(args.games):
+            session = GameSession(rules, derive_seed(args.seed, "game", game))
+            session.place_randomly(0)
+            session.place_randomly(1)
+            session.start(1)
+            ai = ai_class(rules, rng=session.make_rng("ai"), use_cache=use_cache)
+            while not session.is_over:
+                session.current_player = 1
+                x, y = ai.get_next_shot(session.boards[0].snapshot(public=True))
+                session.shoot(x, y)
+                shots += 1
+            getattr(ai, "close", lambda: None)()
+        return time.perf_counter() - started, shots, ai.memo
+
+    plain_time, plain_shots, _ = play(False)
+    cached_time, cached_shots, memo = play(True)
+    # Кеш берется через ИИ: при запуске файла скриптом этот модуль загружен дважды
+    stats = memo.cache.stats()
+    print(f"Без кеша: {plain_time:.2f} с, {plain_shots / args.games:.1f} выстрелов за партию")
+    print(f"С кешем: {cached_time:.2f} с, {cached_shots / args.games:.1f} выстрелов за партию")
+    print(f"Попаданий в кеш: {stats['hit_rate']:.1%}, записей {stats['entries']}, {stats['bytes'] / 1024:.0f} КБ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import json
+import os
+from datetime import datetime
+
+CONFIG_FILE = "ai_config.json"
+
+
+class AIConfig:
+    """Настройки стратегий ИИ для каждых правил, подобранные autotune.py
+
+    В файле по ключу правил и имени стратегии хранятся параметры
+    конструктора ИИ и результаты подбора. Игра загружает файл при запуске
+    и создает ИИ с этими параметрами; без записи ИИ создается как обычно.
+    """
+
+    def __init__(self, config_file=CONFIG_FILE):
+        self.config_file = config_file
+        self.config = self.load_config()
+
+    def load_config(self):
+        """Загрузка настроек из файла"""
+        try:
+            if os.path.exists(self.config_file):
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Ошибка загрузки настроек ИИ: {e}")
+        return {}
+
+    def save_config(self):
+        """Сохранение настроек в файл"""
+        try:
+            with open(self.config_file, 'w', encoding='utf-8') as f:
+                json.dump(self.config, f, ensure_ascii=False, indent=4)
+        except Exception as e:
+            print(f"Ошибка сохранения настроек ИИ: {e}")
+
+    def params(self, rules, strategy):
+        """Параметры конструктора ИИ стратегии для правил (пустой словарь, если не подобраны)"""
+        entry = self.config.get(rules.key(), {}).get(strategy)
+        return dict(entry["params"]) if entry else {}
+
+    def set_params(self, rules, strategy, params, **results):
+        """Запись подобранных параметров и результатов подбора"""
+        self.config.setdefault(rules.key(), {})[strategy] = dict(
+            results, params=params, date=datetime.now().strftime("%d.%m.%Y"))
+        self.save_config()
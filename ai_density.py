@@ -0,0 +1,186 @@
+import random
+import time
+import numpy as np
+from ai_cache import HeatMapMemo
+from opening_book import OpeningLine
+from rules import CLASSIC_RULES
+
+
+def mask_to_array(mask, width, height):
+    """Битовая маска доски в виде массива bool (H, W)"""
+    size = width * height
+    data = mask.to_bytes((size + 7) // 8, "little")
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder="little")[:size]
+    return bits.reshape(height, width).astype(bool)
+
+
+class DensityAI:
+    """ИИ, стреляющий в клетку с наибольшей плотностью возможных расстановок
+
+    На каждом ходу для всех непотопленных кораблей перебираются все
+    позиции, не противоречащие известным промахам, потопленным кораблям
+    и клеткам вокруг них, и для каждой клетки считается, сколько позиций
+    ее накрывает. Если есть попадания по непотопленному кораблю, учитываются
+    только позиции, накрывающие эти попадания (с весом по их числу).
+
+    Вычисления идут сдвигами масок NumPy и укладываются в бюджет времени
+    time_budget_ms: на больших досках поиск ведется в случайном окне такого
+    размера, чтобы расчет успел по измеренной скорости, а при превышении
+    бюджета используется уже набранная плотность. Так ход не задерживает
+    кадр даже на досках намного больше 10x10.
+    """
+
+    def __init__(self, rules=None, rng=None, time_budget_ms=20, use_cache=True):
+        self.rules = rules or CLASSIC_RULES
+        self.rng = rng or random.Random()
+        self._np_rng = np.random.default_rng(self.rng.getrandbits(64))
+        self.width = self.rules.width
+        self.height = self.rules.height
+        self.time_budget_ms = time_budget_ms
+        # Первые выстрелы берутся из заранее рассчитанного дебюта
+        self.opening = OpeningLine(self.rules, self.rng)
+        # Полностью рассчитанные плотности общие для всех партий процесса
+        self.memo = HeatMapMemo("density", self.rules) if use_cache else None
+        # Сдвиги клеток всех фигур, начиная с длинных кораблей: они сильнее ограничивают выбор
+        self._shapes = {length: [np.array(shape) for shape in self.rules.ship_shapes(length)]
+                        for length in set(self.rules.fleet)}
+        self.last_elapsed_ms = 0.0
+        self.last_complete = True
+        # Измеренное время одной операции над клеткой окна (обновляется после каждого расчета)
+        self._seconds_per_cell = 2e-9
+
+    def _knowledge(self, board):
+        """Открытое состояние доски: маски (H, W) и длины непотопленных кораблей"""
+        if hasattr(board, "snapshot"):
+            board = board.snapshot(public=True)
+        shot = mask_to_array(board.shot_mask | board.halo_mask, self.width, self.height)
+        # Клетки, где не может быть непотопленного корабля
+        blocked = mask_to_array(board.miss_mask | board.halo_mask | board.sunk_mask, self.width, self.height)
+        hits = mask_to_array(board.hit_mask & ~board.sunk_mask, self.width, self.height)
+        return shot, blocked, hits, board.remaining_fleet
+
+    def density(self, board):
+        """Плотность возможных расстановок (H, W) и маска клеток, доступных для выстрела"""
+        started = time.perf_counter()
+        deadline = started + self.time_budget_ms / 1000
+        shot, blocked, hits, remaining = self._knowledge(board)
+        density = np.zeros((self.height, self.width), dtype=np.float64)
+        self.last_complete = True
+        # Проходы по всей доске после расчета стоят примерно как разбор масок выше
+        deadline -= 1.5 * (time.perf_counter() - started)
+
+        # При добивании считаем только окрестность попаданий
+        top, left, bottom, right = 0, 0, self.height, self.width
+        if hits.any() and remaining:
+            reach = max(remaining)
+            rows = np.flatnonzero(hits.any(axis=1))
+            columns = np.flatnonzero(hits.any(axis=0))
+            top, bottom = max(0, rows[0] - reach + 1), min(self.height, rows[-1] + reach)
+            left, right = max(0, columns[0] - reach + 1), min(self.width, columns[-1] + reach)
+        targeting = bool(hits.any())
+
+        tasks = [(remaining.count(length), offsets)
+                 for length in sorted(set(remaining), reverse=True) for offsets in self._shapes[length]]
+        operations = sum(len(offsets) for _, offsets in tasks) * (3 if targeting else 2)
+
+        # Окно, которое успеем обработать за оставшееся время
+        affordable = max(0.0, deadline - time.perf_counter()) / (operations * self._seconds_per_cell + 1e-12)
+        if not targeting and remaining and (bottom - top) * (right - left) > affordable:
+            side = max(2 * max(remaining), int(affordable ** 0.5))
+            window_height, window_width = min(side, self.height), min(side, self.width)
+            top = self.rng.randrange(self.height - window_height + 1)
+            left = self.rng.randrange(self.width - window_width + 1)
+            bottom, right = top + window_height, left + window_width
+            self.last_complete = False
+
+        window_blocked = blocked[top:bottom, left:right]
+        window_hits = hits[top:bottom, left:right]
+        window_density = density[top:bottom, left:right]
+        height, width = window_blocked.shape
+
+        loop_started = time.perf_counter()
+        done = 0
+        for count, offsets in tasks:
+            if time.perf_counter() > deadline and window_density.any():
+                self.last_complete = False
+                break
+            done += len(offsets) * (3 if targeting else 2)
+            shape_width, shape_height = offsets[:, 0].max() + 1, offsets[:, 1].max() + 1
+            rows, columns = height - shape_height + 1, width - shape_width + 1
+            if rows <= 0 or columns <= 0:
+                continue
+            # Допустимые позиции: фигура не задевает закрытые клетки
+            legal = np.ones((rows, columns), dtype=bool)
+            covered = np.zeros((rows, columns), dtype=np.int32)
+            for dx, dy in offsets:
+                legal &= ~window_blocked[dy:dy + rows, dx:dx + columns]
+                if targeting:
+                    covered += window_hits[dy:dy + rows, dx:dx + columns]
+            weight = legal * count
+            if targeting:
+                weight = weight * covered
+            if not weight.any():
+                continue
+            # Каждая позиция добавляет свой вес всем накрытым клеткам
+            for dx, dy in offsets:
+                window_density[dy:dy + rows, dx:dx + columns] += weight
+
+        if done and height * width:
+            measured = (time.perf_counter() - loop_started) / (done * height * width)
+            self._seconds_per_cell = 0.5 * self._seconds_per_cell + 0.5 * measured
+
+        available = ~shot
+        density[~available] = 0
+        self.last_elapsed_ms = (time.perf_counter() - started) * 1000
+        return density, available
+
+    def _best_cells(self, board, count, exclude=()):
+        """count клеток с наибольшей плотностью (случайный выбор среди равных)"""
+        if hasattr(board, "snapshot"):
+            board = board.snapshot(public=True)
+        opening = self.opening.next_shots(board, count, exclude)
+        if len(opening) == count:
+            return opening
+        density = self.memo.lookup(board) if self.memo else None
+        if density is None:
+            density, available = self.density(board)
+            if self.memo and self.last_complete:
+                self.memo.store(density)
+        else:
+            available = mask_to_array(board.unknown_mask, self.width, self.height)
+        density = density.copy()
+        for x, y in exclude:
+            available[y, x] = False
+        if not available.any():
+            return []
+        scores = density.ravel()
+        scores[~available.ravel()] = -1
+        if count == 1:
+            # Случайная клетка среди клеток с наибольшей плотностью
+            order = [self.rng.choice(np.flatnonzero(scores == scores.max()))]
+        else:
+            count = min(count, int(available.sum()))
+            # Небольшой случайный ключ разбивает равенство между клетками с одинаковой плотностью
+            scores = scores + self._np_rng.random(len(scores)) * 1e-6
+            best = np.argpartition(-scores, count - 1)[:count]
+            order = best[np.argsort(-scores[best])]
+        return [(int(index % self.width), int(index // self.width)) for index in order]
+
+    def get_next_shot(self, board, exclude=()):
+        """Клетка с наибольшей плотностью возможных расстановок"""
+        cells = self._best_cells(board, 1, exclude)
+        return cells[0] if cells else None
+
+    def get_next_shots(self, board, count):
+        """Клетки залпа: count клеток с наибольшей плотностью"""
+        return self._best_cells(board, count)
+
+    # Состояние берется с доски на каждом ходу, отдельный учет результатов не нужен
+    def register_hit(self, x, y):
+        """Регистрация попадания"""
+
+    def register_miss(self, x, y):
+        """Регистрация промаха"""
+
+    def register_sunk(self):
+        """Регистрация потопления корабля"""
@@ -0,0 +1,268 @@
+import argparse
+import time
+from ai_logic import ComputerAI
+from bitboard import get_geometry, iter_bits, popcount
+from rules import CLASSIC_RULES
+
+
+class SearchAborted(Exception):
+    """Поиск превысил лимит узлов или времени"""
+
+
+class EndgameSolver:
+    """Точный расчет эндшпиля: минимум ожидаемого числа выстрелов до победы
+
+    Перебираются все расстановки оставшихся кораблей, согласованные с
+    открытыми клетками доски; если их не больше max_layouts, перебором с
+    запоминанием состояний (множество возможных расстановок и сделанные
+    выстрелы) находится выстрел, минимизирующий ожидаемое число выстрелов
+    до потопления всех кораблей при равновероятных расстановках. Ветви
+    отсекаются нижней оценкой: каждую непораженную клетку корабля нужно
+    обстрелять. При превышении node_limit или time_limit расчет
+    прерывается, и solve возвращает None.
+
+    Метрики последнего вызова: layouts, nodes, elapsed_ms, solved, expected.
+    """
+
+    def __init__(self, rules=None, max_layouts=64, max_ships=4, node_limit=50000, time_limit=0.05):
+        self.rules = rules or CLASSIC_RULES
+        self.geometry = get_geometry(self.rules.width, self.rules.height)
+        self.max_layouts = max_layouts
+        self.max_ships = max_ships
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self._shapes = {length: [self.geometry.shape_mask(shape) for shape in self.rules.ship_shapes(length)]
+                        for length in set(self.rules.fleet)}
+        self._shape_lists = {length: self.rules.ship_shapes(length) for length in set(self.rules.fleet)}
+        self._reset_metrics()
+
+    def _reset_metrics(self):
+        self.layouts = 0
+        self.nodes = 0
+        self.elapsed_ms = 0.0
+        self.solved = False
+        self.expected = None
+
+    def _zone(self, mask):
+        if self.rules.allow_touching:
+            return mask
+        return self.geometry.dilate(mask)
+
+    def _tick(self):
+        self.nodes += 1
+        if self.nodes > self.node_limit or time.perf_counter() > self._deadline:
+            raise SearchAborted()
+
+    def _placements(self, length, blocked):
+        """Маски всех допустимых позиций корабля длины length"""
+        for shape, shape_mask in zip(self._shape_lists[length], self._shapes[length]):
+            for anchor in iter_bits(self.geometry.legal_anchors(shape, blocked)):
+                yield shape_mask << anchor
+
+    def enumerate_layouts(self, snapshot):
+        """Все согласованные расстановки (кортежи масок кораблей) или None, если их слишком много"""
+        closed = snapshot.miss_mask | snapshot.halo_mask
+        open_hits = snapshot.hit_mask & ~snapshot.sunk_mask
+        blocked = closed | self._zone(snapshot.sunk_mask)
+        layouts = []
+
+        def cover(blocked, uncovered, lengths, ships):
+            # Сначала корабль через младшее непокрытое попадание: в расстановке он единственный
+            self._tick()
+            if not uncovered:
+                place(blocked | self._zone(open_hits), sorted(lengths, reverse=True), ships, 0)
+                return
+            cell = uncovered & -uncovered
+            for length in sorted(set(lengths), reverse=True):
+                rest = list(lengths)
+                rest.remove(length)
+                for mask in self._placements(length, blocked):
+                    # Корабль не может быть поражен целиком (он был бы потоплен)
+                    # и не может касаться попаданий по другим кораблям
+                    if not mask & cell or not mask & ~open_hits or self._zone(mask) & open_hits & ~mask:
+                        continue
+                    cover(blocked | self._zone(mask), uncovered & ~mask, rest, ships + (mask,))
+
+        def place(blocked, lengths, ships, previous):
+            self._tick()
+            if not lengths:
+                layouts.append(ships)
+                if len(layouts) > self.max_layouts:
+                    raise SearchAborted()
+                return
+            length = lengths[0]
+            same = len(ships) and popcount(ships[-1]) == length
+            for mask in self._placements(length, blocked):
+                # Одинаковые корабли ставятся по возрастанию маски, чтобы не повторять расстановки
+                if same and mask <= previous:
+                    continue
+                place(blocked | self._zone(mask), lengths[1:], ships + (mask,), mask)
+
+        cover(blocked, open_hits, list(snapshot.remaining_fleet), ())
+        return layouts
+
+    def solve(self, snapshot):
+        """Оптимальная клетка (x, y) или None, если эндшпиль еще не наступил или расчет не уложился"""
+        self._reset_metrics()
+        started = time.perf_counter()
+        self._deadline = started + self.time_limit
+        try:
+            if not snapshot.remaining_fleet or len(snapshot.remaining_fleet) > self.max_ships:
+                return None
+            layouts = self.enumerate_layouts(snapshot)
+            self.layouts = len(layouts)
+            if not layouts:
+                return None
+            # Клетки каждой расстановки, которые еще нужно поразить
+            self._occupied = [sum(ships) for ships in layouts]
+            self._ships = layouts
+            self._memo = {}
+            shots = snapshot.shot_mask
+            self.expected, cell = self._search(tuple(range(len(layouts))), shots, float("inf"))
+            self.solved = cell is not None
+            return self.geometry.cell(cell) if cell is not None else None
+        except SearchAborted:
+            return None
+        finally:
+            self.elapsed_ms = (time.perf_counter() - started) * 1000
+
+    def _lower_bound(self, ids, shots):
+        return sum(popcount(self._occupied[i] & ~shots) for i in ids) / len(ids)
+
+    def _outcome(self, layout, cell, shots):
+        """Результат выстрела в клетку при расстановке: промах, попадание или потопленный корабль"""
+        for ship in self._ships[layout]:
+            if ship & cell:
+                return ship if not ship & ~(shots | cell) else "hit"
+        return "miss"
+
+    def _search(self, ids, shots, bound):
+        """(ожидаемое число выстрелов, номер лучшей клетки); при отсечении - оценка не меньше bound и None"""
+        self._tick()
+        union = 0
+        for i in ids:
+            union |= self._occupied[i]
+        remaining = union & ~shots
+        key = (ids, remaining)
+        cached = self._memo.get(key)
+        if cached is not None:
+            value, cell, exact = cached
+            if exact or value >= bound:
+                return value, cell
+
+        if len(ids) == 1:
+            # Расстановка известна: остается поразить ее клетки
+            return popcount(remaining), (remaining & -remaining).bit_length() - 1
+
+        lower = self._lower_bound(ids, shots)
+        if lower >= bound:
+            self._memo[key] = (lower, None, False)
+            return lower, None
+
+        # Сначала клетки, занятые в большинстве расстановок
+        frequency = {}
+        for i in ids:
+            for index in iter_bits(self._occupied[i] & ~shots):
+                frequency[index] = frequency.get(index, 0) + 1
+        order = sorted(frequency, key=lambda index: -frequency[index])
+
+        best, best_cell = bound, None
+        total_count = len(ids)
+        for index in order:
+            cell = 1 << index
+            next_shots = shots | cell
+            groups = {}
+            for i in ids:
+                outcome = self._outcome(i, cell, shots)
+                # Расстановка, у которой поражены все клетки, - конец партии
+                if self._occupied[i] & ~next_shots:
+                    groups.setdefault(outcome, []).append(i)
+            parts = [(len(group) / total_count, tuple(group)) for group in groups.values()]
+            bounds = [self._lower_bound(group, next_shots) for _, group in parts]
+            value = 1 + sum(weight * bound_value for (weight, _), bound_value in zip(parts, bounds))
+            if value >= best:
+                continue
+            cut = False
+            for (weight, group), bound_value in zip(parts, bounds):
+                # Сколько может стоить группа, чтобы клетка осталась лучше текущей
+                limit = bound_value + (best - value) / weight
+                result, child = self._search(group, next_shots, limit)
+                value += weight * (result - bound_value)
+                # Отсеченная группа дает только оценку снизу: клетка не лучше текущей
+                cut = child is None
+                if cut or value >= best:
+                    break
+            if not cut and value < best:
+                best, best_cell = value, index
+
+        self._memo[key] = (best, best_cell, best_cell is not None)
+        return best, best_cell
+
+
+class EndgameAI(ComputerAI):
+    """ИИ с точным эндшпилем: ходы ComputerAI, пока возможных расстановок много
+
+    Когда оставшихся кораблей мало и их согласованных расстановок не
+    больше порога решателя, ход выбирает EndgameSolver. Для залпа решатель
+    выбирает первую клетку, остальные - ComputerAI.
+    """
+
+    def __init__(self, rules=None, rng=None, max_layouts=64, time_limit=0.05):
+        super().__init__(rules, rng)
+        self.solver = EndgameSolver(self.rules, max_layouts=max_layouts, time_limit=time_limit)
+        self.solved_moves = 0
+
+    def get_next_shot(self, board, exclude=()):
+        """Ход решателя в эндшпиле, иначе ход ComputerAI"""
+        if not exclude:
+            snapshot = self.sync(board)
+            cell = self.solver.solve(snapshot)
+            if cell is not None:
+                self.possible_targets.discard(cell)
+                self.solved_moves += 1
+                return cell
+        return super().get_next_shot(board, exclude)
+
+
+def main():
+    """Сравнение EndgameAI с ComputerAI на серии партий"""
+    import statistics
+    from engine import GameSession
+    from seeding import derive_seed
+
+    parser = argparse.ArgumentParser(description="Точный эндшпиль ИИ")
+    parser.add_argument("--games", type=int, default=100, help="количество партий")
+    parser.add_argument("--seed", type=int, default=1, help="зерно генератора случайных чисел")
+    args = parser.parse_args()
+
+    for ai_class in (ComputerAI, EndgameAI):
+        shots, worst, solver_ms = [], 0.0, []
+        for game in range(args.games):
+            session = GameSession(CLASSIC_RULES, derive_seed(args.seed, "game", game))
+            session.place_randomly(0)
+            session.place_randomly(1)
+            session.start(1)
+            ai = ai_class(CLASSIC_RULES, rng=session.make_rng("ai"))
+            while not session.is_over:
+                session.current_player = 1
+                started = time.perf_counter()
+                x, y = ai.get_next_shot(session.boards[0].snapshot(public=True))
+                worst = max(worst, time.perf_counter() - started)
+                if isinstance(ai, EndgameAI) and ai.solver.layouts:
+                    solver_ms.append(ai.solver.elapsed_ms)
+                hit, message = session.shoot(x, y)
+                if message == "Потоплен!":
+                    ai.register_sunk()
+                elif hit:
+                    ai.register_hit(x, y)
+                else:
+                    ai.register_miss(x, y)
+            shots.append(session.shots[1])
+        line = f"{ai_class.__name__}: {statistics.mean(shots):.2f} выстрелов за партию, худший ход {worst * 1000:.1f} мс"
+        if solver_ms:
+            line += f", решатель в среднем {statistics.mean(solver_ms):.2f} мс"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,151 +1,341 @@
 import random
-from constants import GRID_SIZE
+from collections import Counter
+from bitboard import get_geometry, iter_bits
+from opening_book import OpeningLine
+from rules import CLASSIC_RULES
+
+# Стороны от попадания для probe_order: вниз, вправо, вверх, влево (y растет вниз)
+PROBE_DIRECTIONS = {"D": (0, 1), "R": (1, 0), "U": (0, -1), "L": (-1, 0)}
+
+
+class CellPool:
+    """Множество клеток со случайным выбором и удалением за O(1)"""
+
+    def __init__(self, cells=()):
+        self._cells = []
+        self._positions = {}
+        # Порядковые номера добавления (для first): удаление переставляет _cells
+        self._added = {}
+        self._counter = 0
+        for cell in cells:
+            self.add(cell)
+
+    def __len__(self):
+        return len(self._cells)
+
+    def __contains__(self, cell):
+        return cell in self._positions
+
+    def __iter__(self):
+        return iter(list(self._cells))
+
+    def add(self, cell):
+        if cell not in self._positions:
+            self._positions[cell] = len(self._cells)
+            self._cells.append(cell)
+            self._added[cell] = self._counter
+            self._counter += 1
+
+    def discard(self, cell):
+        position = self._positions.pop(cell, None)
+        if position is None:
+            return
+        del self._added[cell]
+        # Последняя клетка занимает место удаленной
+        last = self._cells.pop()
+        if position < len(self._cells):
+            self._cells[position] = last
+            self._positions[last] = position
+
+    def clear(self):
+        self._cells = []
+        self._positions = {}
+        self._added = {}
+
+    def first(self, exclude=()):
+        """Клетка, добавленная раньше остальных (не из exclude), или None"""
+        cells = [cell for cell in self._cells if cell not in exclude]
+        return min(cells, key=self._added.get) if cells else None
+
+    def choice(self, rng, exclude=()):
+        """Случайная клетка не из exclude или None"""
+        if not exclude:
+            return rng.choice(self._cells) if self._cells else None
+        # Исключенных клеток мало (залп), поэтому обычно хватает нескольких попыток
+        for _ in range(8):
+            if not self._cells:
+                return None
+            cell = rng.choice(self._cells)
+            if cell not in exclude:
+                return cell
+        cells = [cell for cell in self._cells if cell not in exclude]
+        return rng.choice(cells) if cells else None
+
+
+class ShotKnowledge:
+    """Необстрелянные клетки доски соперника, разделенные по диагоналям
+
+    Клетки делятся на spacing групп по остатку (x + y) % spacing; выбор
+    идет сначала из группы offset, затем из следующих. При spacing=2 это
+    шахматный порядок. Клетки удаляются по мере поступления результатов
+    выстрелов; клетки, открытые без выстрела (вокруг потопленных кораблей),
+    добираются в sync по разнице маски доски с уже известными клетками.
+    """
+
+    def __init__(self, rules, spacing=2, offset=0):
+        self.rules = rules
+        self.geometry = get_geometry(rules.width, rules.height)
+        self.spacing = spacing
+        self.known_mask = 0
+        cells = [(x, y) for y in range(rules.height) for x in range(rules.width)]
+        # Группы клеток в порядке выбора: сначала группа offset
+        residues = [(offset + shift) % spacing for shift in range(spacing)]
+        self._pools = {residue: CellPool(cell for cell in cells if sum(cell) % spacing == residue)
+                       for residue in residues}
+        self._order = [self._pools[residue] for residue in residues]
+
+    def is_unknown(self, x, y):
+        return (x, y) in self._pools[(x + y) % self.spacing]
+
+    def mark(self, x, y):
+        """Клетка стала известной"""
+        self.known_mask |= 1 << self.geometry.index(x, y)
+        self._pools[(x + y) % self.spacing].discard((x, y))
+
+    def sync(self, snapshot):
+        """Учет клеток, открытых на доске после прошлого хода"""
+        known = snapshot.shot_mask | snapshot.halo_mask
+        for index in iter_bits(known & ~self.known_mask):
+            self.mark(*self.geometry.cell(index))
+
+    def choose(self, rng, exclude=()):
+        """Случайная необстрелянная клетка, сначала из группы offset"""
+        for pool in self._order:
+            cell = pool.choice(rng, exclude)
+            if cell is not None:
+                return cell
+        return None
+
 
 class ComputerAI:
-    """Класс для управления искусственным интеллектом компьютера"""
-    
-    def __init__(self):
+    """Класс для управления искусственным интеллектом компьютера
+
+    Знания о доске обновляются по результатам выстрелов: необстрелянные
+    клетки по четности, попадания по непотопленному кораблю, клетки-
+    кандидаты рядом с ними и оставшийся флот. Выбор хода не перебирает
+    всю доску, поэтому его стоимость не зависит от ее размера.
+
+    Настройки (подбираются autotune.py): spacing и offset - сетка поиска
+    (x + y) % spacing == offset, target_choice - "random" (случайная
+    клетка-кандидат) или "first" (по порядку добавления), probe_order -
+    порядок проверки сторон от одиночного попадания: буквы D, R, U, L.
+    """
+
+    def __init__(self, rules=None, rng=None, spacing=2, offset=0, target_choice="random", probe_order="DRUL"):
+        self.rules = rules or CLASSIC_RULES
+        # Собственный генератор делает партии воспроизводимыми по зерну
+        self.rng = rng or random.Random()
+        self.width = self.rules.width
+        self.height = self.rules.height
+        self.knowledge = ShotKnowledge(self.rules, spacing, offset)
+        self.target_choice = target_choice
+        self.probe_directions = tuple(PROBE_DIRECTIONS[letter] for letter in probe_order)
+        # Заранее рассчитанный дебют (если для правил есть файл)
+        self.opening = OpeningLine(self.rules, self.rng)
+        self.remaining_fleet = Counter(self.rules.fleet)
+        self.sunk_mask = 0
         self.last_hit = None
         self.hit_cells = []
-        self.possible_targets = []
+        self.possible_targets = CellPool()
         self.hunt_mode = False
         self.ship_direction = None
-        
-    def get_next_shot(self, board):
-        """Получить следующий ход компьютера"""
+
+    def get_next_shots(self, board, count):
+        """Клетки залпа: count разных клеток (меньше, если свободных клеток не хватает)"""
+        targets = []
+        for _ in range(count):
+            target = self.get_next_shot(board, exclude=targets)
+            if target is None:
+                break
+            targets.append(target)
+        return targets
+
+    def get_next_shot(self, board, exclude=()):
+        """Получить следующий ход компьютера
+
+        exclude - клетки, уже выбранные в текущий залп.
+        """
+        snapshot = self.sync(board)
+
+        # Если было попадание, а целей рядом нет, ищем клетки рядом
+        if not self.possible_targets and self.hit_cells:
+            self.update_targets()
+
+        # Поиск кораблей начинается с дебюта
+        if not self.possible_targets:
+            target = self.opening.next_shot(snapshot, exclude)
+            if target is not None:
+                return target
+
         # Если есть возможные цели рядом с попаданием
-        if self.possible_targets:
-            target = random.choice(self.possible_targets)
-            self.possible_targets.remove(target)
+        if self.target_choice == "first":
+            target = self.possible_targets.first(exclude)
+        else:
+            target = self.possible_targets.choice(self.rng, exclude)
+        if target is not None:
+            self.possible_targets.discard(target)
             return target
-        
-        # Если было попадание, ищем клетки рядом
-        if self.hit_cells:
-            # Если есть несколько попаданий, определяем направление
-            if len(self.hit_cells) >= 2:
-                x_coords = [hit[0] for hit in self.hit_cells]
-                y_coords = [hit[1] for hit in self.hit_cells]
-                
-                # Проверяем, все ли попадания на одной линии
-                if len(set(y_coords)) == 1:
-                    # Корабль горизонтальный
-                    self.ship_direction = 'horizontal'
-                    y = y_coords[0]
-                    min_x = min(x_coords)
-                    max_x = max(x_coords)
-                    
-                    # Проверяем только клетки слева и справа
-                    if min_x > 0 and board.shots[y][min_x - 1] == 0:
-                        self.possible_targets.append((min_x - 1, y))
-                    if max_x < GRID_SIZE - 1 and board.shots[y][max_x + 1] == 0:
-                        self.possible_targets.append((max_x + 1, y))
-                        
-                elif len(set(x_coords)) == 1:
-                    # Корабль вертикальный
-                    self.ship_direction = 'vertical'
-                    x = x_coords[0]
-                    min_y = min(y_coords)
-                    max_y = max(y_coords)
-                    
-                    # Проверяем только клетки сверху и снизу
-                    if min_y > 0 and board.shots[min_y - 1][x] == 0:
-                        self.possible_targets.append((x, min_y - 1))
-                    if max_y < GRID_SIZE - 1 and board.shots[max_y + 1][x] == 0:
-                        self.possible_targets.append((x, max_y + 1))
-                else:
-                    # Попадания не на одной линии
-                    self.add_adjacent_targets(board)
-            
-            # Если только одно попадание, проверяем все 4 стороны
-            elif len(self.hit_cells) == 1:
-                x, y = self.hit_cells[0]
-                directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-                random.shuffle(directions)
-                
-                for dx, dy in directions:
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < GRID_SIZE and 0 <= ny < GRID_SIZE and board.shots[ny][nx] == 0:
-                        self.possible_targets.append((nx, ny))
-            
-            # Если есть цели, выбираем одну
-            if self.possible_targets:
-                target = random.choice(self.possible_targets)
-                self.possible_targets.remove(target)
-                return target
-        
+
         # Случайный выстрел в шахматном порядке для эффективности
-        valid_moves = []
-        for y in range(GRID_SIZE):
-            for x in range(GRID_SIZE):
-                if board.shots[y][x] == 0:
-                    # Предпочитаем клетки в шахматном порядке
-                    if (x + y) % 2 == 0:
-                        valid_moves.append((x, y))
-        
-        # Если нет клеток в шахматном порядке, берем любые
-        if not valid_moves:
-            for y in range(GRID_SIZE):
-                for x in range(GRID_SIZE):
-                    if board.shots[y][x] == 0:
-                        valid_moves.append((x, y))
-        
-        if valid_moves:
-            return random.choice(valid_moves)
-        
-        return None
-    
-    def add_adjacent_targets(self, board):
+        return self.knowledge.choose(self.rng, exclude)
+
+    def sync(self, board):
+        """Сверка знаний с открытым снимком доски"""
+        snapshot = board.snapshot(public=True) if hasattr(board, "snapshot") else board
+        self.knowledge.sync(snapshot)
+        for target in self.possible_targets:
+            if not self.knowledge.is_unknown(*target):
+                self.possible_targets.discard(target)
+        if snapshot.sunk_mask != self.sunk_mask or len(snapshot.remaining_fleet) != sum(self.remaining_fleet.values()):
+            # Длины потопленных кораблей - по доске: серия попаданий не равна кораблю в залпе и при касании
+            self.sunk_mask = snapshot.sunk_mask
+            self.remaining_fleet = Counter(snapshot.remaining_fleet)
+        if not self.hit_cells:
+            # Попадания по соседнему кораблю, учет которых сброшен при потоплении (касание кораблей)
+            for index in iter_bits(snapshot.hit_mask & ~snapshot.sunk_mask):
+                self.hit_cells.append(self.knowledge.geometry.cell(index))
+        return snapshot
+
+    def max_ship_length(self):
+        """Длина самого длинного непотопленного корабля"""
+        return max((length for length, count in self.remaining_fleet.items() if count), default=0)
+
+    def update_targets(self):
+        """Клетки-кандидаты рядом с попаданиями по непотопленному кораблю"""
+        # Если есть несколько попаданий, определяем направление
+        if len(self.hit_cells) >= 2:
+            x_coords = [hit[0] for hit in self.hit_cells]
+            y_coords = [hit[1] for hit in self.hit_cells]
+            # Прямой корабль не бывает длиннее оставшихся
+            can_grow = len(self.hit_cells) < self.max_ship_length()
+
+            # Проверяем, все ли попадания на одной линии
+            if len(set(y_coords)) == 1:
+                # Корабль горизонтальный: проверяем только клетки слева и справа
+                self.ship_direction = 'horizontal'
+                if can_grow:
+                    self.add_target(min(x_coords) - 1, y_coords[0])
+                    self.add_target(max(x_coords) + 1, y_coords[0])
+
+            elif len(set(x_coords)) == 1:
+                # Корабль вертикальный: проверяем только клетки сверху и снизу
+                self.ship_direction = 'vertical'
+                if can_grow:
+                    self.add_target(x_coords[0], min(y_coords) - 1)
+                    self.add_target(x_coords[0], max(y_coords) + 1)
+            else:
+                # Попадания не на одной линии
+                self.add_adjacent_targets()
+
+            # Изогнутый корабль: концы линии закрыты, проверяем все соседние клетки
+            if not self.possible_targets and self.rules.allow_bending:
+                self.ship_direction = None
+                self.add_adjacent_targets()
+
+        # Если только одно попадание, проверяем все 4 стороны
+        else:
+            x, y = self.hit_cells[0]
+            for dx, dy in self.probe_directions:
+                self.add_target(x + dx, y + dy)
+
+    def add_target(self, x, y):
+        """Добавляет клетку в цели, если по ней еще не стреляли"""
+        if 0 <= x < self.width and 0 <= y < self.height and self.knowledge.is_unknown(x, y):
+            self.possible_targets.add((x, y))
+
+    def add_adjacent_targets(self):
         """Добавляет соседние клетки для всех попаданий"""
+        # Если направление уже определено, добавляем только клетки в этом направлении
+        if self.ship_direction == 'horizontal':
+            directions = ((-1, 0), (1, 0))
+        elif self.ship_direction == 'vertical':
+            directions = ((0, -1), (0, 1))
+        else:
+            # Направление неизвестно, проверяем все 4 стороны
+            directions = self.probe_directions
         for x, y in self.hit_cells:
-            # Если направление уже определено, добавляем только клетки в этом направлении
-            if self.ship_direction == 'horizontal':
-                for dx in [-1, 1]:
-                    nx = x + dx
-                    if 0 <= nx < GRID_SIZE and board.shots[y][nx] == 0:
-                        if (nx, y) not in self.possible_targets:
-                            self.possible_targets.append((nx, y))
-            elif self.ship_direction == 'vertical':
-                for dy in [-1, 1]:
-                    ny = y + dy
-                    if 0 <= ny < GRID_SIZE and board.shots[ny][x] == 0:
-                        if (x, ny) not in self.possible_targets:
-                            self.possible_targets.append((x, ny))
-            else:
-                # Направление неизвестно, проверяем все 4 стороны
-                directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-                for dx, dy in directions:
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < GRID_SIZE and 0 <= ny < GRID_SIZE and board.shots[ny][nx] == 0:
-                        if (nx, ny) not in self.possible_targets:
-                            self.possible_targets.append((nx, ny))
-    
+            for dx, dy in directions:
+                self.add_target(x + dx, y + dy)
+
     def register_hit(self, x, y):
         """Регистрация попадания"""
+        self.knowledge.mark(x, y)
         self.last_hit = (x, y)
         self.hit_cells.append((x, y))
         self.hunt_mode = True
-        
+
         # Если уже есть попадания, пытаемся определить направление
         if len(self.hit_cells) >= 2 and self.ship_direction is None:
             x_coords = [hit[0] for hit in self.hit_cells]
             y_coords = [hit[1] for hit in self.hit_cells]
-            
+
             if len(set(y_coords)) == 1:
                 self.ship_direction = 'horizontal'
-                self.possible_targets = []
+                self.possible_targets.clear()
             elif len(set(x_coords)) == 1:
                 self.ship_direction = 'vertical'
-                self.possible_targets = []
-    
+                self.possible_targets.clear()
+
     def register_miss(self, x, y):
         """Регистрация промаха"""
-        if (x, y) in self.possible_targets:
-            self.possible_targets.remove((x, y))
-    
+        self.knowledge.mark(x, y)
+        self.possible_targets.discard((x, y))
+
     def register_sunk(self):
-        """Регистрация потопления корабля"""
+        """Регистрация потопления корабля
+
+        Оставшийся флот обновляется в sync по маске потопленных кораблей
+        доски перед следующим ходом.
+        """
         self.last_hit = None
         self.hit_cells = []
-        self.possible_targets = []
+        self.possible_targets.clear()
         self.hunt_mode = False
-        self.ship_direction = None
\ No newline at end of file
+        self.ship_direction = None
+
+
+class ParityAI:
+    """Простой ИИ: случайные выстрелы в шахматном порядке без добивания"""
+
+    def __init__(self, rules=None, rng=None):
+        self.rules = rules or CLASSIC_RULES
+        self.rng = rng or random.Random()
+        self.width = self.rules.width
+        self.height = self.rules.height
+        self.knowledge = ShotKnowledge(self.rules)
+
+    def get_next_shots(self, board, count):
+        """Клетки залпа: count разных клеток"""
+        targets = []
+        for _ in range(count):
+            target = self.get_next_shot(board, exclude=targets)
+            if target is None:
+                break
+            targets.append(target)
+        return targets
+
+    def get_next_shot(self, board, exclude=()):
+        """Случайная необстрелянная клетка, сначала в шахматном порядке"""
+        self.knowledge.sync(board.snapshot(public=True) if hasattr(board, "snapshot") else board)
+        return self.knowledge.choose(self.rng, exclude)
+
+    def register_hit(self, x, y):
+        """Регистрация попадания"""
+        self.knowledge.mark(x, y)
+
+    def register_miss(self, x, y):
+        """Регистрация промаха"""
+        self.knowledge.mark(x, y)
+
+    def register_sunk(self):
+        """Регистрация потопления корабля"""
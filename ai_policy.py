@@ -0,0 +1,221 @@
+import glob
+import json
+import os
+import random
+import re
+import numpy as np
+from ai_density import mask_to_array
+from rules import CLASSIC_RULES
+
+# Каталог весов сети; файл: <ключ правил>_v<версия>.npz
+POLICY_DIR = "policy_weights"
+# Плоскости входа: неизвестные клетки, закрытые (промахи и ореолы), попадания по
+# непотопленным кораблям, потопленные, доля оставшихся клеток флота, длина самого
+# длинного оставшегося корабля (две последние одинаковы по всей доске)
+INPUT_PLANES = 6
+
+
+def encode(snapshot, rules):
+    """Открытый снимок доски в виде плоскостей входа сети (H, W, INPUT_PLANES)"""
+    width, height = rules.width, rules.height
+    planes = np.empty((height, width, INPUT_PLANES), dtype=np.float32)
+    planes[..., 0] = mask_to_array(snapshot.unknown_mask, width, height)
+    planes[..., 1] = mask_to_array(snapshot.miss_mask | snapshot.halo_mask, width, height)
+    planes[..., 2] = mask_to_array(snapshot.hit_mask & ~snapshot.sunk_mask, width, height)
+    planes[..., 3] = mask_to_array(snapshot.sunk_mask, width, height)
+    remaining = snapshot.remaining_fleet
+    planes[..., 4] = sum(remaining) / sum(rules.fleet)
+    planes[..., 5] = max(remaining, default=0) / max(rules.fleet)
+    return planes
+
+
+def _patches(x):
+    """Окна 3x3 вокруг каждой клетки (с нулями за краем): (N, H, W, 9 * C)"""
+    n, height, width, channels = x.shape
+    padded = np.zeros((n, height + 2, width + 2, channels), dtype=x.dtype)
+    padded[:, 1:-1, 1:-1] = x
+    # Девять сдвигов подряд по последней оси: так быстрее, чем окна через strides
+    return np.concatenate([padded[:, dy:dy + height, dx:dx + width] for dy in range(3) for dx in range(3)],
+                          axis=-1)
+
+
+def _unpatch(grad, channels):
+    """Обратный шаг к _patches: сумма градиентов окон по клеткам входа"""
+    n, height, width, _ = grad.shape
+    grad = grad.reshape(n, height, width, 3, 3, channels)
+    padded = np.zeros((n, height + 2, width + 2, channels), dtype=grad.dtype)
+    for dy in range(3):
+        for dx in range(3):
+            padded[:, dy:dy + height, dx:dx + width] += grad[:, :, :, dy, dx]
+    return padded[:, 1:-1, 1:-1]
+
+
+class PolicyNet:
+    """Сверточная сеть: оценка каждой клетки доски (логит вероятности корабля)
+
+    Несколько сверток 3x3 с ReLU и свертка 1x1 в одну плоскость. Сеть
+    полностью сверточная, поэтому одни веса подходят для доски любого
+    размера. Свертка - умножение матрицы окон 3x3 на матрицу весов, так что
+    прямой проход - несколько векторных операций NumPy.
+    """
+
+    def __init__(self, hidden=(24, 24, 24), seed=None, params=None):
+        self.hidden = tuple(hidden)
+        if params is not None:
+            self.params = {name: np.asarray(value, dtype=np.float32) for name, value in params.items()}
+            return
+        rng = np.random.default_rng(seed)
+        self.params = {}
+        channels = INPUT_PLANES
+        for layer, size in enumerate(self.hidden):
+            # Инициализация He для ReLU
+            self.params[f"w{layer}"] = (rng.standard_normal((9 * channels, size))
+                                        * np.sqrt(2 / (9 * channels))).astype(np.float32)
+            self.params[f"b{layer}"] = np.zeros(size, dtype=np.float32)
+            channels = size
+        self.params["w_out"] = (rng.standard_normal((channels, 1)) * np.sqrt(1 / channels)).astype(np.float32)
+        self.params["b_out"] = np.zeros(1, dtype=np.float32)
+
+    def forward(self, x, keep=False):
+        """Логиты клеток (N, H, W) для входа (N, H, W, INPUT_PLANES); keep - сохранить данные для backward"""
+        cache = []
+        for layer in range(len(self.hidden)):
+            patches = _patches(x)
+            x = np.maximum(patches @ self.params[f"w{layer}"] + self.params[f"b{layer}"], 0)
+            if keep:
+                cache.append((patches, x))
+        logits = (x @ self.params["w_out"])[..., 0] + self.params["b_out"][0]
+        if keep:
+            self._cache = (cache, x)
+        return logits
+
+    def backward(self, grad_logits):
+        """Градиенты параметров по градиенту логитов после forward(keep=True)"""
+        cache, x = self._cache
+        grads = {"w_out": np.tensordot(x, grad_logits, axes=((0, 1, 2), (0, 1, 2)))[:, None],
+                 "b_out": np.array([grad_logits.sum()], dtype=np.float32)}
+        grad = grad_logits[..., None] * self.params["w_out"][:, 0]
+        for layer in reversed(range(len(self.hidden))):
+            patches, output = cache[layer]
+            grad = grad * (output > 0)
+            grads[f"w{layer}"] = np.tensordot(patches, grad, axes=((0, 1, 2), (0, 1, 2)))
+            grads[f"b{layer}"] = grad.sum(axis=(0, 1, 2))
+            if layer:
+                grad = _unpatch(grad @ self.params[f"w{layer}"].T, cache[layer - 1][1].shape[-1])
+        self._cache = None
+        return grads
+
+    def save(self, path, version, rules, **info):
+        """Запись весов и описания (версия, правила, слои, метрики обучения)"""
+        meta = dict(info, version=version, rules=rules.key(), hidden=list(self.hidden))
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(path, meta=np.array(json.dumps(meta, ensure_ascii=False)), **self.params)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Сеть и ее описание из файла весов"""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            params = {name: data[name] for name in data.files if name != "meta"}
+        return cls(meta["hidden"], params=params), meta
+
+
+def weights_path(rules, version, directory=POLICY_DIR):
+    """Путь к файлу весов версии version для правил"""
+    return os.path.join(directory, f"{rules.key()}_v{version:03d}.npz")
+
+
+def latest_weights(rules, directory=POLICY_DIR):
+    """(путь, версия) последних весов для правил или None
+
+    Если для правил весов нет, берутся последние веса любых правил: сеть
+    сверточная и работает на любой доске, хотя и хуже, чем обученная для нее.
+    """
+    found = []
+    for path in glob.glob(os.path.join(directory, "*_v*.npz")):
+        match = re.fullmatch(r"(.+)_v(\d+)\.npz", os.path.basename(path))
+        if match:
+            found.append((match.group(1) == rules.key(), int(match.group(2)), path))
+    if not found:
+        return None
+    _, version, path = max(found)
+    return path, version
+
+
+# Загруженные сети по путям файлов
+_nets = {}
+
+
+def get_policy(rules, directory=POLICY_DIR):
+    """Сеть последней версии для правил или None; файл читается один раз на процесс"""
+    latest = latest_weights(rules, directory)
+    if latest is None:
+        return None
+    path = latest[0]
+    if path not in _nets:
+        try:
+            _nets[path] = PolicyNet.load(path)[0]
+        except Exception as e:
+            print(f"Ошибка загрузки весов сети {path}: {e}")
+            _nets[path] = None
+    return _nets[path]
+
+
+class PolicyAI:
+    """ИИ с обученной сетью: стреляет в неизвестную клетку с наибольшей оценкой сети
+
+    Ход - кодирование открытого снимка доски и один прямой проход сети.
+    Веса берутся из каталога весов (последняя версия для правил), их можно
+    передать явно через net. explore - доля случайных ходов (для обучения).
+    """
+
+    def __init__(self, rules=None, rng=None, net=None, explore=0.0, directory=POLICY_DIR):
+        self.rules = rules or CLASSIC_RULES
+        self.rng = rng or random.Random()
+        self.width = self.rules.width
+        self.height = self.rules.height
+        self.net = net or get_policy(self.rules, directory)
+        if self.net is None:
+            raise ValueError(f"Нет весов сети для правил {self.rules.key()} в каталоге {directory}")
+        self.explore = explore
+        self._np_rng = np.random.default_rng(self.rng.getrandbits(64))
+
+    def scores(self, board):
+        """Плоскости входа (H, W, C) и логиты клеток (H, W)"""
+        snapshot = board.snapshot(public=True) if hasattr(board, "snapshot") else board
+        planes = encode(snapshot, self.rules)
+        return planes, self.net.forward(planes[None])[0]
+
+    def _best_cells(self, board, count, exclude=()):
+        planes, logits = self.scores(board)
+        available = planes[..., 0] > 0
+        for x, y in exclude:
+            available[y, x] = False
+        count = min(count, int(available.sum()))
+        if not count:
+            return []
+        scores = np.where(available, logits, -np.inf).ravel()
+        if self.explore and self.rng.random() < self.explore:
+            scores = np.where(available.ravel(), self._np_rng.random(scores.size), -np.inf)
+        order = np.argsort(-scores)[:count]
+        return [(int(index % self.width), int(index // self.width)) for index in order]
+
+    def get_next_shot(self, board, exclude=()):
+        """Клетка с наибольшей оценкой сети"""
+        cells = self._best_cells(board, 1, exclude)
+        return cells[0] if cells else None
+
+    def get_next_shots(self, board, count):
+        """Клетки залпа: count клеток с наибольшими оценками"""
+        return self._best_cells(board, count)
+
+    # Состояние берется с доски на каждом ходу, отдельный учет результатов не нужен
+    def register_hit(self, x, y):
+        """Регистрация попадания"""
+
+    def register_miss(self, x, y):
+        """Регистрация промаха"""
+
+    def register_sunk(self):
+        """Регистрация потопления корабля"""
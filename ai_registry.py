@@ -0,0 +1,123 @@
+import glob
+import importlib
+import importlib.util
+
+# Методы, которые вызывают у ИИ игра и безголовые прогоны:
+#   get_next_shot(board, exclude=()) - клетка (x, y) или None
+#   get_next_shots(board, count) - клетки залпа
+#   register_hit(x, y), register_miss(x, y), register_sunk() - результаты выстрелов
+# board - доска или ее открытый снимок (BoardSnapshot), конструктор - (rules, rng=None).
+STRATEGY_METHODS = ("get_next_shot", "get_next_shots", "register_hit", "register_miss", "register_sunk")
+
+
+class StrategyInfo:
+    """Описание стратегии ИИ: класс, сложность и заявленная стоимость хода
+
+    target - путь к классу вида "модуль:Класс" (модуль загружается только
+    при создании ИИ, поэтому стратегии с NumPy не нужны остальным).
+    ms_per_move - ожидаемое время хода на классической доске, memory_mb -
+    дополнительная память, avg_shots - среднее число выстрелов до победы
+    на классической доске (меньше - сильнее). requires - нужные модули,
+    requires_files - шаблоны путей файлов, без которых стратегию не создать
+    (например, весов сети).
+    """
+
+    def __init__(self, name, title, target, difficulty, ms_per_move, memory_mb, avg_shots, requires=(),
+                 requires_files=()):
+        self.name = name
+        self.title = title
+        self.target = target
+        self.difficulty = difficulty
+        self.ms_per_move = ms_per_move
+        self.memory_mb = memory_mb
+        self.avg_shots = avg_shots
+        self.requires = tuple(requires)
+        self.requires_files = tuple(requires_files)
+
+    def __repr__(self):
+        return f"StrategyInfo({self.name!r}, {self.target!r})"
+
+    @property
+    def available(self):
+        """Все нужные модули установлены и нужные файлы есть"""
+        return (all(importlib.util.find_spec(module) is not None for module in self.requires)
+                and all(glob.glob(pattern) for pattern in self.requires_files))
+
+    def load(self):
+        """Класс стратегии"""
+        module_name, class_name = self.target.split(":")
+        return getattr(importlib.import_module(module_name), class_name)
+
+    def create(self, rules=None, rng=None, **options):
+        """Новый ИИ этой стратегии (options - параметры конструктора, например из ai_config.json)"""
+        return self.load()(rules, rng=rng, **options)
+
+
+STRATEGIES = {}
+
+
+def register_strategy(info):
+    """Добавление стратегии в реестр (имя должно быть новым)"""
+    if info.name in STRATEGIES:
+        raise ValueError(f"Стратегия {info.name} уже зарегистрирована")
+    STRATEGIES[info.name] = info
+    return info
+
+
+def get_strategy(name):
+    """Стратегия по имени"""
+    try:
+        return STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"Неизвестная стратегия ИИ: {name}") from None
+
+
+def available_strategies():
+    """Доступные стратегии по возрастанию сложности"""
+    return sorted((info for info in STRATEGIES.values() if info.available), key=lambda info: info.difficulty)
+
+
+def create_ai(name, rules=None, rng=None, **options):
+    """Новый ИИ стратегии name"""
+    return get_strategy(name).create(rules, rng, **options)
+
+
+def check_strategy(ai):
+    """Проверка, что объект реализует все методы стратегии"""
+    missing = [method for method in STRATEGY_METHODS if not callable(getattr(ai, method, None))]
+    if missing:
+        raise TypeError(f"{type(ai).__name__}: нет методов стратегии {', '.join(missing)}")
+    return ai
+
+
+def cheapest_strategy(max_shots=None, max_ms=None, max_memory_mb=None):
+    """Самая дешевая доступная стратегия, не слабее max_shots выстрелов до победы
+
+    Стратегии сравниваются по времени хода, затем по памяти; None, если
+    ни одна не подходит под ограничения.
+    """
+    suitable = [info for info in available_strategies()
+                if (max_shots is None or info.avg_shots <= max_shots)
+                and (max_ms is None or info.ms_per_move <= max_ms)
+                and (max_memory_mb is None or info.memory_mb <= max_memory_mb)]
+    if not suitable:
+        return None
+    return min(suitable, key=lambda info: (info.ms_per_move, info.memory_mb))
+
+
+# Встроенные стратегии; стоимость и сила замерены на классических правилах
+register_strategy(StrategyInfo("parity", "Легкий", "ai_logic:ParityAI", 1,
+                               ms_per_move=0.05, memory_mb=0, avg_shots=78))
+register_strategy(StrategyInfo("classic", "Обычный", "ai_logic:ComputerAI", 2,
+                               ms_per_move=0.05, memory_mb=0, avg_shots=57))
+register_strategy(StrategyInfo("endgame", "Расчетливый", "ai_endgame:EndgameAI", 3,
+                               ms_per_move=4, memory_mb=1, avg_shots=57))
+register_strategy(StrategyInfo("policy", "Обученный", "ai_policy:PolicyAI", 4,
+                               ms_per_move=0.3, memory_mb=1, avg_shots=56, requires=("numpy",),
+                               requires_files=("policy_weights/*_v*.npz",)))
+register_strategy(StrategyInfo("density", "Сложный", "ai_density:DensityAI", 5,
+                               ms_per_move=20, memory_mb=25, avg_shots=56, requires=("numpy",)))
+register_strategy(StrategyInfo("sampling", "Эксперт", "ai_sampling:SamplingAI", 6,
+                               ms_per_move=200, memory_mb=120, avg_shots=52, requires=("numpy",)))
+
+DEFAULT_STRATEGY = "classic"
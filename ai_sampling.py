@@ -0,0 +1,405 @@
+import argparse
+import multiprocessing
+import random
+import time
+import weakref
+from multiprocessing import shared_memory
+import numpy as np
+from ai_density import mask_to_array
+from bitboard import get_geometry, iter_bits, popcount
+from board import Board
+from opening_book import OpeningLine
+from rules import CLASSIC_RULES
+from seeding import make_rng
+
+
+class KnowledgeBlock:
+    """Открытое состояние доски соперника в общей памяти
+
+    Процессы-сэмплеры читают знания отсюда, поэтому на каждом ходу в них
+    передаются только номер слота, зерно и размер выборки. Разметка:
+    номер версии (int64), количество непотопленных кораблей каждой длины
+    (int32) и три битовые маски - закрытые клетки (промахи и клетки вокруг
+    потопленных кораблей), попадания и потопленные корабли.
+    """
+
+    def __init__(self, rules, name=None):
+        self.rules = rules
+        self.mask_bytes = (rules.cells + 7) // 8
+        self.max_length = max(rules.fleet)
+        self._counts_offset = 8
+        self._masks_offset = self._counts_offset + 4 * (self.max_length + 1)
+        size = self._masks_offset + 3 * self.mask_bytes
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self.memory.name
+        self._version = np.ndarray((1,), dtype=np.int64, buffer=self.memory.buf)
+        self._counts = np.ndarray((self.max_length + 1,), dtype=np.int32, buffer=self.memory.buf,
+                                  offset=self._counts_offset)
+        if self.owner:
+            self._version[0] = 0
+
+    @property
+    def version(self):
+        return int(self._version[0])
+
+    def write(self, closed, hits, sunk, remaining_fleet):
+        """Запись новых знаний (увеличивает номер версии)"""
+        offset = self._masks_offset
+        for mask in (closed, hits, sunk):
+            self.memory.buf[offset:offset + self.mask_bytes] = mask.to_bytes(self.mask_bytes, "little")
+            offset += self.mask_bytes
+        self._counts[:] = 0
+        for length in remaining_fleet:
+            self._counts[length] += 1
+        self._version[0] += 1
+
+    def read(self):
+        """Текущие знания: (версия, закрытые клетки, попадания, потопленные, длины кораблей)"""
+        masks = []
+        offset = self._masks_offset
+        for _ in range(3):
+            masks.append(int.from_bytes(self.memory.buf[offset:offset + self.mask_bytes], "little"))
+            offset += self.mask_bytes
+        remaining = []
+        for length in range(self.max_length, 0, -1):
+            remaining.extend([length] * int(self._counts[length]))
+        return (self.version, masks[0], masks[1], masks[2], tuple(remaining))
+
+    def close(self):
+        """Отключение от общей памяти (владелец также удаляет ее)"""
+        # Представления NumPy держат буфер, их нужно отпустить до закрытия
+        self._version = self._counts = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+class LayoutSampler:
+    """Случайные расстановки оставшихся кораблей, согласованные со знаниями о доске
+
+    Выборка не равновероятна среди всех согласованных расстановок: корабли
+    через попадания и остальные корабли ставятся по очереди, каждый -
+    равновероятно среди позиций, допустимых после уже поставленных.
+    Расстановки, где первые корабли оставляют больше места остальным,
+    выпадают реже, чем при равновероятном выборе.
+    """
+
+    def __init__(self, rules, rng):
+        self.rules = rules
+        self.rng = rng
+        self.geometry = get_geometry(rules.width, rules.height)
+        self._shapes = {length: [(shape, self.geometry.shape_mask(shape)) for shape in rules.ship_shapes(length)]
+                        for length in set(rules.fleet)}
+
+    def _zone(self, mask):
+        if self.rules.allow_touching:
+            return mask
+        return self.geometry.dilate(mask)
+
+    def sample(self, closed, hits, sunk, remaining, attempts=20):
+        """Маски кораблей случайной согласованной расстановки или None"""
+        # Непотопленные корабли не заходят на закрытые клетки и не касаются потопленных
+        blocked = closed | self._zone(sunk)
+        open_hits = hits & ~sunk
+        for _ in range(attempts):
+            ships = self._try(blocked, open_hits, list(remaining))
+            if ships is not None:
+                return ships
+        return None
+
+    def _try(self, blocked, open_hits, lengths):
+        geometry = self.geometry
+        width = geometry.width
+        ships = []
+
+        # Сначала корабли через непокрытые попадания
+        uncovered = open_hits
+        while uncovered:
+            cell = self.rng.choice(list(iter_bits(uncovered)))
+            cell_x, cell_y = geometry.cell(cell)
+            candidates = []
+            for length in set(lengths):
+                weight = lengths.count(length)
+                for shape, shape_mask in self._shapes[length]:
+                    legal = geometry.legal_anchors(shape, blocked)
+                    for dx, dy in shape:
+                        if dx > cell_x or dy > cell_y:
+                            continue
+                        anchor = cell - (dy * width + dx)
+                        if not (legal >> anchor) & 1:
+                            continue
+                        mask = shape_mask << anchor
+                        # Корабль не может касаться попаданий по другим кораблям, а пораженный
+                        # целиком был бы уже потоплен
+                        if self._zone(mask) & open_hits & ~mask or not mask & ~open_hits:
+                            continue
+                        candidates.extend([(length, mask)] * weight)
+            if not candidates:
+                return None
+            length, mask = self.rng.choice(candidates)
+            ships.append(mask)
+            lengths.remove(length)
+            blocked |= self._zone(mask)
+            uncovered &= ~mask
+
+        # Остальные корабли - в случайные допустимые позиции в стороне от попаданий
+        blocked |= self._zone(open_hits)
+        for length in sorted(lengths, reverse=True):
+            options = [(shape_mask, geometry.legal_anchors(shape, blocked))
+                       for shape, shape_mask in self._shapes[length]]
+            counts = [popcount(legal) for _, legal in options]
+            total = sum(counts)
+            if not total:
+                return None
+            pick = self.rng.randrange(total)
+            for (shape_mask, legal), count in zip(options, counts):
+                if pick < count:
+                    for anchor in iter_bits(legal):
+                        if not pick:
+                            break
+                        pick -= 1
+                    mask = shape_mask << anchor
+                    break
+                pick -= count
+            ships.append(mask)
+            blocked |= self._zone(mask)
+        return tuple(ships)
+
+
+def is_consistent(sample, closed, hits, sunk, remaining):
+    """Проверка, что сохраненная расстановка не противоречит текущим знаниям
+
+    sample - (потопленные корабли на момент выборки, маски остальных кораблей).
+    Корабль расстановки, все клетки которого поражены, должен быть потоплен.
+    """
+    fully_hit, ships = sample
+    occupied = 0
+    lengths = []
+    for ship in ships:
+        occupied |= ship
+        if ship & ~hits:
+            lengths.append(popcount(ship))
+        else:
+            fully_hit |= ship
+    if occupied & closed or hits & ~sunk & ~occupied or fully_hit != sunk:
+        return False
+    return tuple(sorted(lengths, reverse=True)) == tuple(remaining)
+
+
+class SampleWorker:
+    """Выборка расстановок в одном процессе
+
+    Расстановки хранятся между ходами по номерам слотов; перед новым
+    подсчетом несогласованные с новыми знаниями отбрасываются, а выборка
+    добирается новыми расстановками до нужного размера.
+    """
+
+    def __init__(self, rules, block):
+        self.rules = rules
+        self.block = block
+        self.caches = {}
+
+    def run(self, slot, target, seed, time_limit):
+        """Частоты занятости клеток по выборке слота: (массив счетчиков, размер выборки, новых)"""
+        started = time.perf_counter()
+        _, closed, hits, sunk, remaining = self.block.read()
+        cache = [sample for sample in self.caches.get(slot, ())
+                 if is_consistent(sample, closed, hits, sunk, remaining)]
+        sampler = LayoutSampler(self.rules, random.Random(seed))
+        fresh = 0
+        while len(cache) < target and time.perf_counter() - started < time_limit:
+            ships = sampler.sample(closed, hits, sunk, remaining)
+            if ships is None:
+                break
+            cache.append((sunk, ships))
+            fresh += 1
+        self.caches[slot] = cache
+
+        counts = np.zeros(self.rules.cells, dtype=np.int32)
+        if cache:
+            mask_bytes = self.block.mask_bytes
+            # Занятые клетки непотопленных кораблей, еще не пораженные
+            data = b"".join((_occupied(ships) & ~hits).to_bytes(mask_bytes, "little") for _, ships in cache)
+            bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8).reshape(len(cache), mask_bytes),
+                                 axis=1, bitorder="little")
+            counts += bits[:, :self.rules.cells].sum(axis=0, dtype=np.int32)
+        return counts, len(cache), fresh
+
+
+def _occupied(ships):
+    mask = 0
+    for ship in ships:
+        mask |= ship
+    return mask
+
+
+# Состояние процесса пула
+_worker = None
+
+
+def _init_worker(rules, block_name):
+    global _worker
+    _worker = SampleWorker(rules, KnowledgeBlock(rules, block_name))
+
+
+def _run_task(task):
+    return _worker.run(*task)
+
+
+def _shutdown(pools, block):
+    for pool in pools:
+        pool.terminate()
+        pool.join()
+    block.close()
+
+
+class SamplingAI:
+    """ИИ Монте-Карло: стреляет в клетку, чаще всего занятую в случайных расстановках
+
+    На каждом ходу набирается выборка расстановок оставшихся кораблей,
+    согласованных с известными промахами, попаданиями и потопленными
+    кораблями. Выборка делится на слоты, у каждого слота свой процесс:
+    знания о доске лежат в общей памяти (KnowledgeBlock), а расстановки
+    слота хранятся в его процессе и переиспользуются на следующих ходах,
+    пока не противоречат результатам новых выстрелов. processes=0 -
+    считать в текущем процессе. Частоты смещены так же, как выборка
+    LayoutSampler.
+    """
+
+    def __init__(self, rules=None, rng=None, samples=2000, processes=None, time_budget_ms=200):
+        self.rules = rules or CLASSIC_RULES
+        self.rng = rng or random.Random()
+        self._np_rng = np.random.default_rng(self.rng.getrandbits(64))
+        self.width = self.rules.width
+        self.height = self.rules.height
+        self.samples = samples
+        self.processes = multiprocessing.cpu_count() if processes is None else processes
+        self.time_budget_ms = time_budget_ms
+        self.opening = OpeningLine(self.rules, self.rng)
+        self._block = KnowledgeBlock(self.rules)
+        self._pools = []
+        self._local = None
+        if self.processes > 0:
+            # spawn: процессы не наследуют состояние SDL родителя
+            context = multiprocessing.get_context("spawn")
+            # Пул из одного процесса на слот: задачи слота всегда попадают к его расстановкам
+            self._pools = [context.Pool(1, initializer=_init_worker, initargs=(self.rules, self._block.name))
+                           for _ in range(self.processes)]
+        else:
+            self._local = SampleWorker(self.rules, self._block)
+        self._finalizer = weakref.finalize(self, _shutdown, self._pools, self._block)
+        # Статистика последнего хода
+        self.last_samples = 0
+        self.last_fresh = 0
+
+    def close(self):
+        """Остановка пула и освобождение общей памяти"""
+        self._finalizer()
+
+    def occupancy(self, board):
+        """Частоты занятости клеток (H, W), размер выборки и маска доступных клеток"""
+        if hasattr(board, "snapshot"):
+            board = board.snapshot(public=True)
+        self._block.write(board.miss_mask | board.halo_mask, board.hit_mask, board.sunk_mask,
+                          board.remaining_fleet)
+
+        slots = max(1, self.processes)
+        per_slot = -(-self.samples // slots)
+        time_limit = self.time_budget_ms / 1000
+        tasks = [(slot, per_slot, self.rng.getrandbits(64), time_limit) for slot in range(slots)]
+        if self._pools:
+            pending = [pool.apply_async(_run_task, (task,)) for pool, task in zip(self._pools, tasks)]
+            results = [result.get() for result in pending]
+        else:
+            results = [self._local.run(*task) for task in tasks]
+
+        counts = np.zeros(self.rules.cells, dtype=np.int64)
+        self.last_samples = self.last_fresh = 0
+        for slot_counts, size, fresh in results:
+            counts += slot_counts
+            self.last_samples += size
+            self.last_fresh += fresh
+
+        available = mask_to_array(board.unknown_mask, self.width, self.height)
+        return counts.reshape(self.height, self.width), self.last_samples, available
+
+    def _best_cells(self, board, count, exclude=()):
+        """count клеток, чаще всего занятых в выборке (случайный выбор среди равных)"""
+        if hasattr(board, "snapshot"):
+            board = board.snapshot(public=True)
+        # В дебюте выборка не нужна
+        opening = self.opening.next_shots(board, count, exclude)
+        if len(opening) == count:
+            return opening
+        # Частоты не кешируются между партиями (в отличие от DensityAI): это случайная выборка,
+        # и одна неудачная выборка повторялась бы в каждой партии с той же позицией
+        counts, _, available = self.occupancy(board)
+        for x, y in exclude:
+            available[y, x] = False
+        if not available.any():
+            return []
+        scores = counts.ravel().astype(np.float64)
+        scores[~available.ravel()] = -1
+        # Случайный ключ меньше единицы разбивает равенство, не меняя порядок частот
+        scores += self._np_rng.random(len(scores)) * 0.5
+        count = min(count, int(available.sum()))
+        order = np.argsort(-scores)[:count]
+        return [(int(index % self.width), int(index // self.width)) for index in order]
+
+    def get_next_shot(self, board, exclude=()):
+        """Клетка, чаще всего занятая в выборке расстановок"""
+        cells = self._best_cells(board, 1, exclude)
+        return cells[0] if cells else None
+
+    def get_next_shots(self, board, count):
+        """Клетки залпа: count самых часто занятых клеток"""
+        return self._best_cells(board, count)
+
+    # Состояние берется с доски на каждом ходу, отдельный учет результатов не нужен
+    def register_hit(self, x, y):
+        """Регистрация попадания"""
+
+    def register_miss(self, x, y):
+        """Регистрация промаха"""
+
+    def register_sunk(self):
+        """Регистрация потопления корабля"""
+
+
+def main():
+    """Замер скорости выборки в зависимости от числа процессов"""
+    parser = argparse.ArgumentParser(description="Скорость выборки расстановок ИИ Монте-Карло")
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count(), help="число процессов")
+    parser.add_argument("--samples", type=int, default=20000, help="размер выборки на ход")
+    parser.add_argument("--seed", type=int, default=1, help="зерно генератора случайных чисел")
+    args = parser.parse_args()
+
+    # Середина партии: часть клеток обстреляна
+    board = Board()
+    board.place_ships_randomly(rng=make_rng(args.seed, "board"))
+    rng = make_rng(args.seed, "shots")
+    for _ in range(30):
+        board.shoot(rng.randrange(board.width), rng.randrange(board.height))
+
+    ai = SamplingAI(rng=make_rng(args.seed, "ai"), samples=args.samples, processes=args.processes,
+                    time_budget_ms=60000)
+    try:
+        # Пустые задачи дожидаются запуска всех процессов
+        for result in [pool.apply_async(_run_task, ((slot, 0, 0, 0),)) for slot, pool in enumerate(ai._pools)]:
+            result.get()
+        started = time.perf_counter()
+        ai.occupancy(board)
+        seconds = time.perf_counter() - started
+    finally:
+        ai.close()
+    print(f"Процессов: {args.processes}, выборка {ai.last_samples} (новых {ai.last_fresh}) "
+          f"за {seconds:.2f} с, {ai.last_fresh / seconds:.0f} новых расстановок в секунду")
+
+
+if __name__ == "__main__":
+    main()
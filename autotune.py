@@ -0,0 +1,243 @@
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import time
+from ai_config import CONFIG_FILE, AIConfig
+from rules import Rules
+from seeding import derive_seed
+from tournament import Player
+
+# Пространства поиска: значения параметров конструктора ИИ; первые значения - настройки по умолчанию
+SEARCH_SPACES = {
+    "classic": {
+        "spacing": [2, 1, 3, 4],
+        "offset": [0, 1, 2, 3],
+        "target_choice": ["random", "first"],
+        "probe_order": ["DRUL", "LURD", "RDLU", "ULDR"],
+    },
+    "endgame": {
+        "max_layouts": [64, 16, 256],
+        "time_limit": [0.05, 0.01, 0.2],
+    },
+    "density": {
+        "time_budget_ms": [20, 5, 10, 40],
+    },
+    "sampling": {
+        "samples": [2000, 500, 1000, 4000],
+        "time_budget_ms": [200, 50, 100],
+    },
+}
+
+
+def candidates(strategy):
+    """Все допустимые наборы параметров стратегии (первый - по умолчанию)"""
+    space = SEARCH_SPACES[strategy]
+    names = list(space)
+    result = []
+    for values in itertools.product(*(space[name] for name in names)):
+        params = dict(zip(names, values))
+        # Сдвиг сетки поиска меньше ее шага
+        if "offset" in params and params["offset"] >= params["spacing"]:
+            continue
+        result.append(params)
+    return result
+
+
+# Игроки процесса пула по наборам параметров
+_players = {}
+_setup = None
+
+
+def _init_worker(rules, strategy, fleet, seed):
+    global _setup
+    _setup = (rules, strategy, fleet, seed)
+    _players.clear()
+
+
+def evaluate_chunk(task):
+    """Партии [start, start + count) набора параметров: (номер набора, число партий, сумма, сумма квадратов)"""
+    number, params, start, count = task
+    key = json.dumps(params, sort_keys=True)
+    player = _players.get(key)
+    if player is None:
+        rules, strategy, fleet, seed = _setup
+        player = _players[key] = Player(rules, strategy, fleet, seed, options=params)
+    total = squares = 0
+    for game in range(start, start + count):
+        shots = player.play(derive_seed(player.seed, "game", game))[0]
+        total += shots
+        squares += shots * shots
+    return number, count, total, squares
+
+
+class Evaluator:
+    """Оценка наборов параметров партиями с общими зернами в пуле процессов
+
+    Набор параметров с номером i играет партии с теми же зернами, что и
+    остальные наборы (общие случайные числа): разница средних меньше
+    зависит от случайности расстановок. Партии распределяются порциями
+    по chunk партий.
+    """
+
+    def __init__(self, rules, strategy, fleet="random", seed=1, processes=None, chunk=50):
+        self.processes = multiprocessing.cpu_count() if processes is None else processes
+        self.chunk = chunk
+        self.setup = (rules, strategy, fleet, seed)
+        self.games_played = 0
+        self._pool = None
+        if self.processes > 0:
+            # spawn: процессы не наследуют состояние SDL родителя
+            context = multiprocessing.get_context("spawn")
+            self._pool = context.Pool(self.processes, initializer=_init_worker, initargs=self.setup)
+        else:
+            _init_worker(*self.setup)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+
+    def run(self, jobs):
+        """jobs - (номер, параметры, первая партия, партий); результат: {номер: (партий, сумма, сумма квадратов)}"""
+        tasks = [(number, params, first, min(self.chunk, start + count - first))
+                 for number, params, start, count in jobs
+                 for first in range(start, start + count, self.chunk)]
+        if self._pool is not None:
+            results = self._pool.imap_unordered(evaluate_chunk, tasks)
+        else:
+            results = map(evaluate_chunk, tasks)
+        totals = {}
+        for number, count, total, squares in results:
+            games, shots, shots_squared = totals.get(number, (0, 0, 0))
+            totals[number] = (games + count, shots + total, shots_squared + squares)
+            self.games_played += count
+        return totals
+
+
+class Stats:
+    """Накопленные партии одного набора параметров"""
+
+    def __init__(self, params):
+        self.params = params
+        self.games = 0
+        self.total = 0
+        self.squares = 0
+
+    def add(self, games, total, squares):
+        self.games += games
+        self.total += total
+        self.squares += squares
+
+    @property
+    def mean(self):
+        return self.total / self.games if self.games else math.inf
+
+    @property
+    def error(self):
+        """Стандартная ошибка среднего"""
+        if self.games < 2:
+            return math.inf
+        variance = (self.squares - self.total ** 2 / self.games) / (self.games - 1)
+        return math.sqrt(max(variance, 0) / self.games)
+
+
+def successive_halving(evaluator, sets, min_games=200, eta=2, max_games=20000, margin=3.0, log=print):
+    """Отбор лучшего набора параметров последовательным делением пополам
+
+    В каждом раунде все оставшиеся наборы доигрывают партии до текущего
+    бюджета (партии прошлых раундов учитываются), затем остается лучшая
+    1/eta часть, а бюджет растет в eta раз. Ранняя остановка: набор,
+    средний результат которого хуже лучшего больше чем на margin
+    стандартных ошибок, отбрасывается сразу. Возвращает статистику наборов
+    по убыванию качества.
+    """
+    stats = [Stats(params) for params in sets]
+    alive = list(range(len(stats)))
+    budget = min_games
+    while True:
+        jobs = [(number, stats[number].params, stats[number].games, budget - stats[number].games)
+                for number in alive if stats[number].games < budget]
+        for number, result in evaluator.run(jobs).items():
+            stats[number].add(*result)
+        alive.sort(key=lambda number: stats[number].mean)
+        best = stats[alive[0]]
+        log(f"Бюджет {budget} партий: наборов {len(alive)}, лучший {best.mean:.2f} ± {best.error:.2f} "
+            f"{json.dumps(best.params, ensure_ascii=False)}")
+        if len(alive) == 1 or budget >= max_games:
+            break
+        keep = max(1, math.ceil(len(alive) / eta))
+        # Лучшие по среднему и те, кто статистически неотличим от лучшего, но в пределах доли
+        alive = [number for number in alive[:keep]
+                 if stats[number].mean - best.mean <= margin * max(stats[number].error, best.error)]
+        budget = min(budget * eta, max_games)
+    return [stats[number] for number in alive] + [stats[number] for number in range(len(stats))
+                                                  if number not in alive]
+
+
+def main():
+    """Подбор параметров стратегии ИИ и запись лучших в файл настроек"""
+    parser = argparse.ArgumentParser(description="Подбор параметров ИИ самоигрой")
+    parser.add_argument("--ai", choices=sorted(SEARCH_SPACES), default="classic", help="стратегия ИИ")
+    parser.add_argument("--touch", action="store_true", help="корабли могут касаться")
+    parser.add_argument("--bend", action="store_true", help="изогнутые корабли")
+    parser.add_argument("--salvo", action="store_true", help="режим залпа")
+    parser.add_argument("--min-games", type=int, default=200, help="партий на набор в первом раунде")
+    parser.add_argument("--max-games", type=int, default=6400, help="наибольшее число партий на набор")
+    parser.add_argument("--eta", type=int, default=2, help="во сколько раз сокращается число наборов за раунд")
+    parser.add_argument("--validate", type=int, default=4000,
+                        help="партий с новыми зернами для проверки лучшего набора против настроек по умолчанию")
+    parser.add_argument("--significance", type=float, default=2.0,
+                        help="во сколько стандартных ошибок разности подобранные должны быть лучше настроек по умолчанию")
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count(), help="число процессов")
+    parser.add_argument("--chunk", type=int, default=50, help="партий в одной задаче пула")
+    parser.add_argument("--seed", type=int, default=1, help="зерно генератора случайных чисел")
+    parser.add_argument("--config", default=CONFIG_FILE, help="файл настроек ИИ")
+    parser.add_argument("--dry-run", action="store_true", help="не записывать результат")
+    args = parser.parse_args()
+
+    rules = Rules(allow_touching=args.touch, allow_bending=args.bend, salvo=args.salvo)
+    sets = candidates(args.ai)
+    default = sets[0]
+    print(f"Подбор {args.ai} для {rules.key()}: {len(sets)} наборов параметров")
+    started = time.perf_counter()
+
+    evaluator = Evaluator(rules, args.ai, seed=args.seed, processes=args.processes, chunk=args.chunk)
+    try:
+        ranking = successive_halving(evaluator, sets, args.min_games, args.eta, args.max_games)
+        best = ranking[0]
+        tuned_games = evaluator.games_played
+    finally:
+        evaluator.close()
+
+    # Проверка на новых зернах: среднее победителя отбора завышено удачей
+    checker = Evaluator(rules, args.ai, seed=derive_seed(args.seed, "validate"), processes=args.processes,
+                        chunk=args.chunk)
+    try:
+        results = checker.run([(0, default, 0, args.validate), (1, best.params, 0, args.validate)])
+    finally:
+        checker.close()
+    baseline, tuned = Stats(default), Stats(best.params)
+    baseline.add(*results[0])
+    tuned.add(*results[1])
+    seconds = time.perf_counter() - started
+    print(f"Проверка на {args.validate} партиях: по умолчанию {baseline.mean:.2f} ± {baseline.error:.2f}, "
+          f"подобранные {tuned.mean:.2f} ± {tuned.error:.2f}; всего {tuned_games} партий, {seconds:.0f} с")
+
+    # Без статистически значимого выигрыша остаются настройки по умолчанию
+    gain = baseline.mean - tuned.mean
+    significant = gain > args.significance * math.sqrt(baseline.error ** 2 + tuned.error ** 2)
+    params = best.params if significant else default
+    if not significant and best.params != default:
+        print(f"Выигрыш {gain:.2f} выстрела незначим, остаются настройки по умолчанию")
+    if args.dry_run:
+        return
+    config = AIConfig(args.config)
+    config.set_params(rules, args.ai, params, avg_shots=round(tuned.mean if significant else baseline.mean, 3),
+                      default_shots=round(baseline.mean, 3), validate_games=args.validate)
+    print(f"Записано в {args.config}: {json.dumps(params, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import argparse
+import time
+import numpy as np
+from fleet_sampler import sample_fleets
+from rules import Rules
+
+
+def dilate(masks):
+    """Расширение масок (K, H, W) на все соседние клетки (включая диагонали)"""
+    count, height, width = masks.shape
+    padded = np.zeros((count, height + 2, width + 2), dtype=bool)
+    padded[:, 1:-1, 1:-1] = masks
+    result = masks.copy()
+    for dy in range(3):
+        for dx in range(3):
+            result |= padded[:, dy:dy + height, dx:dx + width]
+    return result
+
+
+class BatchGames:
+    """N партий одной стороны (ИИ стреляет по флоту) в виде массивов NumPy
+
+    ship_ids - (N, H, W) номер корабля флота в клетке или -1, cells_left -
+    (N, кораблей) непораженные клетки каждого корабля, known / hit / sunk -
+    (N, H, W) открытые клетки (выстрелы и клетки вокруг потопленных),
+    попадания и потопленные корабли, remaining - (N, длин) число
+    непотопленных кораблей каждой длины из lengths. fire делает по одному
+    выстрелу во всех незавершенных партиях сразу; завершенные партии
+    отмечены в done, их число выстрелов - в shots.
+    """
+
+    def __init__(self, rules, fleets):
+        self.rules = rules
+        self.ship_ids = fleets.ship_ids.astype(np.int16)
+        count = len(fleets)
+        fleet = np.array(rules.fleet)
+        self.cells_left = np.tile(fleet, (count, 1)).astype(np.int16)
+        self.lengths = sorted(set(rules.fleet), reverse=True)
+        # Номер длины для каждого корабля флота
+        self._length_index = np.array([self.lengths.index(length) for length in rules.fleet])
+        self.remaining = np.tile([rules.fleet.count(length) for length in self.lengths], (count, 1))
+        self.ships_left = np.full(count, len(rules.fleet))
+        shape = self.ship_ids.shape
+        self.known = np.zeros(shape, dtype=bool)
+        self.hit = np.zeros(shape, dtype=bool)
+        self.sunk = np.zeros(shape, dtype=bool)
+        self.shots = np.zeros(count, dtype=np.int32)
+        self.done = np.zeros(count, dtype=bool)
+        # Исходные номера партий: после compact строки массивов перестают с ними совпадать
+        self.rows = np.arange(count)
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def open_hits(self):
+        """Попадания по непотопленным кораблям (N, H, W)"""
+        return self.hit & ~self.sunk
+
+    @property
+    def closed(self):
+        """Клетки, где не может быть непотопленного корабля (N, H, W)"""
+        return (self.known & ~self.hit) | self.sunk
+
+    def fire(self, cells):
+        """Выстрелы в клетки cells (номера y * width + x, массив N) во всех незавершенных партиях"""
+        rows = np.flatnonzero(~self.done)
+        width = self.rules.width
+        ys, xs = np.divmod(cells[rows], width)
+        ids = self.ship_ids[rows, ys, xs]
+        self.known[rows, ys, xs] = True
+        self.shots[rows] += 1
+
+        hits = ids >= 0
+        rows, ids = rows[hits], ids[hits]
+        self.hit[rows, ys[hits], xs[hits]] = True
+        self.cells_left[rows, ids] -= 1
+
+        # Потопленные этим выстрелом корабли и клетки вокруг них
+        sunk = self.cells_left[rows, ids] == 0
+        rows, ids = rows[sunk], ids[sunk]
+        if not len(rows):
+            return
+        ships = self.ship_ids[rows] == ids[:, None, None]
+        self.sunk[rows] |= ships
+        if not self.rules.allow_touching:
+            self.known[rows] |= dilate(ships)
+        np.subtract.at(self.remaining, (rows, self._length_index[ids]), 1)
+        self.ships_left[rows] -= 1
+        self.done[rows] = self.ships_left[rows] == 0
+
+    def compact(self):
+        """Удаление завершенных партий из массивов; возвращает (исходные номера, выстрелы) удаленных"""
+        finished = self.done
+        result = self.rows[finished], self.shots[finished]
+        keep = ~finished
+        for name in ("ship_ids", "cells_left", "remaining", "ships_left", "known", "hit", "sunk",
+                     "shots", "done", "rows"):
+            setattr(self, name, getattr(self, name)[keep])
+        return result
+
+
+class ParityPolicy:
+    """Как ParityAI: случайная неизвестная клетка, сначала в шахматном порядке"""
+
+    def __init__(self, rules, rng):
+        self.rules = rules
+        self.rng = rng
+        ys, xs = np.mgrid[:rules.height, :rules.width]
+        # Вес клетки: четные (x + y четно) клетки выбираются раньше остальных
+        self.parity = np.where((xs + ys) % 2 == 0, 2, 1).astype(np.float32)
+
+    def scores(self, games):
+        """Оценки клеток (N, H, W): больше - лучше, известные клетки отрицательны"""
+        return np.where(games.known, np.float32(-1), self.parity)
+
+    def choose(self, games):
+        """Номер клетки для выстрела в каждой партии (массив N)"""
+        scores = self.scores(games)
+        # Случайная добавка меньше единицы выбирает случайную клетку среди лучших
+        scores = scores + self.rng.random(scores.shape, dtype=np.float32) * np.float32(0.5)
+        return scores.reshape(len(games), -1).argmax(axis=1)
+
+
+class HuntPolicy(ParityPolicy):
+    """Как ComputerAI: поиск в шахматном порядке, добивание соседних с попаданиями клеток
+
+    Если попаданий по непотопленному кораблю несколько и они на одной
+    линии, добиваются только клетки вдоль нее.
+    """
+
+    def scores(self, games):
+        scores = super().scores(games)
+        open_hits = games.open_hits
+        unknown = ~games.known
+        vertical = np.zeros_like(open_hits)
+        vertical[:, 1:] |= open_hits[:, :-1]
+        vertical[:, :-1] |= open_hits[:, 1:]
+        horizontal = np.zeros_like(open_hits)
+        horizontal[:, :, 1:] |= open_hits[:, :, :-1]
+        horizontal[:, :, :-1] |= open_hits[:, :, 1:]
+        # Направление корабля: все попадания в одной строке или в одном столбце
+        hit_count = open_hits.sum(axis=(1, 2))
+        one_row = (open_hits.any(axis=2).sum(axis=1) == 1) & (hit_count > 1)
+        one_column = (open_hits.any(axis=1).sum(axis=1) == 1) & (hit_count > 1)
+        targets = np.where(one_row[:, None, None], horizontal,
+                           np.where(one_column[:, None, None], vertical, horizontal | vertical)) & unknown
+        # Концы линии закрыты (изогнутый корабль или касание): все соседние клетки
+        blocked_line = ~targets.any(axis=(1, 2)) & (hit_count > 1)
+        targets |= blocked_line[:, None, None] & (horizontal | vertical) & unknown
+        return np.where(targets, np.float32(10), scores)
+
+
+class DensityPolicy(ParityPolicy):
+    """Как DensityAI: клетка, накрытая наибольшим числом возможных позиций кораблей
+
+    Позиции оставшихся кораблей считаются сдвигами массивов сразу для всех
+    партий; при попаданиях по непотопленному кораблю учитываются только
+    позиции, накрывающие их (с весом по числу накрытых попаданий).
+    """
+
+    def __init__(self, rules, rng):
+        super().__init__(rules, rng)
+        self._shapes = {length: rules.ship_shapes(length) for length in set(rules.fleet)}
+        # Граница оценки клетки: каждую клетку накрывают не больше length позиций каждой фигуры,
+        # а позиция весит не больше (кораблей длины) * length
+        bound = sum(rules.fleet.count(length) * len(shapes) * length * length
+                    for length, shapes in self._shapes.items())
+        # int16 заметно быстрее, но на больших досках с большим флотом сумма в него не помещается
+        self._dtype = np.int16 if bound <= np.iinfo(np.int16).max else np.int32
+
+    def scores(self, games):
+        height, width = self.rules.height, self.rules.width
+        free = ~games.closed
+        open_hits = games.open_hits.astype(self._dtype)
+        # Добивание: на доске есть попадания по непотопленным кораблям
+        targeting = open_hits.any(axis=(1, 2))
+        # Целые оценки: преобразования типов в цикле по фигурам заметно дороже самих сдвигов
+        density = np.zeros(games.known.shape, dtype=self._dtype)
+        for length_number, length in enumerate(games.lengths):
+            ships = games.remaining[:, length_number].astype(self._dtype)
+            if not ships.any():
+                continue
+            # При поиске позиция весит 1, при добивании - числом накрытых попаданий
+            search_multiplier = np.where(targeting, 0, ships)[:, None, None]
+            target_multiplier = np.where(targeting, ships, 0)[:, None, None]
+            for shape in self._shapes[length]:
+                shape_width = max(x for x, _ in shape) + 1
+                shape_height = max(y for _, y in shape) + 1
+                rows, columns = height - shape_height + 1, width - shape_width + 1
+                if rows <= 0 or columns <= 0:
+                    continue
+                (dx, dy), rest = shape[0], shape[1:]
+                legal = free[:, dy:dy + rows, dx:dx + columns].copy()
+                covered = open_hits[:, dy:dy + rows, dx:dx + columns].copy()
+                for dx, dy in rest:
+                    legal &= free[:, dy:dy + rows, dx:dx + columns]
+                    covered += open_hits[:, dy:dy + rows, dx:dx + columns]
+                covered *= target_multiplier
+                covered += search_multiplier
+                weight = covered * legal
+                for dx, dy in shape:
+                    density[:, dy:dy + rows, dx:dx + columns] += weight
+        return np.where(games.known, np.float32(-1), density.astype(np.float32))
+
+
+POLICIES = {"parity": ParityPolicy, "hunt": HuntPolicy, "density": DensityPolicy}
+
+
+def simulate(rules, policy, games, seed=None, batch_size=4000):
+    """Выстрелы до победы в games партиях (массив) и число шагов пакетов"""
+    rng = np.random.default_rng(seed)
+    results = np.empty(games, dtype=np.int32)
+    steps = 0
+    for start in range(0, games, batch_size):
+        count = min(batch_size, games - start)
+        batch = BatchGames(rules, sample_fleets(count, rules, rng))
+        strategy = POLICIES[policy](rules, rng)
+        while len(batch):
+            batch.fire(strategy.choose(batch))
+            steps += 1
+            # Завершенные партии убираются, когда их набирается заметная доля
+            if batch.done.sum() * 8 >= len(batch):
+                rows, shots = batch.compact()
+                results[start + rows] = shots
+    return results, steps
+
+
+def main():
+    """Скорость пакетной симуляции и сравнение с обычным циклом партий"""
+    parser = argparse.ArgumentParser(description="Пакетная симуляция партий ИИ")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="hunt", help="стратегия")
+    parser.add_argument("--games", type=int, default=100000, help="количество партий")
+    parser.add_argument("--batch", type=int, default=4000, help="партий в пакете")
+    parser.add_argument("--touch", action="store_true", help="корабли могут касаться")
+    parser.add_argument("--bend", action="store_true", help="изогнутые корабли")
+    parser.add_argument("--seed", type=int, default=1, help="зерно генератора случайных чисел")
+    parser.add_argument("--compare", type=int, default=0,
+                        help="сыграть столько же партий обычным циклом (tournament.py) для сравнения")
+    args = parser.parse_args()
+
+    rules = Rules(allow_touching=args.touch, allow_bending=args.bend)
+    started = time.perf_counter()
+    shots, steps = simulate(rules, args.policy, args.games, args.seed, args.batch)
+    seconds = time.perf_counter() - started
+    print(f"{args.policy}: {args.games} партий за {seconds:.1f} с ({args.games / seconds * 60:.0f} в минуту), "
+          f"в среднем {shots.mean():.2f} выстрелов (p50 {np.median(shots):.0f}, max {shots.max()}), "
+          f"шагов пакетов {steps}")
+
+    if args.compare:
+        from tournament import run_tournament
+        # Такая же стратегия в обычном цикле: ParityAI, ComputerAI, DensityAI. Расстановки там
+        # обычные случайные: равновероятные (как в пакете) генерируются в цикле слишком медленно
+        strategy = {"parity": "parity", "hunt": "classic", "density": "density"}[args.policy]
+        report = run_tournament(rules, strategy, args.compare, seed=args.seed, processes=0)
+        print(f"{strategy} в цикле: {report['games_per_second'] * 60:.0f} партий в минуту, "
+              f"в среднем {report['shots']['mean']:.2f} выстрелов")
+
+
+if __name__ == "__main__":
+    main()
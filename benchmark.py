@@ -0,0 +1,346 @@
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from ai_logic import ComputerAI
+from board import Board
+from records import RecordManager
+from rules import Rules
+from seeding import make_rng
+
+BASELINE_FILE = "benchmark_baseline.json"
+# Стороны досок: классический флот на досках разного размера
+SIZES = (10, 15, 20)
+
+
+def _placement_states(rules, rng, count):
+    """Пустые доски и допустимая позиция корабля на каждой"""
+    states = []
+    for _ in range(count):
+        length = rng.choice(rules.fleet)
+        horizontal = rng.random() < 0.5
+        x = rng.randrange(rules.width - (length - 1 if horizontal else 0))
+        y = rng.randrange(rules.height - (0 if horizontal else length - 1))
+        states.append((Board(rules), length, x, y, horizontal))
+    return states
+
+
+def _query_states(rules, rng, count):
+    """Доски с флотом и случайная позиция корабля для проверки"""
+    boards = []
+    for _ in range(8):
+        board = Board(rules)
+        board.place_ships_randomly(rng=rng)
+        boards.append(board)
+    return [(rng.choice(boards), rng.choice(rules.fleet), rng.randrange(rules.width), rng.randrange(rules.height),
+             rng.random() < 0.5) for _ in range(count)]
+
+
+def _random_fleet_states(rules, rng, count):
+    return [(Board(rules), rng) for _ in range(count)]
+
+
+def _shot_states(rules, rng, count):
+    """Выстрелы по всем клеткам досок с флотом в случайном порядке (каждая клетка - один раз)"""
+    states = []
+    while len(states) < count:
+        board = Board(rules)
+        board.place_ships_randomly(rng=rng)
+        cells = [(x, y) for y in range(rules.height) for x in range(rules.width)]
+        rng.shuffle(cells)
+        states.extend((board, x, y) for x, y in cells)
+    return states[:count]
+
+
+def _sunk_check_states(rules, rng, count):
+    """Доски в середине партии"""
+    boards = []
+    for _ in range(8):
+        board = Board(rules)
+        board.place_ships_randomly(rng=rng)
+        for _ in range(rules.cells // 3):
+            board.shoot(rng.randrange(rules.width), rng.randrange(rules.height))
+        boards.append(board)
+    return [(rng.choice(boards),) for _ in range(count)]
+
+
+def _ai_states(rules, rng, count, targeting):
+    """ИИ в случайный момент партии: поиск (targeting=False) или добивание раненого корабля"""
+    states = []
+    while len(states) < count:
+        board = Board(rules)
+        board.place_ships_randomly(rng=rng)
+        ai = ComputerAI(rules, rng=make_rng(rng.getrandbits(64)))
+        stop = rng.randrange(rules.cells // 3)
+        moves = 0
+        while not board.all_ships_sunk():
+            if moves >= stop and bool(ai.hit_cells) == targeting:
+                states.append((ai, board.snapshot(public=True)))
+                break
+            x, y = ai.get_next_shot(board.snapshot(public=True))
+            hit, message = board.shoot(x, y)
+            if message == "Потоплен!":
+                ai.register_sunk()
+            elif hit:
+                ai.register_hit(x, y)
+            else:
+                ai.register_miss(x, y)
+            moves += 1
+    return states
+
+
+def _records_states(rules, rng, count):
+    """Менеджер рекордов с файлом во временном каталоге"""
+    manager = RecordManager()
+    manager.records_file = os.path.join(tempfile.gettempdir(), "battleship_bench_records.json")
+    manager.records["vs_computer"] = {"time": 95.5, "date": "01.01.2025", "player_name": "Игрок"}
+    return [(manager,)] * count
+
+
+# Случай: (подготовка состояний, замеряемый вызов, вызовов в одном замере, зависит ли от размера доски)
+CASES = {
+    "place_ship": (_placement_states, lambda board, length, x, y, horizontal:
+                   board.place_ship(length, x, y, horizontal), 20, True),
+    "can_place_ship": (_query_states, lambda board, length, x, y, horizontal:
+                       board.can_place_ship(length, x, y, horizontal), 50, True),
+    "place_ships_randomly": (_random_fleet_states, lambda board, rng: board.place_ships_randomly(rng=rng), 1, True),
+    "shoot": (_shot_states, lambda board, x, y: board.shoot(x, y), 50, True),
+    "all_ships_sunk": (_sunk_check_states, lambda board: board.all_ships_sunk(), 200, True),
+    "ai_hunt": (lambda rules, rng, count: _ai_states(rules, rng, count, False),
+                lambda ai, snapshot: ai.get_next_shot(snapshot), 1, True),
+    "ai_target": (lambda rules, rng, count: _ai_states(rules, rng, count, True),
+                  lambda ai, snapshot: ai.get_next_shot(snapshot), 1, True),
+    "save_records": (_records_states, lambda manager: manager.save_records(), 1, False),
+}
+
+# Допустимый рост медианы для шумных случаев (не меньше --threshold): ход ИИ замеряется по одному
+# вызову (каждое состояние - отдельная партия), а запись рекордов идет на диск
+CASE_THRESHOLDS = {"ai_hunt": 0.6, "ai_target": 0.6, "save_records": 0.6}
+
+
+def calibrate(samples=5):
+    """Время эталонной работы на чистом Python в мкс (лучшее из samples)
+
+    Калибровка идет до и после замеров каждого случая, и времена базового
+    файла масштабируются отношением калибровок случая: сравнение меньше
+    зависит от частоты процессора в момент замера и от машины, на которой
+    записан базовый файл.
+    """
+    times = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        counts = {}
+        for i in range(20000):
+            key = i % 97
+            counts[key] = counts.get(key, 0) + (i >> 3)
+        times.append(time.perf_counter() - started)
+    return min(times) * 1e6
+
+
+def percentile(values, fraction):
+    """Значение, не превышаемое долей fraction отсортированных значений"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def measure(case, rules, samples=1000, alloc_calls=50, seed=1):
+    """Замер случая на правилах: медиана и p99 времени вызова (мкс), выделенная память за вызов (байт), калибровка
+
+    Состояния готовятся заранее и вне замера; каждый замер - number
+    вызовов подряд, время вызова - среднее по замеру. Память считается
+    отдельным проходом под tracemalloc (он замедляет код): пик выделенной
+    за вызов памяти, медиана по alloc_calls вызовам.
+    """
+    prepare, call, number, _ = CASES[case]
+    rng = make_rng(seed, case, rules.key())
+    states = prepare(rules, rng, samples * number)
+    times = []
+    # Как в timeit: сборщик мусора не вмешивается в замеры
+    gc.collect()
+    gc.disable()
+    try:
+        calibration = calibrate()
+        for start in range(0, len(states), number):
+            batch = states[start:start + number]
+            started = time.perf_counter()
+            for state in batch:
+                call(*state)
+            times.append((time.perf_counter() - started) / len(batch))
+        calibration = min(calibration, calibrate())
+    finally:
+        gc.enable()
+
+    peaks = []
+    states = prepare(rules, rng, alloc_calls)
+    tracemalloc.start()
+    try:
+        for state in states:
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            call(*state)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return {
+        "median_us": round(statistics.median(times) * 1e6, 3),
+        "p99_us": round(percentile(times, 0.99) * 1e6, 3),
+        "alloc_bytes": int(statistics.median(peaks)),
+        "calibration_us": round(calibration, 3),
+        "samples": len(times),
+    }
+
+
+def run_round(task):
+    """Круг замеров в отдельном процессе: {"случай/размер": результат}"""
+    cases, sizes, samples, seed = task
+    results = {}
+    for case in cases:
+        # Случаи, не зависящие от доски, замеряются один раз
+        for size in (sizes if CASES[case][3] else sizes[:1]):
+            key = f"{case}/{size}x{size}" if CASES[case][3] else case
+            results[key] = measure(case, Rules(size, size), samples, seed=seed)
+    return results
+
+
+def is_faster(result, best):
+    """Медиана результата в единицах калибровки меньше, чем у best (или best нет)"""
+    if best is None:
+        return True
+    return result["median_us"] / result["calibration_us"] < best["median_us"] / best["calibration_us"]
+
+
+def run_suite(cases=None, sizes=SIZES, samples=1000, rounds=5, seed=1):
+    """Замеры всех случаев на всех размерах досок: {"случай/размер": результат}
+
+    Каждый круг идет в новом процессе: скорость одного и того же кода
+    заметно зависит от раскладки памяти процесса. От каждого случая
+    остается круг с лучшим отношением медианы к калибровке и лучший p99.
+    """
+    tasks = [(list(cases or CASES), list(sizes), samples, seed)] * rounds
+    # spawn: процессы не наследуют состояние SDL родителя
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        rounds = pool.map(run_round, tasks, chunksize=1)
+    results = {}
+    for round_results in rounds:
+        for key, result in round_results.items():
+            if is_faster(result, results.get(key)):
+                results[key] = result
+    # p99 тоже лучший из кругов (в калибровке выбранного круга)
+    for key, best in results.items():
+        best["p99_us"] = round(min(round_results[key]["p99_us"] * best["calibration_us"]
+                                   / round_results[key]["calibration_us"] for round_results in rounds), 3)
+    return results
+
+
+def compare(results, baseline, threshold=0.3, p99_threshold=None, alloc_slack=64):
+    """Регрессии относительно базового файла: список строк с описанием
+
+    Времена базового файла умножаются на отношение калибровок случая,
+    регрессия - рост медианы больше чем на threshold (у шумных случаев -
+    на CASE_THRESHOLDS), памяти - больше чем на threshold и alloc_slack байт. p99 проверяется, только если задан
+    p99_threshold: у вызовов короче миллисекунды хвост зависит от
+    планировщика ОС и сборщика мусора сильнее, чем от кода.
+    """
+    failures = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        scale = result["calibration_us"] / base["calibration_us"]
+        case_threshold = max(threshold, CASE_THRESHOLDS.get(key.split("/")[0], 0))
+        median_limit = base["median_us"] * scale * (1 + case_threshold)
+        if result["median_us"] > median_limit:
+            failures.append(f"{key}: медиана {result['median_us']} мкс > {median_limit:.3f} мкс")
+        p99_limit = None if p99_threshold is None else base["p99_us"] * scale * (1 + p99_threshold)
+        if p99_limit is not None and result["p99_us"] > p99_limit:
+            failures.append(f"{key}: p99 {result['p99_us']} мкс > {p99_limit:.3f} мкс")
+        alloc_limit = base["alloc_bytes"] * (1 + threshold) + alloc_slack
+        if result["alloc_bytes"] > alloc_limit:
+            failures.append(f"{key}: память {result['alloc_bytes']} байт > {alloc_limit:.0f} байт")
+    return failures
+
+
+def load_baseline(path):
+    """Загрузка базового файла замеров"""
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"Ошибка загрузки базовых замеров: {e}")
+    return None
+
+
+def main():
+    """Микробенчмарки доски, ИИ и рекордов со сравнением с базовыми замерами"""
+    parser = argparse.ArgumentParser(description="Замеры скорости ядра игры")
+    parser.add_argument("--case", action="append", choices=sorted(CASES),
+                        help="случай (можно несколько раз; по умолчанию - все)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="стороны досок")
+    parser.add_argument("--samples", type=int, default=1000, help="замеров на случай")
+    parser.add_argument("--rounds", type=int, default=5, help="кругов замеров (от случая берется лучший)")
+    parser.add_argument("--seed", type=int, default=1, help="зерно генератора случайных чисел")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="базовый файл замеров")
+    parser.add_argument("--update", action="store_true", help="записать замеры в базовый файл")
+    parser.add_argument("--threshold", type=float, default=0.3,
+                        help="допустимый рост медианы времени и памяти (доля)")
+    parser.add_argument("--p99-threshold", type=float, default=None,
+                        help="допустимый рост p99 времени (доля; по умолчанию p99 не проверяется)")
+    parser.add_argument("--output", default=None, help="файл отчета JSON")
+    args = parser.parse_args()
+
+    results = run_suite(args.case, args.sizes, args.samples, args.rounds, args.seed)
+    baseline = None if args.update else load_baseline(args.baseline)
+    for key, result in results.items():
+        line = (f"{key:28} медиана {result['median_us']:9.3f} мкс  p99 {result['p99_us']:9.3f} мкс  "
+                f"память {result['alloc_bytes']:6d} байт")
+        base = baseline and baseline["results"].get(key)
+        if base:
+            scale = result["calibration_us"] / base["calibration_us"]
+            line += f"  ({result['median_us'] / (base['median_us'] * scale):.2f}x базы)"
+        print(line)
+
+    report = {"python": sys.version.split()[0], "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+    if args.update:
+        previous = load_baseline(args.baseline)
+        if previous and (args.case or args.sizes != list(SIZES)):
+            # Частичный прогон дополняет базовый файл
+            report["results"] = dict(previous["results"], **results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        print(f"Базовые замеры записаны в {args.baseline}")
+        return
+    if baseline is None:
+        # Без базы сравнивать не с чем: проверка не пройдена, а не пропущена
+        print(f"Нет базового файла {args.baseline}: запустите с --update", file=sys.stderr)
+        sys.exit(1)
+
+    failures = compare(results, baseline["results"], args.threshold, args.p99_threshold)
+    if failures:
+        # Случайный выброс редко повторяется: случаи с регрессией замеряются еще раз в новых процессах
+        failed = sorted({key for key in results if any(line.startswith(key + ":") for line in failures)})
+        print("Повторный замер: " + ", ".join(failed))
+        cases = sorted({key.split("/")[0] for key in failed})
+        for key, result in run_suite(cases, args.sizes, args.samples, args.rounds, args.seed).items():
+            if key in failed and is_faster(result, results[key]):
+                results[key] = result
+        failures = compare({key: results[key] for key in failed}, baseline["results"], args.threshold,
+                           args.p99_threshold)
+    if failures:
+        print("Регрессия:\n" + "\n".join(failures), file=sys.stderr)
+        sys.exit(1)
+    print("Регрессий нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+from functools import lru_cache
+
+
+class BoardGeometry:
+    """Геометрия битовой доски: маски границ и операции над масками клеток
+
+    Клетка (x, y) соответствует биту с номером y * width + x.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.full = (1 << self.size) - 1
+
+        first_column = 0
+        for y in range(height):
+            first_column |= 1 << (y * width)
+        self.first_column = first_column
+        self.last_column = first_column << (width - 1)
+        self.not_first_column = self.full & ~self.first_column
+        self.not_last_column = self.full & ~self.last_column
+        self._shape_masks = {}
+        self._anchor_masks = {}
+        self._symmetries = None
+
+    def index(self, x, y):
+        """Номер бита клетки"""
+        return y * self.width + x
+
+    def cell(self, index):
+        """Координаты клетки по номеру бита"""
+        return index % self.width, index // self.width
+
+    def in_bounds(self, x, y):
+        """Проверка, что клетка лежит на доске"""
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def ship_mask(self, length, x, y, horizontal):
+        """Маска прямого корабля (без проверки границ)"""
+        if horizontal:
+            return ((1 << length) - 1) << self.index(x, y)
+        mask = 0
+        for i in range(length):
+            mask |= 1 << self.index(x, y + i)
+        return mask
+
+    def shape_mask(self, shape):
+        """Маска фигуры, поставленной в клетку (0, 0)"""
+        mask = self._shape_masks.get(shape)
+        if mask is None:
+            mask = 0
+            for dx, dy in shape:
+                mask |= 1 << self.index(dx, dy)
+            self._shape_masks[shape] = mask
+        return mask
+
+    def anchor_mask(self, shape):
+        """Клетки, в которые можно поставить фигуру, не выходя за доску"""
+        mask = self._anchor_masks.get(shape)
+        if mask is None:
+            shape_width = max(x for x, _ in shape) + 1
+            shape_height = max(y for _, y in shape) + 1
+            mask = 0
+            if shape_width <= self.width and shape_height <= self.height:
+                row = (1 << (self.width - shape_width + 1)) - 1
+                for y in range(self.height - shape_height + 1):
+                    mask |= row << (y * self.width)
+            self._anchor_masks[shape] = mask
+        return mask
+
+    def legal_anchors(self, shape, blocked):
+        """Клетки, в которые фигуру можно поставить, не задев закрытые клетки"""
+        conflicts = 0
+        for dx, dy in shape:
+            conflicts |= blocked >> (dy * self.width + dx)
+        return self.anchor_mask(shape) & ~conflicts
+
+    def symmetries(self):
+        """Повороты и отражения доски: перестановки номеров клеток
+
+        symmetries()[s][i] - номер клетки, в которую переходит клетка i.
+        Первая перестановка тождественная; у неквадратной доски их 4, у
+        квадратной - 8.
+        """
+        if self._symmetries is None:
+            width, height = self.width, self.height
+            transforms = [lambda x, y: (x, y),
+                          lambda x, y: (width - 1 - x, y),
+                          lambda x, y: (x, height - 1 - y),
+                          lambda x, y: (width - 1 - x, height - 1 - y)]
+            if width == height:
+                transforms += [lambda x, y: (y, x),
+                               lambda x, y: (width - 1 - y, x),
+                               lambda x, y: (y, height - 1 - x),
+                               lambda x, y: (width - 1 - y, height - 1 - x)]
+            self._symmetries = [tuple(self.index(*transform(*self.cell(i))) for i in range(self.size))
+                                for transform in transforms]
+        return self._symmetries
+
+    def dilate(self, mask):
+        """Расширение маски на все соседние клетки (включая диагонали)"""
+        mask |= ((mask << 1) & self.not_first_column) | ((mask >> 1) & self.not_last_column)
+        return (mask | (mask << self.width) | (mask >> self.width)) & self.full
+
+
+@lru_cache(maxsize=None)
+def get_geometry(width, height):
+    """Общая геометрия для досок одного размера"""
+    return BoardGeometry(width, height)
+
+
+def iter_bits(mask):
+    """Номера установленных битов маски по возрастанию"""
+    # Поиск по двоичной строке не зависит от длины маски на каждом шаге
+    digits = bin(mask)[:1:-1]
+    index = digits.find("1")
+    while index >= 0:
+        yield index
+        index = digits.find("1", index + 1)
+
+
+def popcount(mask):
+    """Количество установленных битов"""
+    return bin(mask).count("1")
@@ -1,181 +1,394 @@
-import random
-import pygame
-from constants import *
+from bitboard import get_geometry, popcount
+from placement import FleetPlacer, PlacementIndex
+from rules import CLASSIC_RULES, shape_size, straight_shape
+
+
+class _RowView:
+    """Строка двумерного представления доски только для чтения"""
+
+    __slots__ = ('_value', '_y', '_width')
+
+    def __init__(self, value, y, width):
+        self._value = value
+        self._y = y
+        self._width = width
+
+    def __len__(self):
+        return self._width
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self._width
+        if not 0 <= x < self._width:
+            raise IndexError("индекс столбца вне доски")
+        return self._value(x, self._y)
+
+    def __iter__(self):
+        for x in range(self._width):
+            yield self._value(x, self._y)
+
+
+class _GridView:
+    """Представление битовых масок доски в виде таблицы grid[y][x]"""
+
+    __slots__ = ('_value', '_width', '_height')
+
+    def __init__(self, value, width, height):
+        self._value = value
+        self._width = width
+        self._height = height
+
+    def __len__(self):
+        return self._height
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self._height
+        if not 0 <= y < self._height:
+            raise IndexError("индекс строки вне доски")
+        return _RowView(self._value, y, self._width)
+
+    def __iter__(self):
+        for y in range(self._height):
+            yield _RowView(self._value, y, self._width)
+
+
+class BoardSnapshot:
+    """Неизменяемый снимок состояния доски
+
+    Хранит только целые числа (битовые маски) и кортеж длин непотопленных
+    кораблей, поэтому снимок создается за микросекунды, не зависит от
+    дальнейших изменений доски и безопасно читается из других потоков и
+    передается в другие процессы. В открытом снимке (public) маски
+    кораблей нет - только то, что видно сопернику.
+    """
+
+    __slots__ = ('rules', 'ship_mask', 'shot_mask', 'hit_mask', 'miss_mask', 'halo_mask', 'sunk_mask',
+                 'remaining_fleet')
+
+    def __init__(self, rules, ship_mask, shot_mask, hit_mask, miss_mask, halo_mask, sunk_mask, remaining_fleet):
+        values = (rules, ship_mask, shot_mask, hit_mask, miss_mask, halo_mask, sunk_mask, tuple(remaining_fleet))
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Снимок доски нельзя изменить")
+
+    def __delattr__(self, name):
+        raise AttributeError("Снимок доски нельзя изменить")
+
+    def _fields(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __reduce__(self):
+        return BoardSnapshot, self._fields()
+
+    def __eq__(self, other):
+        return isinstance(other, BoardSnapshot) and self._fields() == other._fields()
+
+    def __hash__(self):
+        return hash(self._fields())
+
+    @property
+    def width(self):
+        return self.rules.width
+
+    @property
+    def height(self):
+        return self.rules.height
+
+    @property
+    def geometry(self):
+        return get_geometry(self.rules.width, self.rules.height)
+
+    @property
+    def is_public(self):
+        """Снимок без расположения кораблей"""
+        return self.ship_mask is None
+
+    @property
+    def ships_alive(self):
+        """Количество непотопленных кораблей"""
+        return len(self.remaining_fleet)
+
+    @property
+    def unknown_mask(self):
+        """Клетки, по которым еще можно стрелять"""
+        return self.geometry.full & ~(self.shot_mask | self.halo_mask)
+
+    @property
+    def grid(self):
+        """Корабли: 1 - клетка корабля, 0 - пусто (только для закрытого снимка)"""
+        if self.ship_mask is None:
+            raise AttributeError("В открытом снимке нет расположения кораблей")
+        return _GridView(self._grid_value, self.width, self.height)
+
+    @property
+    def shots(self):
+        """Выстрелы: 1 - выстрел, 2 - клетка вокруг потопленного корабля, 0 - нет"""
+        return _GridView(self._shot_value, self.width, self.height)
+
+    def _grid_value(self, x, y):
+        return (self.ship_mask >> (y * self.width + x)) & 1
+
+    def _shot_value(self, x, y):
+        bit = 1 << (y * self.width + x)
+        if self.shot_mask & bit:
+            return 1
+        if self.halo_mask & bit:
+            return 2
+        return 0
+
+    def all_ships_sunk(self):
+        """Проверка, все ли корабли потоплены"""
+        return not self.remaining_fleet
+
+    def public(self):
+        """Открытый снимок: то, что видит соперник"""
+        if self.ship_mask is None:
+            return self
+        return BoardSnapshot(self.rules, None, *self._fields()[2:])
+
 
 class Board:
-    """Класс для управления игровой доской"""
+    """Класс для управления игровой доской
+
+    Состояние хранится в битовых масках: корабли, выстрелы, промахи и
+    отмеченные клетки вокруг потопленных кораблей. Атрибуты grid и shots
+    остаются доступными для чтения в виде таблиц [y][x].
+
+    Индекс клетка -> номер корабля и счетчики оставшихся попаданий
+    позволяют обрабатывать выстрел и проверять победу за O(1).
+    """
     
-    def __init__(self):
-        self.grid = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        self.shots = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        self.ships = []
+    def __init__(self, rules=None):
+        self.rules = rules or CLASSIC_RULES
+        self.geometry = get_geometry(self.rules.width, self.rules.height)
+        self.width = self.geometry.width
+        self.height = self.geometry.height
+        self.clear()
+        self._grid_view = _GridView(self._grid_value, self.width, self.height)
+        self._shots_view = _GridView(self._shot_value, self.width, self.height)
+
+    def clear(self):
+        """Очистка доски"""
+        self._ship_cells = {}
+        self._ship_masks = {}
+        self._cell_ship = {}
+        self._remaining = {}
+        self._ships_alive = 0
+        self._next_ship_id = 0
+        self._ship_mask = 0
+        self._shot_mask = 0
+        self._miss_mask = 0
+        self._halo_mask = 0
+        self._sunk_mask = 0
+        self._placement = PlacementIndex(self.rules, self.geometry)
+
+    @property
+    def ships(self):
+        """Список кораблей, каждый - список клеток (x, y)"""
+        return list(self._ship_cells.values())
+
+    @property
+    def ships_alive(self):
+        """Количество непотопленных кораблей"""
+        return self._ships_alive
+
+    @property
+    def ship_mask(self):
+        """Маска клеток кораблей"""
+        return self._ship_mask
+
+    @property
+    def shot_mask(self):
+        """Маска клеток, по которым стреляли"""
+        return self._shot_mask
+
+    @property
+    def miss_mask(self):
+        """Маска промахов"""
+        return self._miss_mask
+
+    @property
+    def halo_mask(self):
+        """Маска отмеченных клеток вокруг потопленных кораблей"""
+        return self._halo_mask
+
+    @property
+    def sunk_mask(self):
+        """Маска клеток потопленных кораблей"""
+        return self._sunk_mask
+
+    @property
+    def grid(self):
+        """Корабли: 1 - клетка корабля, 0 - пусто"""
+        return self._grid_view
+
+    @property
+    def shots(self):
+        """Выстрелы: 1 - выстрел, 2 - клетка вокруг потопленного корабля, 0 - нет"""
+        return self._shots_view
+
+    def _grid_value(self, x, y):
+        return (self._ship_mask >> (y * self.width + x)) & 1
+
+    def _shot_value(self, x, y):
+        bit = 1 << (y * self.width + x)
+        if self._shot_mask & bit:
+            return 1
+        if self._halo_mask & bit:
+            return 2
+        return 0
         
+    def fits_shape(self, shape, x, y):
+        """Проверка, что фигура целиком помещается на доске"""
+        shape_width, shape_height = shape_size(shape)
+        return 0 <= x and 0 <= y and x + shape_width <= self.width and y + shape_height <= self.height
+
+    def can_place_shape(self, shape, x, y):
+        """Проверка возможности размещения корабля произвольной формы"""
+        return self._placement.can_place(shape, x, y)
+
+    def legal_placements(self, length=None):
+        """Все допустимые позиции (фигура, x, y) кораблей длины length или всего флота"""
+        return list(self._placement.placements(length))
+
+    def is_fleet_shape(self, shape):
+        """Фигура допустима по правилам, и корабль такой длины еще не весь расставлен"""
+        length = len(shape)
+        if not length or tuple(map(tuple, shape)) not in self.rules.ship_shapes(length):
+            return False
+        placed = sum(1 for cells in self._ship_cells.values() if len(cells) == length)
+        return placed < self.rules.fleet.count(length)
+
+    def place_shape(self, shape, x, y):
+        """Размещение корабля произвольной формы (только фигуры флота по правилам)"""
+        if not self.is_fleet_shape(shape) or not self.can_place_shape(shape, x, y):
+            return False
+
+        self.add_ship([(x + dx, y + dy) for dx, dy in shape])
+        return True
+
+    def add_ship(self, ship_cells):
+        """Добавление корабля по списку клеток без проверки правил расстановки
+
+        Используется для заранее проверенных расстановок (например, из
+        пакетного генератора), чтобы не пересчитывать допустимость.
+        """
+        ship_id = self._next_ship_id
+        self._next_ship_id += 1
+        ship_mask = 0
+        for cell_x, cell_y in ship_cells:
+            index = self.geometry.index(cell_x, cell_y)
+            self._cell_ship[index] = ship_id
+            ship_mask |= 1 << index
+        self._ship_cells[ship_id] = ship_cells
+        self._ship_masks[ship_id] = ship_mask
+        self._remaining[ship_id] = len(ship_cells)
+        self._ships_alive += 1
+        self._ship_mask |= ship_mask
+        self._placement.add(ship_mask)
+
     def can_place_ship(self, length, x, y, horizontal):
         """Проверка возможности размещения корабля"""
-        if horizontal:
-            if x + length > GRID_SIZE:
-                return False
-            # Проверяем область вокруг корабля
-            for i in range(max(0, x-1), min(GRID_SIZE, x+length+1)):
-                for j in range(max(0, y-1), min(GRID_SIZE, y+2)):
-                    if self.grid[j][i] != 0:
-                        return False
-        else:
-            if y + length > GRID_SIZE:
-                return False
-            # Проверяем область вокруг корабля
-            for i in range(max(0, x-1), min(GRID_SIZE, x+2)):
-                for j in range(max(0, y-1), min(GRID_SIZE, y+length+1)):
-                    if self.grid[j][i] != 0:
-                        return False
-        return True
+        return self.can_place_shape(straight_shape(length, horizontal), x, y)
         
     def place_ship(self, length, x, y, horizontal):
         """Размещение корабля на доске"""
-        if not self.can_place_ship(length, x, y, horizontal):
-            return False
-            
-        # Размещение корабля
-        ship_cells = []
-        if horizontal:
-            for i in range(length):
-                self.grid[y][x+i] = 1
-                ship_cells.append((x+i, y))
-        else:
-            for i in range(length):
-                self.grid[y+i][x] = 1
-                ship_cells.append((x, y+i))
-                
-        self.ships.append(ship_cells)
-        return True
+        return self.place_shape(straight_shape(length, horizontal), x, y)
     
     def remove_ship_at(self, x, y):
         """Удаление корабля в указанной позиции"""
-        # Проверяем, есть ли корабль в этой клетке
-        if self.grid[y][x] == 0:
-            return None
-            
         # Находим корабль, которому принадлежит эта клетка
-        for ship in self.ships:
-            if (x, y) in ship:
-                # Удаляем корабль с доски
-                for ship_x, ship_y in ship:
-                    self.grid[ship_y][ship_x] = 0
-                
-                # Удаляем корабль из списка
-                self.ships.remove(ship)
-                
-                # Возвращаем длину удаленного корабля
-                return len(ship)
-        
-        return None
+        ship_id = self._cell_ship.get(self.geometry.index(x, y))
+        if ship_id is None:
+            return None
+
+        ship = self._ship_cells.pop(ship_id)
+        for ship_x, ship_y in ship:
+            del self._cell_ship[self.geometry.index(ship_x, ship_y)]
+        ship_mask = self._ship_masks.pop(ship_id)
+        self._ship_mask &= ~ship_mask
+        self._sunk_mask &= ~ship_mask
+        self._placement.rebuild(self._ship_mask)
+        if self._remaining.pop(ship_id) > 0:
+            self._ships_alive -= 1
+
+        # Возвращаем длину удаленного корабля
+        return len(ship)
             
-    def place_ships_randomly(self):
-        """Случайная расстановка всех кораблей"""
-        self.grid = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        self.ships = []
-        
-        for ship_length in SHIPS:
-            placed = False
-            attempts = 0
-            while not placed and attempts < 100:
-                x = random.randint(0, GRID_SIZE-1)
-                y = random.randint(0, GRID_SIZE-1)
-                horizontal = random.choice([True, False])
-                if self.place_ship(ship_length, x, y, horizontal):
-                    placed = True
-                attempts += 1
+    def place_ships_randomly(self, uniform=False, rng=None):
+        """Случайная расстановка всех кораблей (rng - генератор random.Random)"""
+        FleetPlacer(self.rules, rng=rng).place(self, uniform)
     
     def shoot(self, x, y):
         """Выстрел по клетке"""
-        if x < 0 or x >= GRID_SIZE or y < 0 or y >= GRID_SIZE or self.shots[y][x] != 0:
-            return False, "Недопустимый ход"
-        
-        self.shots[y][x] = 1
-        
-        if self.grid[y][x] == 1:
+        return self.shoot_many(((x, y),))[0]
+
+    def shoot_many(self, cells):
+        """Одновременные выстрелы по нескольким клеткам (залп)
+
+        Возвращает список (попадание, сообщение) в порядке клеток. Клетки
+        вне доски, уже обстрелянные и повторные клетки залпа - недопустимый
+        ход. Маски выстрелов и клетки вокруг потопленных кораблей
+        обновляются один раз на весь залп.
+        """
+        results = []
+        closed = self._shot_mask | self._halo_mask
+        salvo = 0
+        sunk = 0
+        for x, y in cells:
+            if x < 0 or x >= self.width or y < 0 or y >= self.height:
+                results.append((False, "Недопустимый ход"))
+                continue
+            index = self.geometry.index(x, y)
+            bit = 1 << index
+            if (closed | salvo) & bit:
+                results.append((False, "Недопустимый ход"))
+                continue
+            salvo |= bit
+
+            ship_id = self._cell_ship.get(index)
+            if ship_id is None:
+                results.append((False, "Мимо!"))
+                continue
+
             # Проверка, потоплен ли корабль
-            for ship in self.ships:
-                if (x, y) in ship:
-                    # Проверяем, все ли клетки корабля поражены
-                    all_hit = True
-                    for sx, sy in ship:
-                        if self.shots[sy][sx] == 0:
-                            all_hit = False
-                            break
-                    
-                    if all_hit:
-                        # Корабль потоплен, отмечаем клетки вокруг
-                        for sx, sy in ship:
-                            for dx in [-1, 0, 1]:
-                                for dy in [-1, 0, 1]:
-                                    nx, ny = sx + dx, sy + dy
-                                    if 0 <= nx < GRID_SIZE and 0 <= ny < GRID_SIZE and self.shots[ny][nx] == 0:
-                                        self.shots[ny][nx] = 2
-                        return True, "Потоплен!"
-                    return True, "Попадание!"
-        
-        return False, "Мимо!"
+            self._remaining[ship_id] -= 1
+            if self._remaining[ship_id]:
+                results.append((True, "Попадание!"))
+            else:
+                self._ships_alive -= 1
+                sunk |= self._ship_masks[ship_id]
+                results.append((True, "Потоплен!"))
+
+        self._shot_mask |= salvo
+        self._miss_mask |= salvo & ~self._ship_mask
+        self._sunk_mask |= sunk
+        # Отмечаем клетки вокруг потопленных кораблей (если корабли не могут касаться)
+        if sunk and not self.rules.allow_touching:
+            self._halo_mask |= self.geometry.dilate(sunk) & ~self._shot_mask
+        return results
+
+    def snapshot(self, public=False):
+        """Неизменяемый снимок доски (public - без расположения кораблей)"""
+        remaining_fleet = sorted((len(self._ship_cells[ship_id]) for ship_id, left in self._remaining.items() if left),
+                                 reverse=True)
+        return BoardSnapshot(self.rules, None if public else self._ship_mask, self._shot_mask,
+                             self._shot_mask & self._ship_mask, self._miss_mask, self._halo_mask, self._sunk_mask,
+                             remaining_fleet)
+
+    def open_cells(self):
+        """Количество клеток, по которым еще можно стрелять"""
+        return popcount(self.geometry.full & ~(self._shot_mask | self._halo_mask))
     
     def all_ships_sunk(self):
         """Проверка, все ли корабли потоплены"""
-        for ship in self.ships:
-            for x, y in ship:
-                if self.shots[y][x] == 0:
-                    return False
-        return True
+        return self._ships_alive == 0
 
-    def draw(self, screen, x, y, is_player, hide_ships=False, in_multiplayer=False, game_assets=None, fonts=None):
-        """Отрисовка доски"""
-        # Рисуем фон игрового поля
-        if game_assets:
-            if is_player:
-                bg = game_assets.get('blue_grid', None)
-            else:
-                bg = game_assets.get('green_grid', None)
-                
-            if bg:
-                screen.blit(bg, (x, y))
-        
-        if not game_assets or not bg:
-            # Рисуем сетку, если нет изображения
-            for i in range(GRID_SIZE + 1):
-                pygame.draw.line(screen, BLACK, (x, y + i * CELL_SIZE), (x + BOARD_SIZE, y + i * CELL_SIZE), 2)
-                pygame.draw.line(screen, BLACK, (x + i * CELL_SIZE, y), (x + i * CELL_SIZE, y + BOARD_SIZE), 2)
-        
-        # Буквы и цифры
-        letters = "АБВГДЕЖЗИК"
-        for i in range(GRID_SIZE):
-            # Буквы
-            letter_text = fonts['small'].render(letters[i], True, WHITE)
-            screen.blit(letter_text, (x + i * CELL_SIZE + CELL_SIZE//2 - letter_text.get_width()//2, y - 25))
-            
-            # Цифры
-            number_text = fonts['small'].render(str(i+1), True, WHITE)
-            screen.blit(number_text, (x - 25, y + i * CELL_SIZE + CELL_SIZE//2 - number_text.get_height()//2))
-        
-        # Рисуем корабли и выстрелы
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                cell_rect = pygame.Rect(x + col * CELL_SIZE, y + row * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                
-                # Заполняем ячейку
-                if self.shots[row][col] == 1 and self.grid[row][col] == 1:
-                    # Попадание
-                    pygame.draw.rect(screen, RED, cell_rect)
-                    pygame.draw.line(screen, BLACK, cell_rect.topleft, cell_rect.bottomright, 2)
-                    pygame.draw.line(screen, BLACK, (cell_rect.left, cell_rect.bottom), (cell_rect.right, cell_rect.top), 2)
-                elif self.shots[row][col] == 1:
-                    # Промах
-                    pygame.draw.circle(screen, WHITE, cell_rect.center, CELL_SIZE//6)
-                elif self.shots[row][col] == 2:
-                    # Отмеченные клетки вокруг потопленного корабля
-                    pygame.draw.circle(screen, LIGHT_GRAY, cell_rect.center, CELL_SIZE//8)
-                elif not hide_ships and self.grid[row][col] == 1 and not in_multiplayer:
-                    # Корабль
-                    pygame.draw.rect(screen, GREEN, cell_rect)
-        
-        # Надпись над доской
-        board_title = "Ваша доска" if is_player else "Доска противника"
-        title_text = fonts['medium'].render(board_title, True, WHITE)
-        screen.blit(title_text, (x + BOARD_SIZE//2 - title_text.get_width()//2, y - 50))
\ No newline at end of file
+    def draw(self, screen, x, y, is_player, hide_ships=False, in_multiplayer=False, game_assets=None, fonts=None,
+             cell_size=None):
+        """Отрисовка доски (pygame загружается только здесь)"""
+        from graphics import draw_board
+        draw_board(screen, self, x, y, is_player, hide_ships, in_multiplayer, game_assets, fonts, cell_size)
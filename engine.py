@@ -0,0 +1,202 @@
+import time
+from board import Board
+from rules import CLASSIC_RULES
+from seeding import make_rng
+
+# Фазы партии
+PLACEMENT = "placement"
+BATTLE = "battle"
+FINISHED = "finished"
+
+
+class GameEvent:
+    """Событие партии: тип, игрок и дополнительные данные"""
+
+    __slots__ = ('kind', 'player', 'data')
+
+    def __init__(self, kind, player, **data):
+        self.kind = kind
+        self.player = player
+        self.data = data
+
+    def __repr__(self):
+        return f"GameEvent({self.kind!r}, {self.player!r}, {self.data!r})"
+
+
+class GameSession:
+    """Партия морского боя без графики и звука
+
+    Хранит доски обоих игроков, очередь хода, победителя и время партии.
+    boards[i] - доска с кораблями игрока i, стреляет он по доске соперника.
+    Все изменения партии публикуются событиями: их можно забирать через
+    poll_events или получать сразу через subscribe. При заданном seed
+    случайная расстановка (и генераторы из make_rng) воспроизводимы.
+
+    События: ship_placed, ship_removed, fleet_placed, game_started, shot,
+    turn, game_over.
+    """
+
+    def __init__(self, rules=None, seed=None):
+        self.rules = rules or CLASSIC_RULES
+        self.seed = seed
+        self.boards = (Board(self.rules), Board(self.rules))
+        self._placement_rngs = (self.make_rng("placement", 0), self.make_rng("placement", 1))
+        self.phase = PLACEMENT
+        self.current_player = 0
+        self.winner = None
+        self.shots = [0, 0]
+        self.started_at = None
+        self.finished_at = None
+        self._events = []
+        self._listeners = []
+
+    def make_rng(self, *keys):
+        """Независимый генератор для части партии (например, ИИ игрока)"""
+        return make_rng(self.seed, *keys)
+
+    def subscribe(self, callback):
+        """Подписка на события партии"""
+        self._listeners.append(callback)
+
+    def poll_events(self):
+        """Накопленные события (очередь очищается)"""
+        events, self._events = self._events, []
+        return events
+
+    def _emit(self, kind, player, **data):
+        event = GameEvent(kind, player, **data)
+        self._events.append(event)
+        for callback in self._listeners:
+            callback(event)
+
+    @property
+    def is_over(self):
+        """Партия завершена"""
+        return self.phase == FINISHED
+
+    def board(self, player):
+        """Доска с кораблями игрока"""
+        return self.boards[player]
+
+    def target_board(self, player):
+        """Доска, по которой стреляет игрок"""
+        return self.boards[1 - player]
+
+    def available_ships(self, player):
+        """Длины еще не расставленных кораблей игрока по убыванию"""
+        available = list(self.rules.fleet)
+        for ship in self.boards[player].ships:
+            if len(ship) in available:
+                available.remove(len(ship))
+        return available
+
+    def placement_complete(self, player):
+        """Все корабли игрока расставлены"""
+        return not self.available_ships(player)
+
+    def place(self, player, shape, x, y):
+        """Размещение корабля игрока; False, если позиция недопустима"""
+        if self.phase != PLACEMENT or len(shape) not in self.available_ships(player):
+            return False
+        if not self.boards[player].place_shape(shape, x, y):
+            return False
+        self._emit("ship_placed", player, shape=shape, x=x, y=y)
+        return True
+
+    def remove(self, player, x, y):
+        """Удаление корабля игрока в клетке; длина корабля или None"""
+        if self.phase != PLACEMENT:
+            return None
+        length = self.boards[player].remove_ship_at(x, y)
+        if length:
+            self._emit("ship_removed", player, length=length, x=x, y=y)
+        return length
+
+    def place_randomly(self, player, placer=None):
+        """Случайная расстановка всего флота игрока
+
+        placer - свой генератор расстановок с методом place(board), например
+        AdaptivePlacer; по умолчанию обычная случайная расстановка.
+        """
+        if self.phase != PLACEMENT:
+            return False
+        if placer is not None:
+            placer.place(self.boards[player])
+        else:
+            self.boards[player].place_ships_randomly(rng=self._placement_rngs[player])
+        self._emit("fleet_placed", player)
+        return True
+
+    def start(self, first_player=0):
+        """Начало боя после расстановки обоих флотов"""
+        if self.phase != PLACEMENT:
+            raise ValueError("Партия уже начата")
+        if not (self.placement_complete(0) and self.placement_complete(1)):
+            raise ValueError("Не все корабли расставлены")
+        self.phase = BATTLE
+        self.current_player = first_player
+        self.started_at = time.time()
+        self._emit("game_started", first_player)
+
+    def shots_per_turn(self, player=None):
+        """Сколько выстрелов игрок делает за ход
+
+        В режиме залпа - по одному за каждый уцелевший корабль игрока, но
+        не больше, чем осталось необстрелянных клеток у соперника.
+        """
+        if player is None:
+            player = self.current_player
+        if not self.rules.salvo:
+            return 1
+        return min(self.boards[player].ships_alive, self.boards[1 - player].open_cells())
+
+    def shoot(self, x, y):
+        """Выстрел текущего игрока по доске соперника
+
+        Возвращает (попадание, сообщение) как Board.shoot. После промаха
+        ход переходит к сопернику, после потопления последнего корабля
+        партия завершается победой стрелявшего.
+        """
+        return self.fire(((x, y),))[0]
+
+    def fire(self, cells):
+        """Выстрелы текущего игрока за ход: список (попадание, сообщение)
+
+        Без режима залпа за ход стреляют по одной клетке, и ход сохраняется
+        после попадания. В режиме залпа cells - клетки залпа (не больше
+        shots_per_turn), и после залпа ход всегда переходит к сопернику.
+        """
+        cells = list(cells)
+        if self.phase != BATTLE:
+            return [(False, "Недопустимый ход")] * len(cells)
+
+        player = self.current_player
+        if len(cells) > self.shots_per_turn(player):
+            raise ValueError("Слишком много выстрелов за ход")
+
+        board = self.boards[1 - player]
+        results = board.shoot_many(cells)
+        fired = [(cell, hit, message) for cell, (hit, message) in zip(cells, results)
+                 if message != "Недопустимый ход"]
+        if not fired:
+            return results
+
+        self.shots[player] += len(fired)
+        for (x, y), hit, message in fired:
+            self._emit("shot", player, x=x, y=y, hit=hit, message=message)
+
+        if board.all_ships_sunk():
+            self.phase = FINISHED
+            self.winner = player
+            self.finished_at = time.time()
+            self._emit("game_over", player)
+        elif self.rules.salvo or not any(hit for _, hit, _ in fired):
+            self.current_player = 1 - player
+            self._emit("turn", self.current_player)
+        return results
+
+    def elapsed(self):
+        """Длительность боя в секундах"""
+        if self.started_at is None:
+            return 0
+        return (self.finished_at or time.time()) - self.started_at
@@ -0,0 +1,200 @@
+import argparse
+import time
+import numpy as np
+from board import Board
+from placement import FleetPlacer
+from rules import CLASSIC_RULES, shape_size
+from seeding import make_rng
+
+# Сдвиги на соседние клетки (включая саму клетку)
+NEIGHBOUR_OFFSETS = np.array([(dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)], dtype=np.int64)
+
+
+class FleetBatch:
+    """Пакет расстановок флота
+
+    occupancy - массив (N, H, W) занятых клеток, ship_ids - (N, H, W) с
+    номером корабля в клетке (-1 для пустых), ships - список массивов
+    (N, длина, 2) с координатами (x, y) клеток каждого корабля флота.
+    """
+
+    def __init__(self, rules, ship_ids, ships):
+        self.rules = rules
+        self.ship_ids = ship_ids
+        self.ships = ships
+
+    @property
+    def occupancy(self):
+        """Занятые клетки (N, H, W)"""
+        return self.ship_ids >= 0
+
+    def __len__(self):
+        return self.ship_ids.shape[0]
+
+    def row_view(self, row):
+        """Расстановка строки row без копирования: (ship_ids (H, W), список массивов (длина, 2) координат кораблей)
+
+        Возвращаются представления массивов пакета: изменения в них видны
+        в пакете, а сами массивы живут, пока жив пакет.
+        """
+        return self.ship_ids[row], [cells[row] for cells in self.ships]
+
+    def to_board(self, row):
+        """Доска с расстановкой из строки row
+
+        Клетки берутся прямо из массивов координат пакета; допустимость
+        расстановки повторно не проверяется. Доска хранит битовые маски,
+        поэтому расстановка копируется; для чтения без копии - row_view.
+        """
+        board = Board(self.rules)
+        for cells in self.ships:
+            board.add_ship([(int(x), int(y)) for x, y in cells[row]])
+        return board
+
+
+def _shape_offsets(rules):
+    """Сдвиги клеток всех фигур для каждой длины флота: массив (фигуры, длина, 2)"""
+    offsets = {}
+    for length in set(rules.fleet):
+        offsets[length] = np.array(rules.ship_shapes(length), dtype=np.int64)
+    return offsets
+
+
+def _sample_chunk(count, rules, rng, offsets):
+    """Последовательная расстановка флота сразу на count досках
+
+    Возвращает (ship_ids, ships, failed) - failed отмечает доски, где
+    очередному кораблю не нашлось места. Внутри номер доски - последняя
+    ось массивов, поэтому сдвиги масок работают с непрерывной памятью.
+    """
+    width, height = rules.width, rules.height
+    boards = np.arange(count)
+    ship_ids = np.full((count, height, width), -1, dtype=np.int16)
+    # Закрытые клетки с рамкой в одну клетку, чтобы не проверять границы
+    blocked = np.zeros((height + 2, width + 2, count), dtype=bool)
+    blocked_flat = blocked.reshape(-1)
+    inner = blocked[1:-1, 1:-1]
+    failed = np.zeros(count, dtype=bool)
+    zone = NEIGHBOUR_OFFSETS if not rules.allow_touching else NEIGHBOUR_OFFSETS[4:5]
+    ships = []
+
+    for ship_number, length in enumerate(rules.fleet):
+        shapes = rules.ship_shapes(length)
+        legal = np.zeros((len(shapes), height, width, count), dtype=bool)
+        for option, shape in enumerate(shapes):
+            shape_width, shape_height = shape_size(shape)
+            rows = height - shape_height + 1
+            columns = width - shape_width + 1
+            (dx, dy), rest = shape[0], shape[1:]
+            conflicts = inner[dy:dy + rows, dx:dx + columns].copy()
+            for dx, dy in rest:
+                conflicts |= inner[dy:dy + rows, dx:dx + columns]
+            np.logical_not(conflicts, out=legal[option, :rows, :columns])
+
+        # Равновероятный выбор среди допустимых позиций: случайный номер среди них
+        flat = legal.reshape(-1, count)
+        ranks = np.empty(flat.shape, dtype=np.int32)
+        running = np.zeros(count, dtype=np.int32)
+        for position in range(flat.shape[0]):
+            running += flat[position]
+            ranks[position] = running
+        failed |= running == 0
+        target = (rng.random(count) * running).astype(np.int32)
+        choice = np.count_nonzero(ranks <= target, axis=0)
+        choice[failed] = 0
+
+        option, anchor = np.divmod(choice, height * width)
+        anchor_y, anchor_x = np.divmod(anchor, width)
+        cells = offsets[length][option] + np.stack([anchor_x, anchor_y], axis=1)[:, None, :]
+        cells[failed] = 0
+        ships.append(cells.astype(np.int16))
+
+        rows_index = np.repeat(boards, length)
+        xs = cells[:, :, 0].ravel()
+        ys = cells[:, :, 1].ravel()
+        ship_ids.reshape(-1)[(rows_index * height + ys) * width + xs] = np.where(failed[rows_index], -1, ship_number)
+
+        # Закрываем корабль и (если касание запрещено) клетки вокруг него
+        zone_x = xs[:, None] + 1 + zone[None, :, 0]
+        zone_y = ys[:, None] + 1 + zone[None, :, 1]
+        blocked_flat[((zone_y * (width + 2) + zone_x) * count + rows_index[:, None]).ravel()] = True
+
+    return ship_ids, ships, failed
+
+
+def sample_fleets(count, rules=None, rng=None, chunk_size=None, max_rounds=20):
+    """Пакетная генерация count случайных расстановок флота
+
+    Корабли ставятся по очереди сразу на всех досках пакета; доски, где
+    очередному кораблю не нашлось места, генерируются заново, а после
+    max_rounds неудачных раундов достраиваются перебором FleetPlacer.
+    """
+    rules = rules or CLASSIC_RULES
+    # rng - генератор NumPy, целое зерно или None
+    rng = np.random.default_rng(rng)
+    if chunk_size is None:
+        # Около миллиона клеток на пакет: промежуточные массивы остаются небольшими
+        chunk_size = max(64, 2 ** 20 // rules.cells)
+    offsets = _shape_offsets(rules)
+
+    ship_ids = np.empty((count, rules.height, rules.width), dtype=np.int16)
+    ships = [np.empty((count, length, 2), dtype=np.int16) for length in rules.fleet]
+
+    pending = np.arange(count)
+    for _ in range(max_rounds):
+        if not len(pending):
+            break
+        next_pending = []
+        for start in range(0, len(pending), chunk_size):
+            rows = pending[start:start + chunk_size]
+            chunk_ids, chunk_ships, failed = _sample_chunk(len(rows), rules, rng, offsets)
+            done = ~failed
+            ship_ids[rows[done]] = chunk_ids[done]
+            for target, cells in zip(ships, chunk_ships):
+                target[rows[done]] = cells[done]
+            next_pending.append(rows[failed])
+        pending = np.concatenate(next_pending)
+
+    # Оставшиеся доски достраиваем перебором, который всегда находит расстановку
+    if len(pending):
+        # Зерно перебора - из того же генератора: досборка тоже воспроизводима
+        placer = FleetPlacer(rules, rng=make_rng(int(rng.integers(2 ** 63)), "fallback"))
+        order = {length: [k for k, fleet_length in enumerate(rules.fleet) if fleet_length == length]
+                 for length in set(rules.fleet)}
+        for row in pending:
+            ship_ids[row] = -1
+            free = {length: list(numbers) for length, numbers in order.items()}
+            for shape, x, y in placer.layout():
+                number = free[len(shape)].pop()
+                cells = np.array(shape, dtype=np.int16) + np.array([x, y], dtype=np.int16)
+                ships[number][row] = cells
+                ship_ids[row, cells[:, 1], cells[:, 0]] = number
+
+    return FleetBatch(rules, ship_ids, ships)
+
+
+def main():
+    """Сравнение скорости пакетной генерации с FleetPlacer"""
+    parser = argparse.ArgumentParser(description="Пакетная генерация расстановок флота")
+    parser.add_argument("--count", type=int, default=100000, help="количество расстановок")
+    parser.add_argument("--seed", type=int, default=None, help="зерно генератора случайных чисел")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    sample_fleets(args.count, rng=args.seed)
+    batch_rate = args.count / (time.perf_counter() - started)
+
+    loop_count = min(args.count, 5000)
+    rng = make_rng(args.seed)
+    started = time.perf_counter()
+    for _ in range(loop_count):
+        Board().place_ships_randomly(rng=rng)
+    loop_rate = loop_count / (time.perf_counter() - started)
+
+    print(f"Пакетная генерация: {batch_rate:.0f} расстановок в секунду")
+    print(f"Board.place_ships_randomly: {loop_rate:.0f} расстановок в секунду")
+    print(f"Ускорение: {batch_rate / loop_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
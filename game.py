@@ -1,31 +1,48 @@
 import pygame
 import time
 from constants import *
-from board import Board
-from ai_logic import ComputerAI
+from engine import GameSession
+from ai_config import AIConfig
+from ai_registry import DEFAULT_STRATEGY, available_strategies, check_strategy, get_strategy
+from bitboard import iter_bits
 from sound_manager import SoundManager
 from records import RecordManager
 from ui_elements import Button, VolumeSlider, NameInput
-from graphics import create_asset_images, load_image
+from graphics import create_asset_images, load_image, draw_board
+from rules import CLASSIC_RULES, shape_size
+from seeding import derive_seed, make_rng
+from shot_history import AdaptivePlacer, ShotHistory
+from turn_scheduler import TurnScheduler
 
 class Game:
     """Основной класс игры"""
     
-    def __init__(self, screen, fonts):
+    def __init__(self, screen, fonts, rules=None, seed=None, ai=DEFAULT_STRATEGY):
         self.screen = screen
         self.fonts = fonts
+        self.rules = rules or CLASSIC_RULES
+        # Стратегия ИИ компьютера из реестра (выбирается в меню)
+        self.ai_strategy = get_strategy(ai)
+        # Подобранные autotune.py параметры стратегий (загружаются один раз при запуске)
+        self.ai_config = AIConfig()
+        # Зерно запуска: каждая партия получает свое зерно, производное от него
+        self.seed = seed
+        self.games_started = 0
+        # Выстрелы человека в текущей партии с компьютером (для истории выстрелов)
+        self.human_shots = []
+        # Большие доски уменьшаем, чтобы они помещались в отведенную область
+        self.cell_size = max(1, min(CELL_SIZE, BOARD_SIZE // max(self.rules.width, self.rules.height)))
         self.state = "menu"
-        self.player_board = Board()
-        self.opponent_board = Board()
-        self.current_player = 0
+        # Правила партии, очередь хода и победитель - в GameSession, Game только отображает
+        self.session = self.new_session()
         self.message = ""
         self.ship_placement_index = 0
-        self.ship_horizontal = True
+        self.ship_shape_index = 0
         self.vs_computer = True
-        self.computer_ai = ComputerAI()
-        
-        # Для удаления кораблей
-        self.removed_ships = []  # Список удаленных кораблей для возврата в пул
+        self.computer_ai = self.create_ai()
+        self.salvo_targets = []  # Выбранные клетки залпа (режим залпа)
+        # Ход компьютера выполняется по шагам игрового цикла, выбор клеток - в отдельном потоке
+        self.turn_scheduler = TurnScheduler(delay=0.5)
         
         # Имена игроков
         self.player1_name = ""
@@ -35,12 +52,14 @@ class Game:
         self.game_start_time = None
         
         # Загрузка ресурсов
-        self.background_image = load_image("images/sea_battle_bg.jpg", WINDOW_WIDTH, WINDOW_HEIGHT)
-        self.game_assets = create_asset_images()
+        self.background_image = load_image("images/sea_battle_bg.jpg", WINDOW_WIDTH, WINDOW_HEIGHT,
+                                           rng=make_rng(self.seed, "graphics"))
+        self.game_assets = create_asset_images(self.rules.width, self.rules.height, self.cell_size)
         
         # Менеджеры
         self.sound_manager = SoundManager()
         self.record_manager = RecordManager()
+        self.shot_history = ShotHistory()
         
         # UI элементы
         self.name_input = NameInput(WINDOW_WIDTH//2 - 150, WINDOW_HEIGHT//2, 300, 50)
@@ -48,6 +67,7 @@ class Game:
         # Кнопки
         self.button_vs_computer = Button(WINDOW_WIDTH//2 - 150, WINDOW_HEIGHT//2 - 80, 300, 80, "Игра с компьютером")
         self.button_vs_player = Button(WINDOW_WIDTH//2 - 150, WINDOW_HEIGHT//2 + 20, 300, 80, "Игра с человеком")
+        self.button_ai = Button(WINDOW_WIDTH//2 - 150, WINDOW_HEIGHT//2 + 120, 300, 50, self.ai_button_text())
         self.button_rotate = Button(WINDOW_WIDTH//2 - 150, WINDOW_HEIGHT - 150, 300, 50, "Повернуть корабль (R)")
         self.button_random = Button(WINDOW_WIDTH//2 - 150, WINDOW_HEIGHT - 80, 300, 50, "Случайная расстановка")
         self.button_exit = Button(WINDOW_WIDTH - 150, 20, 130, 40, "Выход (ESC)", RED, DARK_RED)
@@ -63,17 +83,91 @@ class Game:
         # Запускаем фоновую музыку
         self.sound_manager.start_music()
         
+    @property
+    def player_board(self):
+        """Доска первого игрока"""
+        return self.session.boards[0]
+
+    @property
+    def opponent_board(self):
+        """Доска второго игрока (компьютера)"""
+        return self.session.boards[1]
+
+    @property
+    def current_player(self):
+        """Игрок, который сейчас расставляет корабли или стреляет"""
+        return self.session.current_player
+
+    @current_player.setter
+    def current_player(self, player):
+        self.session.current_player = player
+
+    def new_session(self):
+        """Новая партия со следующим зерном"""
+        seed = None if self.seed is None else derive_seed(self.seed, "game", self.games_started)
+        self.games_started += 1
+        session = GameSession(self.rules, seed)
+        session.subscribe(self.on_session_event)
+        return session
+
+    def on_session_event(self, event):
+        """Запись выстрелов человека по компьютеру по событиям партии"""
+        if event.kind == "shot" and event.player == 0 and self.vs_computer:
+            self.human_shots.append((event.data["x"], event.data["y"]))
+
+    def place_computer_fleet(self):
+        """Расстановка флота компьютера с учетом истории выстрелов людей"""
+        placer = AdaptivePlacer(self.rules, self.shot_history, rng=self.session.make_rng("placement", "adaptive"))
+        self.session.place_randomly(1, placer)
+
+    def create_ai(self):
+        """ИИ компьютера выбранной стратегии для текущей партии"""
+        strategy = self.ai_strategy
+        options = self.ai_config.params(self.rules, strategy.name)
+        try:
+            ai = strategy.create(self.rules, rng=self.session.make_rng("ai"), **options)
+        except TypeError as e:
+            # Параметры от другой версии стратегии: играем с настройками по умолчанию
+            print(f"Ошибка параметров ИИ из настроек: {e}")
+            ai = None
+        except ValueError as e:
+            # Стратегии не хватает данных (например, весов сети): играет стратегия по умолчанию
+            print(f"Ошибка создания ИИ: {e}")
+            strategy = get_strategy(DEFAULT_STRATEGY)
+            ai = None
+        if ai is None:
+            ai = strategy.create(self.rules, rng=self.session.make_rng("ai"))
+        return check_strategy(ai)
+
+    def ai_button_text(self):
+        """Надпись кнопки выбора сложности"""
+        return f"Компьютер: {self.ai_strategy.title}"
+
+    def next_ai_strategy(self):
+        """Переключение на следующую доступную стратегию ИИ"""
+        strategies = available_strategies()
+        index = strategies.index(self.ai_strategy) if self.ai_strategy in strategies else -1
+        self.ai_strategy = strategies[(index + 1) % len(strategies)]
+        self.button_ai.text = self.ai_button_text()
+
+    def close_ai(self):
+        """Освобождение ресурсов ИИ компьютера (процессы, общая память) после его хода"""
+        close = getattr(self.computer_ai, "close", None)
+        if close is not None:
+            self.turn_scheduler.run_after(close)
+
     def reset_game(self):
         """Сброс игры к начальному состоянию"""
-        self.player_board = Board()
-        self.opponent_board = Board()
-        self.current_player = 0
+        self.turn_scheduler.cancel()
+        self.close_ai()
+        self.session = self.new_session()
         self.message = ""
         self.ship_placement_index = 0
-        self.ship_horizontal = True
-        self.computer_ai = ComputerAI()
+        self.ship_shape_index = 0
+        self.computer_ai = self.create_ai()
+        self.salvo_targets = []
+        self.human_shots = []
         self.game_start_time = None
-        self.removed_ships = []
         self.remove_mode = False
         
     def start_game_vs_computer(self):
@@ -94,61 +188,60 @@ class Game:
         
     def place_ships_randomly_for_current_player(self):
         """Случайная расстановка кораблей для текущего игрока"""
-        if self.current_player == 0:
-            self.player_board.place_ships_randomly()
-            self.ship_placement_index = len(SHIPS)
-            self.removed_ships = []  # Очищаем список удаленных кораблей
-        else:
-            self.opponent_board.place_ships_randomly()
-            self.ship_placement_index = len(SHIPS)
-            self.removed_ships = []
+        self.session.place_randomly(self.current_player)
+        self.ship_placement_index = len(self.rules.fleet)
             
         if self.vs_computer and self.current_player == 0:
             # Компьютер размещает свои корабли
-            self.current_player = 1
-            self.opponent_board.place_ships_randomly()
-            self.current_player = 0
-            self.state = "game"
-            self.game_start_time = time.time()
+            self.place_computer_fleet()
+            self.start_battle()
         elif not self.vs_computer:
             if self.current_player == 0:
                 # Переход к игроку 2
                 self.current_player = 1
                 self.ship_placement_index = 0
-                self.ship_horizontal = True
+                self.ship_shape_index = 0
                 self.state = "enter_name"
                 self.name_input.text = ""
                 self.name_input.active = True
             else:
                 # Начинаем игру
-                self.current_player = 0
-                self.state = "game"
-                self.game_start_time = time.time()
+                self.start_battle()
     
+    def start_battle(self):
+        """Переход к бою после расстановки кораблей"""
+        self.session.start(0)
+        self.state = "game"
+        self.game_start_time = self.session.started_at
+
     def get_available_ships(self):
         """Получить список доступных для размещения кораблей"""
-        # Начинаем со всех кораблей
-        available = SHIPS.copy()
-        
-        # Удаляем уже размещенные корабли
-        board = self.player_board if self.current_player == 0 else self.opponent_board
-        for ship in board.ships:
-            ship_length = len(ship)
-            if ship_length in available:
-                available.remove(ship_length)
-        
-        # Добавляем удаленные корабли обратно в список
-        for ship_length in self.removed_ships:
-            available.append(ship_length)
-        
-        # Сортируем по убыванию
-        available.sort(reverse=True)
-        return available
+        # Удаленные корабли сразу возвращаются в пул, так как их больше нет на доске
+        return self.session.available_ships(self.current_player)
     
+    def current_ship_shape(self, ship_length):
+        """Текущая фигура размещаемого корабля"""
+        shapes = self.rules.ship_shapes(ship_length)
+        return shapes[self.ship_shape_index % len(shapes)]
+
+    def rotate_ship(self):
+        """Переход к следующему повороту корабля"""
+        self.ship_shape_index += 1
+
+    def mouse_position(self):
+        """Положение курсора мыши на экране"""
+        return pygame.mouse.get_pos()
+
+    def screen_to_cell(self, x, y, board_x, board_y):
+        """Перевод координат мыши в индексы сетки (None вне доски)"""
+        grid_x = (x - board_x) // self.cell_size
+        grid_y = (y - board_y) // self.cell_size
+        if 0 <= grid_x < self.rules.width and 0 <= grid_y < self.rules.height:
+            return grid_x, grid_y
+        return None
+
     def try_place_ship(self, x, y):
         """Попытка разместить корабль"""
-        board = self.player_board if self.current_player == 0 else self.opponent_board
-        
         # Получаем доступные корабли
         available_ships = self.get_available_ships()
         
@@ -159,17 +252,13 @@ class Game:
         ship_length = available_ships[0]
         
         # Переводим координаты мыши в индексы сетки
-        grid_x = (x - BOARD1_X) // CELL_SIZE
-        grid_y = (y - BOARD1_Y) // CELL_SIZE
+        cell = self.screen_to_cell(x, y, BOARD1_X, BOARD1_Y)
         
-        if 0 <= grid_x < GRID_SIZE and 0 <= grid_y < GRID_SIZE:
-            if board.place_ship(ship_length, grid_x, grid_y, self.ship_horizontal):
+        if cell:
+            grid_x, grid_y = cell
+            if self.session.place(self.current_player, self.current_ship_shape(ship_length), grid_x, grid_y):
                 self.sound_manager.play_sound('place_ship')
                 
-                # Удаляем корабль из списка удаленных, если он там был
-                if ship_length in self.removed_ships:
-                    self.removed_ships.remove(ship_length)
-                
                 # Проверяем, все ли корабли размещены
                 if not self.get_available_ships():
                     self.finish_ship_placement()
@@ -179,17 +268,13 @@ class Game:
     
     def try_remove_ship(self, x, y):
         """Попытка удалить корабль"""
-        board = self.player_board if self.current_player == 0 else self.opponent_board
-        
         # Переводим координаты мыши в индексы сетки
-        grid_x = (x - BOARD1_X) // CELL_SIZE
-        grid_y = (y - BOARD1_Y) // CELL_SIZE
+        cell = self.screen_to_cell(x, y, BOARD1_X, BOARD1_Y)
         
-        if 0 <= grid_x < GRID_SIZE and 0 <= grid_y < GRID_SIZE:
-            removed_length = board.remove_ship_at(grid_x, grid_y)
-            if removed_length:
+        if cell:
+            grid_x, grid_y = cell
+            if self.session.remove(self.current_player, grid_x, grid_y):
                 self.sound_manager.play_sound('remove_ship')
-                self.removed_ships.append(removed_length)
                 return True
         return False
     
@@ -197,130 +282,152 @@ class Game:
         """Завершение расстановки кораблей"""
         if self.vs_computer and self.current_player == 0:
             # Компьютер размещает свои корабли
-            self.current_player = 1
-            self.opponent_board.place_ships_randomly()
-            self.current_player = 0
-            self.state = "game"
-            self.game_start_time = time.time()
+            self.place_computer_fleet()
+            self.start_battle()
         elif not self.vs_computer:
             if self.current_player == 0:
                 # Переход к игроку 2
                 self.current_player = 1
                 self.ship_placement_index = 0
-                self.ship_horizontal = True
-                self.removed_ships = []
+                self.ship_shape_index = 0
                 self.remove_mode = False
                 self.state = "enter_name"
                 self.name_input.text = ""
                 self.name_input.active = True
             else:
                 # Начинаем игру
-                self.current_player = 0
-                self.state = "game"
-                self.game_start_time = time.time()
+                self.start_battle()
         else:
-            self.state = "game"
-            self.game_start_time = time.time()
+            self.start_battle()
     
     def try_shoot(self, x, y):
         """Попытка выстрела"""
+        # Пока ходит компьютер, клики по доскам игнорируются
+        if self.vs_computer and self.current_player == 1:
+            return False
         # Проверяем, чья очередь стрелять
         if (self.current_player == 0 and x < WINDOW_WIDTH // 2) or (self.current_player == 1 and x > WINDOW_WIDTH // 2):
             return False
             
-        board_to_shoot = self.opponent_board if self.current_player == 0 else self.player_board
-        
         # Переводим координаты мыши в индексы сетки
         if self.current_player == 0:
-            grid_x = (x - BOARD2_X) // CELL_SIZE
-            grid_y = (y - BOARD2_Y) // CELL_SIZE
+            cell = self.screen_to_cell(x, y, BOARD2_X, BOARD2_Y)
         else:
-            grid_x = (x - BOARD1_X) // CELL_SIZE
-            grid_y = (y - BOARD1_Y) // CELL_SIZE
-            
-        if 0 <= grid_x < GRID_SIZE and 0 <= grid_y < GRID_SIZE:
-            hit, message = board_to_shoot.shoot(grid_x, grid_y)
-            
-            if message == "Недопустимый ход":
-                return False
-                
-            self.message = message
+            cell = self.screen_to_cell(x, y, BOARD1_X, BOARD1_Y)
             
-            # Воспроизводим звуки (убрали звук выстрела)
-            if hit:
-                if message == "Потоплен!":
-                    self.sound_manager.play_sound('sunk')
-                else:
-                    self.sound_manager.play_sound('hit')
+        if cell:
+            if self.rules.salvo:
+                # Клетки залпа выбираются кликами, повторный клик снимает выбор
+                if cell in self.salvo_targets:
+                    self.salvo_targets.remove(cell)
+                    return True
+                grid_x, grid_y = cell
+                if self.session.target_board(self.current_player).shots[grid_y][grid_x]:
+                    return False
+                self.salvo_targets.append(cell)
+                if len(self.salvo_targets) < self.session.shots_per_turn():
+                    return True
+                cells, self.salvo_targets = self.salvo_targets, []
             else:
-                self.sound_manager.play_sound('miss')
-            
-            # Если не попал, передаем ход
-            if not hit:
-                self.current_player = 1 - self.current_player
+                cells = [cell]
+
+            results = [result for result in self.session.fire(cells) if result[1] != "Недопустимый ход"]
+            if not results:
+                return False
                 
-                # Если сейчас ход компьютера
-                if self.vs_computer and self.current_player == 1:
-                    self.computer_turn()
+            self.message = self.shot_message(results)
+            self.play_shot_sound(results)
             
             # Проверяем на победу
-            if board_to_shoot.all_ships_sunk():
+            if self.session.is_over:
                 self.end_game()
+            # Ход перешел к сопернику; ходит компьютер
+            elif self.vs_computer and self.current_player == 1:
+                self.schedule_computer_turn()
                 
             return True
         return False
+
+    def shot_message(self, results):
+        """Сообщение о результатах выстрелов за ход"""
+        if len(results) == 1:
+            return results[0][1]
+        hits = sum(1 for hit, _ in results if hit)
+        sunk = sum(1 for _, message in results if message == "Потоплен!")
+        return f"Залп: попаданий {hits} из {len(results)}, потоплено {sunk}"
+
+    def play_shot_sound(self, results):
+        """Звук результата выстрелов (убрали звук выстрела)"""
+        if any(message == "Потоплен!" for _, message in results):
+            self.sound_manager.play_sound('sunk')
+        elif any(hit for hit, _ in results):
+            self.sound_manager.play_sound('hit')
+        else:
+            self.sound_manager.play_sound('miss')
     
-    def computer_turn(self):
-        """Ход компьютера"""
-        pygame.display.flip()
-        time.sleep(0.5)
-        
-        target = self.computer_ai.get_next_shot(self.player_board)
-        
-        if target:
-            grid_x, grid_y = target
-            hit, message = self.player_board.shoot(grid_x, grid_y)
-            self.message = "Компьютер: " + message
-            
-            # Обновляем экран
-            self.draw_game()
-            self.draw_ui_elements()
-            pygame.display.flip()
+    def schedule_computer_turn(self):
+        """Планирование хода компьютера после паузы"""
+        # Компьютер видит только открытый снимок доски игрока; снимок неизменяем,
+        # поэтому ИИ может считать в другом потоке, пока доска рисуется
+        ai = self.computer_ai
+        snapshot = self.player_board.snapshot(public=True)
+        count = self.session.shots_per_turn()
+        self.turn_scheduler.schedule(lambda: ai.get_next_shots(snapshot, count))
+
+    def update_computer_turn(self):
+        """Шаг кадра: выстрел компьютера, когда клетки выбраны"""
+        if self.state != "game" or not self.turn_scheduler.busy:
+            return
+        try:
+            targets = self.turn_scheduler.poll()
+        except Exception as e:
+            # Планировщик уже свободен: без выстрела ход компьютера не завершится никогда
+            print(f"Ошибка хода компьютера: {e}")
+            targets = self.fallback_shots()
+        if targets is not None:
+            self.computer_turn(targets or self.fallback_shots())
+
+    def fallback_shots(self):
+        """Случайные необстрелянные клетки доски игрока на ход, если ИИ не выбрал клеток"""
+        snapshot = self.player_board.snapshot(public=True)
+        cells = [snapshot.geometry.cell(index) for index in iter_bits(snapshot.unknown_mask)]
+        rng = self.session.make_rng("fallback", len(cells))
+        return rng.sample(cells, min(self.session.shots_per_turn(), len(cells)))
+
+    def computer_turn(self, targets):
+        """Ход компьютера по выбранным клеткам"""
+        if targets:
+            results = self.session.fire(targets)
+            self.message = "Компьютер: " + self.shot_message(results)
             
-            if hit:
+            self.play_shot_sound(results)
+            for (grid_x, grid_y), (hit, message) in zip(targets, results):
                 if message == "Потоплен!":
-                    self.sound_manager.play_sound('sunk')
                     self.computer_ai.register_sunk()
-                else:
-                    self.sound_manager.play_sound('hit')
+                elif hit:
                     self.computer_ai.register_hit(grid_x, grid_y)
-            else:
-                self.sound_manager.play_sound('miss')
-                self.computer_ai.register_miss(grid_x, grid_y)
-            
-            # Если не попал, передаем ход игроку
-            if not hit:
-                self.current_player = 0
+                else:
+                    self.computer_ai.register_miss(grid_x, grid_y)
             
-            # Проверяем на победу
-            if self.player_board.all_ships_sunk():
+            # Проверяем на победу (после промаха ход уже перешел к игроку)
+            if self.session.is_over:
                 self.end_game()
                 
-            # Если попал и игра не окончена, компьютер стреляет снова
-            elif hit and self.state != "game_over":
-                time.sleep(0.5)
-                self.computer_turn()
+            # Если ход остался за компьютером, он стреляет снова
+            elif self.current_player == 1 and self.state != "game_over":
+                self.schedule_computer_turn()
     
     def end_game(self):
         """Завершение игры"""
-        if self.game_start_time:
-            game_time = time.time() - self.game_start_time
-            self.game_start_time = None
-        else:
-            game_time = 0
+        game_time = self.session.elapsed()
+        self.game_start_time = None
+
+        # Порядок выстрелов человека пополняет историю для расстановки компьютера
+        if self.vs_computer and self.human_shots:
+            self.shot_history.record_game(self.rules, self.human_shots, self.session.boards[1].halo_mask)
         
         # Определяем победителя
-        if self.current_player == 0:
+        if self.session.winner == 0:
             winner_name = self.player1_name
             if self.vs_computer:
                 self.message = f"{winner_name} победил компьютер!"
@@ -401,6 +508,7 @@ class Game:
         # Кнопки
         self.button_vs_computer.draw(self.screen, self.fonts['medium'])
         self.button_vs_player.draw(self.screen, self.fonts['medium'])
+        self.button_ai.draw(self.screen, self.fonts['small'])
     
     def draw_enter_name(self):
         """Отрисовка экрана ввода имени"""
@@ -451,14 +559,21 @@ class Game:
         
         # Рисуем доску
         board = self.player_board if self.current_player == 0 else self.opponent_board
-        board.draw(self.screen, BOARD1_X, BOARD1_Y, True, game_assets=self.game_assets, fonts=self.fonts)
+        draw_board(self.screen, board, BOARD1_X, BOARD1_Y, True, game_assets=self.game_assets, fonts=self.fonts,
+                   cell_size=self.cell_size)
         
         # Отображаем подсказку
         if self.remove_mode:
             mode_text = "Режим удаления: кликните на корабль для удаления"
             mode_color = RED
         else:
-            orientation_text = "Горизонтально" if self.ship_horizontal else "Вертикально"
+            orientation_text = "Горизонтально"
+            if available_ships:
+                shape_width, shape_height = shape_size(self.current_ship_shape(available_ships[0]))
+                if shape_width > 1 and shape_height > 1:
+                    orientation_text = "Изогнуто"
+                elif shape_height > 1:
+                    orientation_text = "Вертикально"
             mode_text = f"Режим размещения: {orientation_text}"
             mode_color = WHITE
             
@@ -472,32 +587,28 @@ class Game:
         
         # Превью корабля под курсором (только в режиме размещения)
         if not self.remove_mode and available_ships:
-            mouse_pos = pygame.mouse.get_pos()
-            grid_x = (mouse_pos[0] - BOARD1_X) // CELL_SIZE
-            grid_y = (mouse_pos[1] - BOARD1_Y) // CELL_SIZE
+            mouse_pos = self.mouse_position()
+            cell = self.screen_to_cell(mouse_pos[0], mouse_pos[1], BOARD1_X, BOARD1_Y)
             
-            if 0 <= grid_x < GRID_SIZE and 0 <= grid_y < GRID_SIZE:
-                ship_length = available_ships[0]
-                valid_placement = board.can_place_ship(ship_length, grid_x, grid_y, self.ship_horizontal)
+            if cell:
+                grid_x, grid_y = cell
+                shape = self.current_ship_shape(available_ships[0])
+                valid_placement = board.can_place_shape(shape, grid_x, grid_y)
                 
                 # Отображаем превью корабля
-                for i in range(ship_length):
-                    if self.ship_horizontal:
-                        cell_x = grid_x + i
-                        cell_y = grid_y
-                    else:
-                        cell_x = grid_x
-                        cell_y = grid_y + i
+                for dx, dy in shape:
+                    cell_x = grid_x + dx
+                    cell_y = grid_y + dy
                     
-                    if 0 <= cell_x < GRID_SIZE and 0 <= cell_y < GRID_SIZE:
+                    if 0 <= cell_x < self.rules.width and 0 <= cell_y < self.rules.height:
                         cell_rect = pygame.Rect(
-                            BOARD1_X + cell_x * CELL_SIZE, 
-                            BOARD1_Y + cell_y * CELL_SIZE, 
-                            CELL_SIZE, 
-                            CELL_SIZE
+                            BOARD1_X + cell_x * self.cell_size, 
+                            BOARD1_Y + cell_y * self.cell_size, 
+                            self.cell_size, 
+                            self.cell_size
                         )
                         color = YELLOW if valid_placement else RED
-                        pygame.draw.rect(self.screen, color, cell_rect, 3)
+                        pygame.draw.rect(self.screen, color, cell_rect, min(3, self.cell_size))
     
     def draw_game(self):
         """Отрисовка игрового экрана"""
@@ -513,6 +624,8 @@ class Game:
             current_player_text = f"Ход {self.player1_name}"
         else:
             current_player_text = f"Ход {self.player2_name if not self.vs_computer else 'Компьютера'}"
+            if self.vs_computer and self.turn_scheduler.thinking:
+                current_player_text += "..."
         
         title_text = self.fonts['big'].render(current_player_text, True, WHITE)
         self.screen.blit(title_text, (WINDOW_WIDTH//2 - title_text.get_width()//2, 30))
@@ -527,7 +640,10 @@ class Game:
             elapsed_time = time.time() - self.game_start_time
             minutes = int(elapsed_time // 60)
             seconds = int(elapsed_time % 60)
-            timer_text = self.fonts['small'].render(f"Время: {minutes}:{seconds:02d}", True, WHITE)
+            timer_line = f"Время: {minutes}:{seconds:02d}"
+            if self.rules.salvo:
+                timer_line += f"   Залп: выбрано {len(self.salvo_targets)} из {self.session.shots_per_turn()}"
+            timer_text = self.fonts['small'].render(timer_line, True, WHITE)
             self.screen.blit(timer_text, (WINDOW_WIDTH//2 - timer_text.get_width()//2, 100))
         
         # Рисуем доски
@@ -540,12 +656,20 @@ class Game:
             opponent_hide_ships = True
             in_multiplayer = True
         
-        self.player_board.draw(self.screen, BOARD1_X, BOARD1_Y, True, 
-                              hide_ships=player_hide_ships, in_multiplayer=in_multiplayer, 
-                              game_assets=self.game_assets, fonts=self.fonts)
-        self.opponent_board.draw(self.screen, BOARD2_X, BOARD2_Y, False, 
-                                hide_ships=opponent_hide_ships, in_multiplayer=in_multiplayer, 
-                                game_assets=self.game_assets, fonts=self.fonts)
+        draw_board(self.screen, self.player_board, BOARD1_X, BOARD1_Y, True,
+                   hide_ships=player_hide_ships, in_multiplayer=in_multiplayer,
+                   game_assets=self.game_assets, fonts=self.fonts, cell_size=self.cell_size)
+        draw_board(self.screen, self.opponent_board, BOARD2_X, BOARD2_Y, False,
+                   hide_ships=opponent_hide_ships, in_multiplayer=in_multiplayer,
+                   game_assets=self.game_assets, fonts=self.fonts, cell_size=self.cell_size)
+        
+        # Выбранные клетки залпа
+        if self.salvo_targets:
+            board_x, board_y = (BOARD2_X, BOARD2_Y) if self.current_player == 0 else (BOARD1_X, BOARD1_Y)
+            for cell_x, cell_y in self.salvo_targets:
+                cell_rect = pygame.Rect(board_x + cell_x * self.cell_size, board_y + cell_y * self.cell_size,
+                                        self.cell_size, self.cell_size)
+                pygame.draw.rect(self.screen, YELLOW, cell_rect, min(3, self.cell_size))
         
         # Кнопка возврата
         self.button_back.draw(self.screen, self.fonts['medium'])
@@ -595,7 +719,7 @@ class Game:
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 return False
                 
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_pos = self.mouse_position()
             
             # Обработка ползунка громкости
             if self.volume_slider.handle_event(event):
@@ -619,11 +743,14 @@ class Game:
             if self.state == "menu":
                 self.button_vs_computer.check_hover(mouse_pos)
                 self.button_vs_player.check_hover(mouse_pos)
+                self.button_ai.check_hover(mouse_pos)
                 
                 if self.button_vs_computer.is_clicked(mouse_pos, event, self.sound_manager):
                     self.start_game_vs_computer()
                 elif self.button_vs_player.is_clicked(mouse_pos, event, self.sound_manager):
                     self.start_game_vs_player()
+                elif self.button_ai.is_clicked(mouse_pos, event, self.sound_manager):
+                    self.next_ai_strategy()
                     
             elif self.state == "enter_name":
                 self.button_confirm_name.check_hover(mouse_pos)
@@ -642,7 +769,7 @@ class Game:
                 self.button_remove_ship.check_hover(mouse_pos)
                 
                 if self.button_rotate.is_clicked(mouse_pos, event, self.sound_manager):
-                    self.ship_horizontal = not self.ship_horizontal
+                    self.rotate_ship()
                 elif self.button_random.is_clicked(mouse_pos, event, self.sound_manager):
                     self.place_ships_randomly_for_current_player()
                 elif self.button_remove_ship.is_clicked(mouse_pos, event, self.sound_manager):
@@ -671,12 +798,13 @@ class Game:
                     
                 # Поворот корабля на R
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
-                    self.ship_horizontal = not self.ship_horizontal
+                    self.rotate_ship()
                     
             elif self.state == "game":
                 self.button_back.check_hover(mouse_pos)
                 
                 if self.button_back.is_clicked(mouse_pos, event, self.sound_manager):
+                    self.turn_scheduler.cancel()
                     self.state = "menu"
                 elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     if not any([
@@ -691,10 +819,27 @@ class Game:
                 self.button_back.check_hover(mouse_pos)
                 
                 if self.button_back.is_clicked(mouse_pos, event, self.sound_manager):
+                    self.turn_scheduler.cancel()
                     self.state = "menu"
         
         return True
     
+    def draw_frame(self):
+        """Отрисовка кадра текущего состояния"""
+        if self.state == "menu":
+            self.draw_menu()
+        elif self.state == "enter_name":
+            self.draw_enter_name()
+        elif self.state == "place_ships":
+            self.draw_place_ships()
+        elif self.state == "game":
+            self.draw_game()
+        elif self.state == "game_over":
+            self.draw_game_over()
+        
+        # UI элементы
+        self.draw_ui_elements()
+
     def run(self):
         """Основной цикл игры"""
         clock = pygame.time.Clock()
@@ -703,21 +848,10 @@ class Game:
         while running:
             try:
                 running = self.handle_events()
+                self.update_computer_turn()
                 
                 # Отрисовка
-                if self.state == "menu":
-                    self.draw_menu()
-                elif self.state == "enter_name":
-                    self.draw_enter_name()
-                elif self.state == "place_ships":
-                    self.draw_place_ships()
-                elif self.state == "game":
-                    self.draw_game()
-                elif self.state == "game_over":
-                    self.draw_game_over()
-                
-                # UI элементы
-                self.draw_ui_elements()
+                self.draw_frame()
                 
                 pygame.display.flip()
                 clock.tick(60)
@@ -726,4 +860,7 @@ class Game:
                 print(f"Ошибка в игровом цикле: {e}")
                 # Пытаемся продолжить
         
+        self.turn_scheduler.cancel()
+        self.close_ai()
+        self.turn_scheduler.shutdown()
         return True
\ No newline at end of file
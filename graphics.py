@@ -2,44 +2,54 @@ import pygame
 import random
 import os
 from constants import *
+from bitboard import iter_bits
 
-def create_asset_images():
+def draw_grid_lines(surface, color, width, height, cell_size):
+    """Рисование линий сетки доски"""
+    board_width = width * cell_size
+    board_height = height * cell_size
+    for i in range(width + 1):
+        pygame.draw.line(surface, color, (i * cell_size, 0), (i * cell_size, board_height), 1)
+    for i in range(height + 1):
+        pygame.draw.line(surface, color, (0, i * cell_size), (board_width, i * cell_size), 1)
+
+def create_asset_images(width=GRID_SIZE, height=GRID_SIZE, cell_size=CELL_SIZE):
     """Функция для создания изображений из ассетов"""
     try:
         assets = {}
+        board_width = width * cell_size
+        board_height = height * cell_size
         
         # Синее поле
-        blue_grid = pygame.Surface((BOARD_SIZE, BOARD_SIZE))
+        blue_grid = pygame.Surface((board_width, board_height))
         blue_grid.fill((25, 25, 80))  # Темно-синий фон
         # Рисуем сетку
-        for i in range(GRID_SIZE + 1):
-            pygame.draw.line(blue_grid, (60, 150, 200), (i * CELL_SIZE, 0), (i * CELL_SIZE, BOARD_SIZE), 1)
-            pygame.draw.line(blue_grid, (60, 150, 200), (0, i * CELL_SIZE), (BOARD_SIZE, i * CELL_SIZE), 1)
+        draw_grid_lines(blue_grid, (60, 150, 200), width, height, cell_size)
         assets['blue_grid'] = blue_grid
         
         # Зеленое поле с радаром
-        green_grid = pygame.Surface((BOARD_SIZE, BOARD_SIZE))
+        green_grid = pygame.Surface((board_width, board_height))
         green_grid.fill((10, 50, 10))  # Темно-зеленый фон
         # Рисуем сетку
-        for i in range(GRID_SIZE + 1):
-            pygame.draw.line(green_grid, (20, 200, 20), (i * CELL_SIZE, 0), (i * CELL_SIZE, BOARD_SIZE), 1)
-            pygame.draw.line(green_grid, (20, 200, 20), (0, i * CELL_SIZE), (BOARD_SIZE, i * CELL_SIZE), 1)
+        draw_grid_lines(green_grid, (20, 200, 20), width, height, cell_size)
         # Добавляем круг радара
-        pygame.draw.circle(green_grid, (20, 150, 20), (BOARD_SIZE//2, BOARD_SIZE//2), BOARD_SIZE//3, 1)
-        pygame.draw.circle(green_grid, (20, 150, 20), (BOARD_SIZE//2, BOARD_SIZE//2), BOARD_SIZE//2, 1)
+        center = (board_width//2, board_height//2)
+        radius = min(board_width, board_height)
+        pygame.draw.circle(green_grid, (20, 150, 20), center, radius//3, 1)
+        pygame.draw.circle(green_grid, (20, 150, 20), center, radius//2, 1)
         assets['green_grid'] = green_grid
         
         # Изображения кораблей
         ships = {}
         ship_sizes = [(1, 1), (2, 1), (3, 1), (4, 1), (5, 1)]
         
-        for width, height in ship_sizes:
-            ship_img = pygame.Surface((width * CELL_SIZE - 4, height * CELL_SIZE - 4), pygame.SRCALPHA)
+        for ship_width, ship_height in ship_sizes:
+            ship_img = pygame.Surface((max(1, ship_width * cell_size - 4), max(1, ship_height * cell_size - 4)), pygame.SRCALPHA)
             ship_img.fill((180, 180, 180))  # Серый цвет кораблей
             # Добавляем детали
-            pygame.draw.rect(ship_img, (100, 100, 100), (width * CELL_SIZE // 4, height * CELL_SIZE // 4, 
-                                                      width * CELL_SIZE // 2, height * CELL_SIZE // 2))
-            ships[f"ship_{width}x{height}"] = ship_img
+            pygame.draw.rect(ship_img, (100, 100, 100), (ship_width * cell_size // 4, ship_height * cell_size // 4, 
+                                                      ship_width * cell_size // 2, ship_height * cell_size // 2))
+            ships[f"ship_{ship_width}x{ship_height}"] = ship_img
             
         assets['ships'] = ships
         
@@ -48,7 +58,70 @@ def create_asset_images():
         print(f"Ошибка при создании ассетов: {e}")
         return {}
 
-def load_image(filename, window_width, window_height):
+def draw_board(screen, board, x, y, is_player, hide_ships=False, in_multiplayer=False, game_assets=None, fonts=None,
+               cell_size=None):
+    """Отрисовка доски"""
+    cell_size = cell_size or CELL_SIZE
+    board_width = board.width * cell_size
+    board_height = board.height * cell_size
+
+    # Рисуем фон игрового поля
+    if game_assets:
+        if is_player:
+            bg = game_assets.get('blue_grid', None)
+        else:
+            bg = game_assets.get('green_grid', None)
+            
+        if bg:
+            screen.blit(bg, (x, y))
+    
+    if not game_assets or not bg:
+        # Рисуем сетку, если нет изображения
+        for i in range(board.height + 1):
+            pygame.draw.line(screen, BLACK, (x, y + i * cell_size), (x + board_width, y + i * cell_size), 2)
+        for i in range(board.width + 1):
+            pygame.draw.line(screen, BLACK, (x + i * cell_size, y), (x + i * cell_size, y + board_height), 2)
+    
+    # Буквы и цифры (на мелких клетках подписываем не каждую)
+    label_step = max(1, -(-CELL_SIZE // 2 // cell_size))
+    for i in range(0, board.width, label_step):
+        letter_text = fonts['small'].render(board.rules.column_label(i), True, WHITE)
+        screen.blit(letter_text, (x + i * cell_size + cell_size//2 - letter_text.get_width()//2, y - 25))
+    for i in range(0, board.height, label_step):
+        number_text = fonts['small'].render(str(i+1), True, WHITE)
+        screen.blit(number_text, (x - 25, y + i * cell_size + cell_size//2 - number_text.get_height()//2))
+    
+    # Рисуем корабли и выстрелы, обходя только отмеченные клетки масок
+    def cell_rect(index):
+        row, col = divmod(index, board.width)
+        return pygame.Rect(x + col * cell_size, y + row * cell_size, cell_size, cell_size)
+
+    # Попадания
+    for index in iter_bits(board.shot_mask & board.ship_mask):
+        rect = cell_rect(index)
+        pygame.draw.rect(screen, RED, rect)
+        pygame.draw.line(screen, BLACK, rect.topleft, rect.bottomright, 2)
+        pygame.draw.line(screen, BLACK, (rect.left, rect.bottom), (rect.right, rect.top), 2)
+
+    # Промахи
+    for index in iter_bits(board.miss_mask):
+        pygame.draw.circle(screen, WHITE, cell_rect(index).center, max(1, cell_size//6))
+
+    # Отмеченные клетки вокруг потопленного корабля
+    for index in iter_bits(board.halo_mask):
+        pygame.draw.circle(screen, LIGHT_GRAY, cell_rect(index).center, max(1, cell_size//8))
+
+    # Корабли
+    if not hide_ships and not in_multiplayer:
+        for index in iter_bits(board.ship_mask & ~board.shot_mask):
+            pygame.draw.rect(screen, GREEN, cell_rect(index))
+    
+    # Надпись над доской
+    board_title = "Ваша доска" if is_player else "Доска противника"
+    title_text = fonts['medium'].render(board_title, True, WHITE)
+    screen.blit(title_text, (x + board_width//2 - title_text.get_width()//2, y - 50))
+
+def load_image(filename, window_width, window_height, rng=None):
     """Загрузка и масштабирование изображения"""
     try:
         if os.path.exists(filename):
@@ -57,19 +130,20 @@ def load_image(filename, window_width, window_height):
     except Exception as e:
         print(f"Ошибка при загрузке изображения {filename}: {e}")
     
-    return create_backup_image(window_width, window_height)
+    return create_backup_image(window_width, window_height, rng)
 
-def create_backup_image(window_width, window_height):
+def create_backup_image(window_width, window_height, rng=None):
     """Создание резервного фонового изображения"""
+    rng = rng or random.Random()
     try:
         backup_image = pygame.Surface((window_width, window_height))
         backup_image.fill((100, 150, 200))  # Синий фон
         
         # Имитация морского боя на резервном изображении
         for _ in range(20):
-            x, y = random.randint(0, window_width), random.randint(0, window_height)
-            radius = random.randint(5, 20)
-            color = (random.randint(50, 255), random.randint(50, 255), random.randint(50, 255))
+            x, y = rng.randint(0, window_width), rng.randint(0, window_height)
+            radius = rng.randint(5, 20)
+            color = (rng.randint(50, 255), rng.randint(50, 255), rng.randint(50, 255))
             pygame.draw.circle(backup_image, color, (x, y), radius)
             
         return backup_image
@@ -3,14 +3,30 @@
 Игра "Морской бой"
 """
 
+import argparse
 import pygame
 import sys
 import time
 from constants import WINDOW_WIDTH, WINDOW_HEIGHT
 from game import Game
+from ai_registry import DEFAULT_STRATEGY, STRATEGIES
+from rules import Rules
+
+def parse_args():
+    """Разбор параметров командной строки"""
+    parser = argparse.ArgumentParser(description="Игра Морской Бой")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="зерно генератора случайных чисел для воспроизводимых партий")
+    parser.add_argument("--salvo", action="store_true",
+                        help="режим залпа: выстрел за каждый уцелевший корабль")
+    parser.add_argument("--ai", choices=sorted(STRATEGIES), default=DEFAULT_STRATEGY,
+                        help="стратегия компьютера: " + ", ".join(
+                            f"{info.name} - {info.title.lower()}" for info in STRATEGIES.values()))
+    return parser.parse_args()
 
 def main():
     """Главная функция запуска игры"""
+    args = parse_args()
     try:
         print("Запуск игры Морской Бой...")
         
@@ -30,7 +46,7 @@ def main():
         }
         
         # Создание и запуск игры
-        game = Game(screen, fonts)
+        game = Game(screen, fonts, rules=Rules(salvo=args.salvo), seed=args.seed, ai=args.ai)
         game.run()
         
     except Exception as e:
@@ -0,0 +1,183 @@
+import argparse
+import mmap
+import os
+import struct
+import time
+from bitboard import get_geometry
+from rules import CLASSIC_RULES, Rules
+
+# Каталог с дебютами и формат файла: заголовок и номера клеток (uint16) всех вариантов подряд
+BOOK_DIR = "opening_books"
+BOOK_MAGIC = b"SBBOOK01"
+BOOK_HEADER = struct.Struct("<8sHHHH")
+
+
+def book_key(rules):
+    """Ключ дебюта: правила без режима залпа (он не меняет порядок выстрелов)"""
+    return Rules(rules.width, rules.height, rules.fleet, rules.allow_touching, rules.allow_bending).key()
+
+
+def book_path(rules, directory=BOOK_DIR):
+    """Путь к файлу дебюта для правил"""
+    return os.path.join(directory, book_key(rules) + ".book")
+
+
+def compute_book(rules=None, length=20, variants=8, samples=100000, tolerance=0.03, seed=None):
+    """Дебюты: variants последовательностей из length клеток (номера y * width + x)
+
+    Следующей берется клетка, чаще всего занятая в случайных расстановках,
+    согласованных с промахами по всем предыдущим клеткам. Клетка выбирается
+    случайно среди тех, чья частота отличается от лучшей не больше чем на
+    tolerance, поэтому варианты дебюта различаются.
+    """
+    # NumPy нужен только для расчета, загрузка дебюта обходится без него
+    import numpy as np
+    from fleet_sampler import sample_fleets
+
+    rules = rules or CLASSIC_RULES
+    rng = np.random.default_rng(seed)
+    occupancy = sample_fleets(samples, rules, rng).occupancy.reshape(samples, rules.cells)
+    lines = []
+    for _ in range(variants):
+        alive = np.ones(samples, dtype=bool)
+        line = []
+        for _ in range(min(length, rules.cells)):
+            counts = occupancy[alive].sum(axis=0)
+            counts[line] = -1
+            best = np.flatnonzero(counts >= counts.max() * (1 - tolerance))
+            cell = int(rng.choice(best))
+            line.append(cell)
+            # Дальше считаем, что выстрел промахнулся
+            still_alive = alive & ~occupancy[:, cell]
+            if still_alive.sum() < max(100, samples // 1000):
+                # Расстановок, где все выстрелы мимо, почти не осталось
+                break
+            alive = still_alive
+        lines.append(line)
+    return lines
+
+
+def save_book(lines, rules=None, directory=BOOK_DIR):
+    """Запись дебюта в файл; возвращает путь"""
+    rules = rules or CLASSIC_RULES
+    length = min(len(line) for line in lines)
+    os.makedirs(directory, exist_ok=True)
+    path = book_path(rules, directory)
+    with open(path, "wb") as f:
+        f.write(BOOK_HEADER.pack(BOOK_MAGIC, rules.width, rules.height, len(lines), length))
+        for line in lines:
+            f.write(struct.pack(f"<{length}H", *line[:length]))
+    return path
+
+
+class OpeningBook:
+    """Дебют, отображенный в память: варианты читаются из файла по требованию"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.variants, self.length = BOOK_HEADER.unpack_from(self._mmap)
+        if magic != BOOK_MAGIC or len(self._mmap) != BOOK_HEADER.size + 2 * self.variants * self.length:
+            self._mmap.close()
+            raise ValueError("Неверный формат файла дебюта")
+        self._cells = memoryview(self._mmap)[BOOK_HEADER.size:].cast("H")
+
+    def line(self, variant):
+        """Клетки (x, y) варианта дебюта"""
+        start = variant * self.length
+        return [(index % self.width, index // self.width) for index in self._cells[start:start + self.length]]
+
+
+# Загруженные дебюты по путям (None - файла нет или он поврежден)
+_books = {}
+
+
+def get_book(rules, directory=BOOK_DIR):
+    """Дебют для правил или None; файл открывается один раз на процесс"""
+    path = book_path(rules, directory)
+    if path not in _books:
+        book = None
+        try:
+            if os.path.exists(path):
+                book = OpeningBook(path)
+                if (book.width, book.height) != (rules.width, rules.height):
+                    book = None
+        except Exception as e:
+            print(f"Ошибка загрузки дебюта {path}: {e}")
+        _books[path] = book
+    return _books[path]
+
+
+class OpeningLine:
+    """Дебют одной партии: случайный вариант в случайной симметрии доски
+
+    Клетки выдаются по порядку, пока по кораблям нет непотопленных
+    попаданий; уже открытые клетки пропускаются. Файл дебюта загружается
+    при первом запросе хода.
+    """
+
+    def __init__(self, rules, rng, directory=BOOK_DIR):
+        self.rules = rules
+        self.rng = rng
+        self.directory = directory
+        self.geometry = get_geometry(rules.width, rules.height)
+        self.cells = None
+        self.position = 0
+
+    def _load(self):
+        book = get_book(self.rules, self.directory)
+        if book is None or not book.variants:
+            self.cells = []
+            return
+        symmetry = self.rng.choice(self.geometry.symmetries())
+        self.cells = [self.geometry.cell(symmetry[self.geometry.index(x, y)])
+                      for x, y in book.line(self.rng.randrange(book.variants))]
+
+    def next_shots(self, snapshot, count, exclude=()):
+        """До count клеток дебюта (пустой список, если дебют не применим)"""
+        if self.cells is None:
+            self._load()
+        if snapshot.hit_mask & ~snapshot.sunk_mask:
+            return []
+        known = snapshot.shot_mask | snapshot.halo_mask
+        # Открытые клетки в начале дебюта больше не понадобятся
+        while self.position < len(self.cells) and (known >> self.geometry.index(*self.cells[self.position])) & 1:
+            self.position += 1
+        shots = []
+        for cell in self.cells[self.position:]:
+            if len(shots) == count:
+                break
+            if not (known >> self.geometry.index(*cell)) & 1 and cell not in exclude:
+                shots.append(cell)
+        return shots
+
+    def next_shot(self, snapshot, exclude=()):
+        """Следующая клетка дебюта или None"""
+        shots = self.next_shots(snapshot, 1, exclude)
+        return shots[0] if shots else None
+
+
+def main():
+    """Расчет дебюта для правил и запись в каталог дебютов"""
+    parser = argparse.ArgumentParser(description="Расчет дебютов для ИИ")
+    parser.add_argument("--width", type=int, default=CLASSIC_RULES.width, help="ширина доски")
+    parser.add_argument("--height", type=int, default=CLASSIC_RULES.height, help="высота доски")
+    parser.add_argument("--touch", action="store_true", help="корабли могут касаться")
+    parser.add_argument("--bend", action="store_true", help="изогнутые корабли")
+    parser.add_argument("--length", type=int, default=20, help="длина дебюта в выстрелах")
+    parser.add_argument("--variants", type=int, default=8, help="количество вариантов")
+    parser.add_argument("--samples", type=int, default=100000, help="количество случайных расстановок")
+    parser.add_argument("--seed", type=int, default=None, help="зерно генератора случайных чисел")
+    parser.add_argument("--dir", default=BOOK_DIR, help="каталог дебютов")
+    args = parser.parse_args()
+
+    rules = Rules(args.width, args.height, allow_touching=args.touch, allow_bending=args.bend)
+    started = time.perf_counter()
+    lines = compute_book(rules, args.length, args.variants, args.samples, seed=args.seed)
+    path = save_book(lines, rules, args.dir)
+    print(f"Дебют {book_key(rules)}: {len(lines)} вариантов по {min(map(len, lines))} выстрелов, "
+          f"{time.perf_counter() - started:.1f} с -> {path}")
+
+
+if __name__ == "__main__":
+    main()
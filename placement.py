@@ -0,0 +1,330 @@
+import argparse
+import random
+import time
+from bitboard import get_geometry, iter_bits, popcount
+from rules import CLASSIC_RULES
+from seeding import make_rng
+
+
+class UniformPlacementError(ValueError):
+    """Равновероятная расстановка не найдена за отведенное число попыток"""
+
+
+class PlacementIndex:
+    """Индекс допустимых позиций кораблей на доске
+
+    Для каждой фигуры хранится маска клеток, в которые ее можно поставить,
+    поэтому проверка позиции - это чтение одного бита. Новый корабль только
+    сужает маски; после удаления корабля маски пересчитываются от
+    оставшихся кораблей при следующем запросе.
+
+    Удаление не инкрементальное и стоит O(клеток доски): закрытые клетки и
+    маска каждой запрошенной фигуры заново считаются сдвигами по всей
+    доске. На битовых масках это несколько операций над числами в
+    клеток/64 машинных слов - столько же, сколько и добавление корабля,
+    поэтому счетчики закрытия по клеткам удаление бы не ускорили.
+    """
+
+    def __init__(self, rules=None, geometry=None):
+        self.rules = rules or CLASSIC_RULES
+        self.geometry = geometry or get_geometry(self.rules.width, self.rules.height)
+        self.clear()
+
+    def clear(self):
+        """Сброс индекса для пустой доски"""
+        self.blocked = 0
+        self._legal = {}
+
+    def _zone(self, mask):
+        """Клетки, закрытые для других кораблей"""
+        if self.rules.allow_touching:
+            return mask
+        return self.geometry.dilate(mask)
+
+    def add(self, ship_mask):
+        """Учет нового корабля"""
+        zone = self._zone(ship_mask)
+        self.blocked |= zone
+        for shape, legal in self._legal.items():
+            self._legal[shape] = legal & self.geometry.legal_anchors(shape, zone)
+
+    def rebuild(self, ships_mask):
+        """Пересчет после удаления корабля по маске оставшихся кораблей (O(клеток доски))"""
+        # Зона объединения кораблей совпадает с объединением их зон
+        self.blocked = self._zone(ships_mask)
+        self._legal = {}
+
+    def legal_anchors(self, shape):
+        """Маска клеток, в которые можно поставить фигуру"""
+        legal = self._legal.get(shape)
+        if legal is None:
+            legal = self.geometry.legal_anchors(shape, self.blocked)
+            self._legal[shape] = legal
+        return legal
+
+    def can_place(self, shape, x, y):
+        """Проверка позиции фигуры"""
+        if not self.geometry.in_bounds(x, y):
+            return False
+        return bool((self.legal_anchors(shape) >> self.geometry.index(x, y)) & 1)
+
+    def placements(self, length=None):
+        """Все допустимые позиции (фигура, x, y) кораблей длины length или всего флота"""
+        lengths = sorted(set(self.rules.fleet), reverse=True) if length is None else [length]
+        for ship_length in lengths:
+            for shape in self.rules.ship_shapes(ship_length):
+                for index in iter_bits(self.legal_anchors(shape)):
+                    yield (shape,) + self.geometry.cell(index)
+
+
+class FleetPlacer:
+    """Генератор случайных расстановок флота
+
+    Обычный режим ставит корабли перебором с возвратом по допустимым
+    позициям и поэтому всегда находит расстановку, если она существует.
+    Режим uniform выбирает расстановку равновероятно среди всех допустимых;
+    на плотных досках отбор может не уложиться в max_uniform_attempts
+    попыток, тогда выбрасывается UniformPlacementError: подмена перебором
+    незаметно нарушила бы равновероятность.
+    """
+
+    def __init__(self, rules=None, max_uniform_attempts=100000, rng=None):
+        self.rules = rules or CLASSIC_RULES
+        self.rng = rng or random.Random()
+        self.geometry = get_geometry(self.rules.width, self.rules.height)
+        self.max_uniform_attempts = max_uniform_attempts
+        self._placements = None
+
+        # Для каждого корабля флота: список (фигура, маска фигуры, маска допустимых клеток)
+        self._ship_options = []
+        for length in self.rules.fleet:
+            options = []
+            for shape in self.rules.ship_shapes(length):
+                options.append((shape, self.geometry.shape_mask(shape), self.geometry.anchor_mask(shape)))
+            self._ship_options.append(options)
+
+        # Статистика
+        self.layouts = 0
+        self.seconds = 0.0
+        self.uniform_restarts = 0
+
+    @property
+    def placements_per_second(self):
+        """Скорость генерации расстановок"""
+        if self.seconds <= 0:
+            return 0.0
+        return self.layouts / self.seconds
+
+    def stats(self):
+        """Статистика генератора"""
+        return {
+            "layouts": self.layouts,
+            "seconds": self.seconds,
+            "placements_per_second": self.placements_per_second,
+            "uniform_restarts": self.uniform_restarts,
+        }
+
+    def _zone(self, mask):
+        """Клетки, закрытые для других кораблей"""
+        if self.rules.allow_touching:
+            return mask
+        return self.geometry.dilate(mask)
+
+    def layout(self, uniform=False):
+        """Случайная расстановка флота: список (фигура, x, y)"""
+        started = time.perf_counter()
+        if uniform:
+            placement = self._uniform_layout()
+            if placement is None:
+                raise UniformPlacementError(
+                    f"Равновероятная расстановка не найдена за {self.max_uniform_attempts} попыток "
+                    f"по правилам {self.rules.key()}")
+        else:
+            placement = self._backtracking_layout()
+        self.layouts += 1
+        self.seconds += time.perf_counter() - started
+
+        return [(shape, index % self.geometry.width, index // self.geometry.width)
+                for shape, index in placement]
+
+    def layouts_iter(self, count, uniform=False):
+        """Генератор count расстановок"""
+        for _ in range(count):
+            yield self.layout(uniform)
+
+    def place(self, board, uniform=False):
+        """Расстановка флота на доске (доска предварительно очищается)"""
+        board.clear()
+        # Расстановка уже допустима, повторная проверка не нужна
+        for shape, x, y in self.layout(uniform):
+            board.add_ship([(x + dx, y + dy) for dx, dy in shape])
+        return board
+
+    def _backtracking_layout(self):
+        """Перебор с возвратом с перезапусками
+
+        Случайный перебор иногда надолго застревает в безнадежной ветке,
+        поэтому поиск перезапускается с удвоенным лимитом узлов. Лимит растет
+        без ограничения, так что расстановка находится всегда, если она есть.
+        Повторные проходы перебирают одинаковые корабли только в порядке
+        возрастания клеток и отсекают ветки, где оставшемуся кораблю некуда
+        встать: расстановки не теряются, а перебор заметно сокращается.
+        """
+        node_limit = 8 * len(self._ship_options)
+        canonical = False
+        while True:
+            placement = self._search(node_limit, canonical)
+            if placement is not None:
+                return placement
+            node_limit *= 2
+            canonical = True
+
+    def _search(self, node_limit, canonical=False):
+        """Один проход перебора; None, если превышен лимит узлов"""
+        ship_count = len(self._ship_options)
+        legal_anchors = self.geometry.legal_anchors
+        # Кадр стека: (закрытые клетки, маски оставшихся кандидатов по фигурам)
+        stack = []
+        placement = []
+        chosen = []
+        blocked = 0
+        nodes = 0
+
+        level = 0
+        candidates = None
+        while level < ship_count:
+            if candidates is None:
+                nodes += 1
+                candidates = [legal_anchors(shape, blocked) for shape, _, _ in self._ship_options[level]]
+                # Одинаковые корабли идут строго после предыдущего
+                if canonical and level and self.rules.fleet[level] == self.rules.fleet[level - 1]:
+                    previous_option, previous_index = chosen[-1]
+                    after = ~((1 << (previous_index + 1)) - 1)
+                    candidates = [mask & (after | (1 << previous_index if option > previous_option else 0))
+                                  for option, mask in enumerate(candidates)]
+                # Если какому-то из оставшихся кораблей уже некуда встать, ветка безнадежна
+                if canonical and not self._remaining_fit(level + 1, blocked):
+                    candidates = [0] * len(candidates)
+
+            choice = self._pick_candidate(candidates)
+            if choice is None:
+                # Кандидатов не осталось, возвращаемся на уровень выше
+                if not stack:
+                    raise ValueError(f"Флот невозможно разместить по правилам {self.rules.key()}")
+                if nodes > node_limit:
+                    return None
+                blocked, candidates = stack.pop()
+                placement.pop()
+                chosen.pop()
+                level -= 1
+                continue
+
+            option, index = choice
+            candidates[option] &= ~(1 << index)
+            shape, shape_mask, _ = self._ship_options[level][option]
+            stack.append((blocked, candidates))
+            placement.append((shape, index))
+            chosen.append((option, index))
+            blocked |= self._zone(shape_mask << index)
+            level += 1
+            candidates = None
+
+        return placement
+
+    def _remaining_fit(self, level, blocked):
+        """Проверка, что каждой длине из оставшихся кораблей есть хотя бы одно место"""
+        checked = set()
+        for length, options in zip(self.rules.fleet[level:], self._ship_options[level:]):
+            if length in checked:
+                continue
+            checked.add(length)
+            if not any(self.geometry.legal_anchors(shape, blocked) for shape, _, _ in options):
+                return False
+        return True
+
+    def _pick_candidate(self, candidates):
+        """Случайный кандидат (номер фигуры, клетка) из масок допустимых клеток"""
+        size = self.geometry.size
+        options = len(candidates)
+        randrange = self.rng.randrange
+        # На свободной доске кандидатов много: угадываем клетку наугад
+        for _ in range(16):
+            option = randrange(options)
+            index = randrange(size)
+            if (candidates[option] >> index) & 1:
+                return option, index
+
+        counts = [popcount(mask) for mask in candidates]
+        total = sum(counts)
+        if not total:
+            return None
+        pick = randrange(total)
+        for option, count in enumerate(counts):
+            if pick < count:
+                for index in iter_bits(candidates[option]):
+                    if not pick:
+                        return option, index
+                    pick -= 1
+            pick -= count
+        return None
+
+    def _all_placements(self):
+        """Все позиции каждого корабля флота без учета остальных: (фигура, клетка, маска, зона)"""
+        if self._placements is None:
+            by_length = {}
+            for length, options in zip(self.rules.fleet, self._ship_options):
+                if length not in by_length:
+                    by_length[length] = [(shape, index, shape_mask << index, self._zone(shape_mask << index))
+                                         for shape, shape_mask, anchors in options
+                                         for index in iter_bits(anchors)]
+            self._placements = [by_length[length] for length in self.rules.fleet]
+        return self._placements
+
+    def _uniform_layout(self):
+        """Равновероятная расстановка методом отбора
+
+        Каждый корабль ставится в случайную позицию среди всех позиций на
+        доске без учета остальных; при конфликте расстановка начинается
+        заново. Принятые расстановки распределены равномерно.
+        """
+        all_placements = self._all_placements()
+        choice = self.rng.choice
+
+        for _ in range(self.max_uniform_attempts):
+            placement = []
+            blocked = 0
+            for positions in all_placements:
+                shape, index, mask, zone = choice(positions)
+                if mask & blocked:
+                    break
+                blocked |= zone
+                placement.append((shape, index))
+            else:
+                return placement
+            self.uniform_restarts += 1
+        return None
+
+
+def main():
+    """Замер скорости генерации расстановок"""
+    parser = argparse.ArgumentParser(description="Генерация расстановок флота")
+    parser.add_argument("--count", type=int, default=10000, help="количество расстановок")
+    parser.add_argument("--uniform", action="store_true", help="равновероятные расстановки")
+    parser.add_argument("--seed", type=int, default=None, help="зерно генератора случайных чисел")
+    args = parser.parse_args()
+
+    placer = FleetPlacer(rng=make_rng(args.seed))
+    try:
+        for _ in placer.layouts_iter(args.count, args.uniform):
+            pass
+    except UniformPlacementError as e:
+        print(f"Ошибка: {e}")
+        return
+    stats = placer.stats()
+    print(f"Расстановок: {stats['layouts']}, {stats['placements_per_second']:.0f} в секунду")
+    if args.uniform:
+        print(f"Перезапусков: {stats['uniform_restarts']}")
+
+
+if __name__ == "__main__":
+    main()
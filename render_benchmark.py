@@ -0,0 +1,211 @@
+import os
+
+# Окно не нужно: кадры рисуются в памяти драйвером dummy (задается до инициализации pygame)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import statistics
+import time
+import pygame
+from constants import BOARD1_X, BOARD1_Y, WINDOW_HEIGHT, WINDOW_WIDTH
+from game import Game
+from rules import Rules
+from seeding import make_rng
+
+STATES = ("menu", "enter_name", "place_ships", "game", "game_over")
+PLAYER_NAME = "Капитан Немо"
+
+
+class ScriptedGame(Game):
+    """Игра для замеров отрисовки: положение мыши задается сценарием"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scripted_mouse = (0, 0)
+
+    def mouse_position(self):
+        return self.scripted_mouse
+
+
+class RenderScript:
+    """Сценарий содержимого экранов: перед каждым кадром игра приводится к нужному виду
+
+    Подготовка кадра не входит в замер. В бою каждый кадр добавляет по
+    выстрелу на обе доски, пока флот одной из сторон не потоплен, поэтому
+    в замер попадают доски от пустых до почти закрытых; при расстановке
+    каждый кадр ставит следующий корабль, а курсор ходит по доске.
+    """
+
+    def __init__(self, game, rng):
+        self.game = game
+        self.rng = rng
+        self._shot_order = None
+
+    def cell_center(self, x, y):
+        """Экранные координаты центра клетки доски игрока"""
+        size = self.game.cell_size
+        return BOARD1_X + x * size + size // 2, BOARD1_Y + y * size + size // 2
+
+    def start_placement(self):
+        """Новая партия с компьютером до экрана расстановки"""
+        self.game.start_game_vs_computer()
+        self.game.name_input.text = PLAYER_NAME
+        self.game.confirm_name()
+
+    def start_battle(self):
+        """Новая партия с расставленными флотами"""
+        self.start_placement()
+        self.game.place_ships_randomly_for_current_player()
+        rules = self.game.rules
+        cells = [(x, y) for y in range(rules.height) for x in range(rules.width)]
+        self._shot_order = []
+        for _ in range(2):
+            self.rng.shuffle(cells)
+            self._shot_order.append(list(cells))
+
+    def fire(self, player):
+        """Выстрел по доске игрока в следующую по сценарию открытую клетку"""
+        board = self.game.session.boards[player]
+        order = self._shot_order[player]
+        while order:
+            hit, message = board.shoot(*order.pop())
+            if message != "Недопустимый ход":
+                return message
+        return None
+
+    def prepare(self, state, frame):
+        """Подготовка кадра frame состояния state"""
+        getattr(self, "prepare_" + state)(frame)
+
+    def prepare_menu(self, frame):
+        self.game.state = "menu"
+        buttons = (self.game.button_vs_computer, self.game.button_vs_player, self.game.button_ai)
+        # Курсор по очереди над каждой кнопкой и вне кнопок
+        hovered = frame % (len(buttons) + 1)
+        for number, button in enumerate(buttons):
+            button.check_hover(button.rect.center if number == hovered else (0, 0))
+
+    def prepare_enter_name(self, frame):
+        if frame == 0:
+            self.game.start_game_vs_computer()
+        # Имя набирается по букве за кадр
+        self.game.name_input.text = PLAYER_NAME[:frame % (len(PLAYER_NAME) + 1)]
+
+    def prepare_place_ships(self, frame):
+        fleet = len(self.game.rules.fleet)
+        step = frame % fleet
+        if step == 0:
+            self.start_placement()
+        else:
+            # Следующий корабль на случайную допустимую позицию (последний не ставится: экран сменится)
+            length = self.game.get_available_ships()[0]
+            shape, x, y = self.rng.choice(self.game.player_board.legal_placements(length))
+            self.game.session.place(0, shape, x, y)
+        self.game.remove_mode = frame % 4 == 3
+        self.game.scripted_mouse = self.cell_center(self.rng.randrange(self.game.rules.width),
+                                                    self.rng.randrange(self.game.rules.height))
+
+    def prepare_game(self, frame):
+        session = self.game.session
+        if frame == 0 or self.game.state != "game" or any(board.all_ships_sunk() for board in session.boards):
+            self.start_battle()
+        message = self.fire(1)
+        self.fire(0)
+        self.game.message = message or ""
+        self.game.current_player = frame % 2
+
+    def prepare_game_over(self, frame):
+        if frame:
+            return
+        self.start_battle()
+        boards = self.game.session.boards
+        while not boards[1].all_ships_sunk():
+            self.fire(1)
+            self.fire(0)
+        self.game.message = f"{PLAYER_NAME} победил компьютер!"
+        self.game.state = "game_over"
+        self.game.game_start_time = time.time() - 83
+
+
+def percentile(values, fraction):
+    """Значение, не превышаемое долей fraction отсортированных значений"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def measure_state(game, script, state, frames=300, warmup=10):
+    """Времена кадров состояния в мс: подготовка сценария, затем отрисовка кадра и flip"""
+    times = []
+    for frame in range(warmup + frames):
+        script.prepare(state, frame)
+        started = time.perf_counter()
+        game.draw_frame()
+        pygame.display.flip()
+        elapsed = time.perf_counter() - started
+        if frame >= warmup:
+            times.append(elapsed * 1000)
+    return times
+
+
+def summarize(times):
+    """Распределение времен кадров"""
+    mean = statistics.fmean(times)
+    return {
+        "frames": len(times),
+        "mean_ms": round(mean, 3),
+        "p50_ms": round(percentile(times, 0.5), 3),
+        "p90_ms": round(percentile(times, 0.9), 3),
+        "p99_ms": round(percentile(times, 0.99), 3),
+        "max_ms": round(max(times), 3),
+        "fps": round(1000 / mean, 1),
+    }
+
+
+def main():
+    """Замер времени отрисовки кадров каждого экрана игры без окна"""
+    parser = argparse.ArgumentParser(description="Замеры отрисовки игры без дисплея")
+    parser.add_argument("--state", action="append", choices=STATES,
+                        help="экран (можно несколько раз; по умолчанию - все)")
+    parser.add_argument("--frames", type=int, default=300, help="кадров на экран")
+    parser.add_argument("--warmup", type=int, default=10, help="кадров разогрева (не учитываются)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10], help="стороны досок")
+    parser.add_argument("--seed", type=int, default=1, help="зерно генератора случайных чисел")
+    parser.add_argument("--output", default=None, help="файл отчета JSON")
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    # Шрифты как в main.py
+    fonts = {
+        'big': pygame.font.SysFont('Arial', 36),
+        'medium': pygame.font.SysFont('Arial', 28),
+        'small': pygame.font.SysFont('Arial', 20)
+    }
+    report = {"video_driver": pygame.display.get_driver(), "results": {}}
+    try:
+        for size in args.sizes:
+            rules = Rules(size, size)
+            game = ScriptedGame(screen, fonts, rules=rules, seed=args.seed)
+            script = RenderScript(game, make_rng(args.seed, "render", size))
+            for state in args.state or STATES:
+                key = f"{state}/{size}x{size}"
+                result = summarize(measure_state(game, script, state, args.frames, args.warmup))
+                report["results"][key] = result
+                print(f"{key:22} среднее {result['mean_ms']:7.3f} мс  p50 {result['p50_ms']:7.3f}  "
+                      f"p90 {result['p90_ms']:7.3f}  p99 {result['p99_ms']:7.3f}  max {result['max_ms']:7.3f}  "
+                      f"({result['fps']:.0f} кадров/с)")
+            game.close_ai()
+            game.turn_scheduler.shutdown()
+    finally:
+        pygame.quit()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+from constants import GRID_SIZE, SHIPS
+
+# Подписи столбцов: классические буквы, дальше - продолжение алфавита
+COLUMN_LETTERS = "АБВГДЕЖЗИКЛМНОПРСТУФХЦЧШЩЭЮЯ"
+
+# Повороты и отражения клеточной фигуры
+SYMMETRIES = (
+    lambda x, y: (x, y),
+    lambda x, y: (-y, x),
+    lambda x, y: (-x, -y),
+    lambda x, y: (y, -x),
+    lambda x, y: (-x, y),
+    lambda x, y: (y, x),
+    lambda x, y: (x, -y),
+    lambda x, y: (-y, -x),
+)
+
+
+def normalize_shape(cells):
+    """Сдвиг фигуры в начало координат и упорядочивание клеток"""
+    min_x = min(x for x, _ in cells)
+    min_y = min(y for _, y in cells)
+    return tuple(sorted((x - min_x, y - min_y) for x, y in cells))
+
+
+def shape_size(shape):
+    """Ширина и высота фигуры"""
+    return max(x for x, _ in shape) + 1, max(y for _, y in shape) + 1
+
+
+def straight_shape(length, horizontal):
+    """Фигура прямого корабля"""
+    if horizontal:
+        return tuple((i, 0) for i in range(length))
+    return tuple((0, i) for i in range(length))
+
+
+class Rules:
+    """Правила партии: размеры доски, состав флота и форма кораблей
+
+    allow_touching разрешает кораблям касаться друг друга, allow_bending -
+    ставить корабли буквой Г (один изгиб под прямым углом). В режиме salvo
+    игрок за ход дает залп: по выстрелу за каждый свой уцелевший корабль.
+    """
+
+    def __init__(self, width=GRID_SIZE, height=GRID_SIZE, fleet=None,
+                 allow_touching=False, allow_bending=False, salvo=False):
+        self.width = int(width)
+        self.height = int(height)
+        self.fleet = tuple(sorted(SHIPS if fleet is None else fleet, reverse=True))
+        self.allow_touching = bool(allow_touching)
+        self.allow_bending = bool(allow_bending)
+        self.salvo = bool(salvo)
+
+        if self.width < 1 or self.height < 1:
+            raise ValueError("Размеры доски должны быть положительными")
+        if not self.fleet or min(self.fleet) < 1:
+            raise ValueError("Флот должен состоять из кораблей длиной от 1")
+        if self.fleet[0] > max(self.width, self.height):
+            raise ValueError("Корабль длиннее стороны доски")
+        # Каждая клетка корабля вместе с соседями справа и снизу занимает квадрат 2x2;
+        # у некасающихся кораблей такие области не пересекаются
+        if self.allow_touching:
+            required, available = sum(self.fleet), self.width * self.height
+        else:
+            required, available = sum(2 * (length + 1) for length in self.fleet), (self.width + 1) * (self.height + 1)
+        if required > available:
+            raise ValueError("Флот не помещается на доске")
+
+        self._shapes = {}
+
+    @property
+    def cells(self):
+        """Количество клеток доски"""
+        return self.width * self.height
+
+    def key(self):
+        """Строковый ключ правил для кешей и файлов настроек"""
+        # Флот записывается группами: 4-3x2-2x3-1x4 для классического набора
+        groups = []
+        for length in sorted(set(self.fleet), reverse=True):
+            count = self.fleet.count(length)
+            groups.append(str(length) if count == 1 else f"{length}x{count}")
+        key = f"{self.width}x{self.height}_{'-'.join(groups)}"
+        if self.allow_touching:
+            key += "_touch"
+        if self.allow_bending:
+            key += "_bend"
+        if self.salvo:
+            key += "_salvo"
+        return key
+
+    def __eq__(self, other):
+        return isinstance(other, Rules) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return f"Rules({self.key()})"
+
+    def ship_shapes(self, length):
+        """Все допустимые фигуры корабля длины length
+
+        Первыми идут горизонтальная и вертикальная прямые фигуры.
+        """
+        shapes = self._shapes.get(length)
+        if shapes is None:
+            shapes = [straight_shape(length, True)]
+            if length > 1:
+                shapes.append(straight_shape(length, False))
+            if self.allow_bending and length > 2:
+                bent = set()
+                # Уголок: горизонтальное плечо arm клеток, вертикальное - остальные
+                for arm in range(2, length):
+                    base = [(i, 0) for i in range(arm)] + [(0, j) for j in range(1, length - arm + 1)]
+                    for transform in SYMMETRIES:
+                        bent.add(normalize_shape([transform(x, y) for x, y in base]))
+                shapes.extend(sorted(bent))
+            shapes = [shape for shape in shapes
+                      if shape_size(shape)[0] <= self.width and shape_size(shape)[1] <= self.height]
+            self._shapes[length] = shapes
+        return shapes
+
+    def column_label(self, column):
+        """Подпись столбца доски"""
+        if self.width <= len(COLUMN_LETTERS):
+            return COLUMN_LETTERS[column]
+        return str(column + 1)
+
+
+CLASSIC_RULES = Rules()
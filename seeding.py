@@ -0,0 +1,29 @@
+import hashlib
+import random
+
+
+def derive_seed(seed, *keys):
+    """Зерно подзадачи: хеш исходного зерна и ключей
+
+    Потоки с разными ключами не коррелируют между собой, а одно и то же
+    зерно с теми же ключами всегда дает тот же результат.
+    """
+    data = repr((seed,) + keys).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def spawn_seeds(seed, count, label="worker"):
+    """Зерна для count независимых потоков (процессов, партий)"""
+    return [derive_seed(seed, label, i) for i in range(count)]
+
+
+def make_rng(seed=None, *keys):
+    """Генератор random.Random для зерна (и подзадачи, если заданы ключи)
+
+    Без зерна генератор инициализируется случайно, как модуль random.
+    """
+    if seed is None:
+        return random.Random()
+    if keys:
+        seed = derive_seed(seed, *keys)
+    return random.Random(seed)
@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+import time
+from placement import FleetPlacer
+from rules import CLASSIC_RULES, Rules
+
+
+class ShotHistory:
+    """Гистограмма порядка выстрелов людей по клеткам доски
+
+    Для каждых правил хранятся число партий и по каждой клетке сумма ее
+    позиций в порядке выстрелов: номер выстрела, деленный на число клеток
+    доски (клетка, до которой в партии не дошли, считается равной 1), и
+    число партий, в которых клетка учтена. Клетки, открытые без выстрела
+    вокруг потопленных кораблей, в партии не учитываются: иначе соседство
+    с кораблями выглядело бы поздним. Средняя позиция клетки - насколько
+    поздно люди до нее добираются.
+    Файл дополняется в конце каждой партии, сырые ходы не хранятся;
+    history_file=None - история только в памяти.
+    """
+
+    def __init__(self, history_file="battleship_shot_history.json"):
+        self.history_file = history_file
+        self.history = self.load_history()
+
+    def load_history(self):
+        """Загрузка гистограмм из файла"""
+        try:
+            if self.history_file and os.path.exists(self.history_file):
+                with open(self.history_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Ошибка загрузки истории выстрелов: {e}")
+        return {}
+
+    def save_history(self):
+        """Сохранение гистограмм в файл"""
+        if not self.history_file:
+            return
+        try:
+            with open(self.history_file, 'w', encoding='utf-8') as f:
+                json.dump(self.history, f, ensure_ascii=False)
+        except Exception as e:
+            print(f"Ошибка сохранения истории выстрелов: {e}")
+
+    def games(self, rules):
+        """Количество учтенных партий по правилам"""
+        entry = self.history.get(rules.key())
+        return entry["games"] if entry else 0
+
+    def record_game(self, rules, shots, halo_mask=0):
+        """Учет выстрелов (x, y) человека за партию в порядке выстрелов
+
+        halo_mask - клетки, открытые без выстрела вокруг потопленных кораблей.
+        """
+        entry = self.history.get(rules.key())
+        if entry is None or len(entry["order"]) != rules.cells:
+            entry = self.history[rules.key()] = {"games": 0, "order": [0.0] * rules.cells}
+        # Файлы прежнего формата: все клетки учитывались в каждой партии
+        counts = entry.setdefault("counts", [entry["games"]] * rules.cells)
+        positions = [1.0] * rules.cells
+        for number, (x, y) in enumerate(shots):
+            positions[y * rules.width + x] = number / rules.cells
+        for index in range(rules.cells):
+            if (halo_mask >> index) & 1:
+                continue
+            entry["order"][index] = round(entry["order"][index] + positions[index], 4)
+            counts[index] += 1
+        entry["games"] += 1
+        self.save_history()
+
+    def lateness(self, rules):
+        """Средние позиции клеток (список по номерам y * width + x) или None, если партий нет"""
+        entry = self.history.get(rules.key())
+        if not entry or not entry["games"] or len(entry["order"]) != rules.cells:
+            return None
+        counts = entry.get("counts", [entry["games"]] * rules.cells)
+        # Клетка ни разу не учтена - всегда была рядом с потопленным кораблем
+        return [total / count if count else 1.0 for total, count in zip(entry["order"], counts)]
+
+
+class AdaptivePlacer:
+    """Расстановка флота компьютера в клетки, до которых люди добираются поздно
+
+    За time_limit секунд перебираются случайные расстановки (перебором с
+    возвратом: он в сотню раз быстрее равновероятных) и выбирается та, у
+    которой больше средняя поздность клеток кораблей.
+    Пока партий в истории меньше min_games, расстановка обычная случайная.
+    Интерфейс place(board) как у FleetPlacer.
+    """
+
+    def __init__(self, rules=None, history=None, rng=None, time_limit=0.02, min_games=3):
+        self.rules = rules or CLASSIC_RULES
+        self.placer = FleetPlacer(self.rules, rng=rng)
+        self.lateness = None
+        if history is not None and history.games(self.rules) >= min_games:
+            self.lateness = history.lateness(self.rules)
+        self.time_limit = time_limit
+        # Статистика последней расстановки
+        self.candidates = 0
+        self.score = None
+
+    def layout_score(self, layout):
+        """Средняя поздность клеток кораблей расстановки"""
+        width = self.rules.width
+        cells = [(y + dy) * width + x + dx for shape, x, y in layout for dx, dy in shape]
+        return sum(self.lateness[index] for index in cells) / len(cells)
+
+    def layout(self):
+        """Лучшая из расстановок, найденных за отведенное время"""
+        best = self.placer.layout()
+        self.candidates = 1
+        self.score = None
+        if self.lateness is None:
+            return best
+        self.score = self.layout_score(best)
+        deadline = time.perf_counter() + self.time_limit
+        while time.perf_counter() < deadline:
+            layout = self.placer.layout()
+            score = self.layout_score(layout)
+            self.candidates += 1
+            if score > self.score:
+                best, self.score = layout, score
+        return best
+
+    def place(self, board):
+        """Расстановка флота на доске (доска предварительно очищается)"""
+        board.clear()
+        for shape, x, y in self.layout():
+            board.add_ship([(x + dx, y + dy) for dx, dy in shape])
+        return board
+
+
+def main():
+    """Вывод гистограммы порядка выстрелов людей"""
+    parser = argparse.ArgumentParser(description="История выстрелов людей")
+    parser.add_argument("--touch", action="store_true", help="корабли могут касаться")
+    parser.add_argument("--bend", action="store_true", help="изогнутые корабли")
+    parser.add_argument("--file", default="battleship_shot_history.json", help="файл истории")
+    args = parser.parse_args()
+
+    rules = Rules(allow_touching=args.touch, allow_bending=args.bend)
+    history = ShotHistory(args.file)
+    lateness = history.lateness(rules)
+    if lateness is None:
+        print(f"Для правил {rules.key()} партий пока нет")
+        return
+    print(f"Правила {rules.key()}, партий: {history.games(rules)}")
+    # Средняя позиция клетки в порядке выстрелов, в процентах
+    for y in range(rules.height):
+        print(" ".join(f"{lateness[y * rules.width + x] * 100:3.0f}" for x in range(rules.width)))
+
+
+if __name__ == "__main__":
+    main()
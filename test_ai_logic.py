@@ -0,0 +1,47 @@
+from collections import Counter
+from ai_logic import ComputerAI
+from board import Board
+from rules import Rules
+from seeding import make_rng
+
+
+def make_board(rules):
+    """Двухпалубный корабль вплотную над трехпалубным"""
+    board = Board(rules)
+    board.add_ship([(0, 0), (1, 0)])
+    board.add_ship([(0, 1), (1, 1), (2, 1)])
+    return board
+
+
+def fire(ai, board, cells):
+    """Выстрелы по клеткам с регистрацией результатов в ИИ, как в игре"""
+    for (x, y), (hit, message) in zip(cells, [board.shoot(x, y) for x, y in cells]):
+        if message == "Потоплен!":
+            ai.register_sunk()
+        elif hit:
+            ai.register_hit(x, y)
+        else:
+            ai.register_miss(x, y)
+
+
+def test_sunk_length_with_touching_ships():
+    rules = Rules(5, 5, fleet=[3, 2], allow_touching=True)
+    board = make_board(rules)
+    ai = ComputerAI(rules, rng=make_rng(1))
+    # Серия из трех попаданий, но потоплен двухпалубный
+    for cell in ((0, 0), (0, 1), (1, 0)):
+        fire(ai, board, [cell])
+    ai.get_next_shot(board)
+    assert ai.remaining_fleet == Counter([3])
+
+
+def test_sunk_length_in_salvo():
+    rules = Rules(5, 5, fleet=[3, 2], allow_touching=True, salvo=True)
+    board = make_board(rules)
+    ai = ComputerAI(rules, rng=make_rng(1))
+    fire(ai, board, [(0, 0)])
+    # В одном залпе попадание по трехпалубному регистрируется раньше потопления двухпалубного
+    fire(ai, board, [(0, 1), (1, 0)])
+    ai.get_next_shots(board, 2)
+    assert ai.remaining_fleet == Counter([3])
+    assert ai.sunk_mask == board.sunk_mask
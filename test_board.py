@@ -0,0 +1,147 @@
+import pytest
+from board import Board
+from rules import Rules
+from seeding import make_rng
+
+
+def make_board(allow_touching=False):
+    """Доска 6x6: двухпалубный корабль в углу и трехпалубный ниже"""
+    board = Board(Rules(6, 6, fleet=[3, 2], allow_touching=allow_touching))
+    assert board.place_ship(2, 0, 0, True)
+    assert board.place_ship(3, 0, 2 if not allow_touching else 1, True)
+    return board
+
+
+def test_grid_and_shots_views():
+    board = make_board()
+    assert board.grid[0][0] == 1 and board.grid[0][1] == 1 and board.grid[0][2] == 0
+    assert [sum(row) for row in board.grid] == [2, 0, 3, 0, 0, 0]
+    board.shoot(5, 5)
+    assert board.shots[5][5] == 1
+    assert board.shots[0][0] == 0
+
+
+def test_shoot_miss_hit_sunk():
+    board = make_board()
+    assert board.shoot(5, 5) == (False, "Мимо!")
+    assert board.shoot(0, 0) == (True, "Попадание!")
+    assert board.shoot(0, 0) == (False, "Недопустимый ход")
+    assert board.shoot(6, 0) == (False, "Недопустимый ход")
+    assert board.shoot(1, 0) == (True, "Потоплен!")
+    assert not board.all_ships_sunk()
+
+
+def test_halo_after_sinking():
+    board = make_board()
+    board.shoot(0, 0)
+    board.shoot(1, 0)
+    # Клетки вокруг потопленного корабля открыты без выстрела, стрелять по ним нельзя
+    assert board.shots[0][2] == 2 and board.shots[1][0] == 2 and board.shots[1][2] == 2
+    assert board.shoot(2, 1) == (False, "Недопустимый ход")
+    assert board.open_cells() == 36 - 2 - 4
+
+
+def test_no_halo_with_touching_ships():
+    board = make_board(allow_touching=True)
+    board.shoot(0, 0)
+    assert board.shoot(1, 0) == (True, "Потоплен!")
+    assert board.halo_mask == 0
+    # Соседний корабль вплотную: клетка под потопленным - попадание
+    assert board.shoot(0, 1) == (True, "Попадание!")
+
+
+def test_can_place_ship_keeps_distance():
+    board = make_board()
+    assert not board.can_place_ship(1, 2, 0, True)
+    assert not board.can_place_ship(1, 2, 1, True)
+    assert board.can_place_ship(1, 3, 0, True)
+    assert not board.can_place_ship(2, 5, 0, True)
+    touching = make_board(allow_touching=True)
+    assert touching.can_place_ship(1, 2, 0, True)
+
+
+def test_all_ships_sunk():
+    board = make_board()
+    for x, y in [(0, 0), (1, 0), (0, 2), (1, 2), (2, 2)]:
+        board.shoot(x, y)
+    assert board.all_ships_sunk()
+
+
+def test_remaining_fleet_after_sinking():
+    board = make_board()
+    assert board.ships_alive == 2
+    assert board.snapshot().remaining_fleet == (3, 2)
+    board.shoot(0, 2)
+    assert board.snapshot().remaining_fleet == (3, 2)
+    board.shoot(0, 0)
+    board.shoot(1, 0)
+    assert board.ships_alive == 1
+    assert board.snapshot(public=True).remaining_fleet == (3,)
+    assert board.sunk_mask == 0b11
+
+
+def test_remove_ship_updates_index_and_counters():
+    board = make_board()
+    board.shoot(0, 0)
+    assert board.remove_ship_at(1, 0) == 2
+    assert board.remove_ship_at(1, 0) is None
+    assert board.ships_alive == 1
+    assert board.ships == [[(0, 2), (1, 2), (2, 2)]]
+    # Клетка удаленного корабля - промах
+    assert board.shoot(1, 0) == (False, "Мимо!")
+    # Удаленный корабль снова можно поставить
+    assert board.place_ship(2, 4, 0, True)
+    assert board.ships_alive == 2
+
+
+def test_remove_sunk_ship_keeps_alive_count():
+    board = make_board()
+    board.shoot(0, 0)
+    board.shoot(1, 0)
+    assert board.ships_alive == 1
+    board.remove_ship_at(0, 0)
+    assert board.ships_alive == 1
+    assert board.sunk_mask == 0
+
+
+@pytest.mark.parametrize("rules", [Rules(), Rules(allow_touching=True), Rules(allow_bending=True)])
+def test_shoot_many_matches_sequential_shots(rules):
+    rng = make_rng(5)
+    for game in range(20):
+        salvo_board, single_board = Board(rules), Board(rules)
+        salvo_board.place_ships_randomly(rng=make_rng(5, game))
+        single_board.place_ships_randomly(rng=make_rng(5, game))
+        cells = [(x, y) for y in range(rules.height) for x in range(rules.width)]
+        rng.shuffle(cells)
+        while cells and not salvo_board.all_ships_sunk():
+            size = rng.randint(1, 6)
+            salvo, cells = cells[:size], cells[size:]
+            unknown = single_board.snapshot().unknown_mask
+            results = salvo_board.shoot_many(salvo)
+            expected = [single_board.shoot(x, y) for x, y in salvo]
+            for (x, y), result, single_result in zip(salvo, results, expected):
+                if single_result[1] == "Недопустимый ход" and (unknown >> (y * rules.width + x)) & 1:
+                    # Залп одновременный: клетка рядом с кораблем, потопленным раньше в том же залпе, -
+                    # промах, а при выстрелах по одному она уже закрыта
+                    assert result == (False, "Мимо!")
+                else:
+                    assert result == single_result
+            salvo_snapshot, single_snapshot = salvo_board.snapshot(), single_board.snapshot()
+            assert salvo_snapshot.hit_mask == single_snapshot.hit_mask
+            assert salvo_snapshot.sunk_mask == single_snapshot.sunk_mask
+            assert salvo_snapshot.remaining_fleet == single_snapshot.remaining_fleet
+            assert salvo_snapshot.unknown_mask == single_snapshot.unknown_mask
+
+
+def test_shoot_many_rejects_repeated_cells():
+    board = make_board()
+    assert board.shoot_many([(0, 0), (0, 0), (5, 5), (9, 9)]) == [
+        (True, "Попадание!"), (False, "Недопустимый ход"), (False, "Мимо!"), (False, "Недопустимый ход")]
+
+
+def test_shoot_many_merges_halo_of_ships_sunk_together():
+    board = make_board()
+    results = board.shoot_many([(0, 0), (1, 0), (0, 2), (1, 2), (2, 2)])
+    assert [message for _, message in results].count("Потоплен!") == 2
+    assert board.all_ships_sunk()
+    assert board.shots[1][3] == 2 and board.shots[3][0] == 2
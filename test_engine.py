@@ -0,0 +1,30 @@
+from engine import GameSession
+from rules import Rules
+
+
+def test_place_rejects_disconnected_shape():
+    session = GameSession(Rules())
+    assert not session.place(0, ((0, 0), (5, 5)), 0, 0)
+    assert session.board(0).ships == []
+
+
+def test_place_rejects_bent_shape_without_bending():
+    session = GameSession(Rules(allow_bending=False))
+    assert not session.place(0, ((0, 0), (0, 1), (1, 1)), 2, 2)
+    assert session.board(0).ships == []
+
+
+def test_place_accepts_bent_shape_with_bending():
+    rules = Rules(allow_bending=True)
+    session = GameSession(rules)
+    shape = rules.ship_shapes(3)[-1]
+    assert session.place(0, shape, 2, 2)
+
+
+def test_place_rejects_length_not_in_fleet():
+    session = GameSession(Rules())
+    # Пятипалубного корабля в классическом флоте нет
+    assert not session.place(0, tuple((i, 0) for i in range(5)), 0, 0)
+    # Четырехпалубный только один
+    assert session.place(0, tuple((i, 0) for i in range(4)), 0, 0)
+    assert not session.place(0, tuple((i, 0) for i in range(4)), 0, 5)
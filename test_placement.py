@@ -0,0 +1,53 @@
+from collections import Counter
+import pytest
+from board import Board
+from placement import FleetPlacer, UniformPlacementError
+from rules import Rules
+from seeding import make_rng
+
+
+def assert_valid_fleet(rules, layout):
+    """Флот полный, в пределах доски, корабли не пересекаются и не касаются"""
+    assert Counter(len(shape) for shape, _, _ in layout) == Counter(rules.fleet)
+    owner = {}
+    for number, (shape, x, y) in enumerate(layout):
+        assert shape in rules.ship_shapes(len(shape))
+        for dx, dy in shape:
+            cell = (x + dx, y + dy)
+            assert 0 <= cell[0] < rules.width and 0 <= cell[1] < rules.height
+            assert cell not in owner
+            owner[cell] = number
+    if not rules.allow_touching:
+        for (cx, cy), number in owner.items():
+            for nx in range(cx - 1, cx + 2):
+                for ny in range(cy - 1, cy + 2):
+                    assert owner.get((nx, ny), number) == number
+
+
+@pytest.mark.parametrize("uniform", [False, True])
+@pytest.mark.parametrize("rules", [Rules(), Rules(allow_bending=True), Rules(12, 12, allow_touching=True)])
+def test_layout_is_valid_fleet(rules, uniform):
+    placer = FleetPlacer(rules, rng=make_rng(7))
+    for _ in range(20):
+        assert_valid_fleet(rules, placer.layout(uniform))
+
+
+def test_layout_is_reproducible_by_seed():
+    first = FleetPlacer(rng=make_rng(3)).layout()
+    assert FleetPlacer(rng=make_rng(3)).layout() == first
+
+
+def test_place_fills_board():
+    rules = Rules()
+    board = FleetPlacer(rules, rng=make_rng(1)).place(Board(rules))
+    assert sorted(len(ship) for ship in board.ships) == sorted(rules.fleet)
+    assert board.ships_alive == len(rules.fleet)
+
+
+def test_impossible_fleet_raises():
+    # По площади флот проходит проверку правил, но двум четырехпалубным и одиночному места нет
+    rules = Rules(4, 4, fleet=[4, 4, 1])
+    with pytest.raises(ValueError):
+        FleetPlacer(rules, rng=make_rng(1)).layout()
+    with pytest.raises(UniformPlacementError):
+        FleetPlacer(rules, max_uniform_attempts=100, rng=make_rng(1)).layout(uniform=True)
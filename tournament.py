@@ -0,0 +1,263 @@
+import argparse
+import json
+import math
+import multiprocessing
+import sys
+import time
+from collections import Counter
+from ai_config import CONFIG_FILE, AIConfig
+from ai_registry import STRATEGIES, get_strategy
+from engine import GameSession
+from placement import FleetPlacer, UniformPlacementError
+from rules import Rules
+from seeding import derive_seed, make_rng
+from shot_history import AdaptivePlacer, ShotHistory
+
+# Расстановки соперника: обычная случайная, равновероятная и подобранная против стратегии
+FLEETS = ("random", "uniform", "adversarial")
+# Партий, по которым подбирается расстановка против стратегии
+ADVERSARY_GAMES = 100
+# Время хода копится в логарифмических корзинах: 40 корзин на порядок (точность ~6%)
+LATENCY_BINS_PER_DECADE = 40
+
+
+def strategy_options(name):
+    """Параметры создания ИИ в процессе турнира"""
+    # ИИ Монте-Карло считает в своем процессе: пул уже распределяет партии
+    return {"processes": 0} if name == "sampling" else {}
+
+
+def latency_bin(seconds):
+    """Номер логарифмической корзины времени хода"""
+    return math.floor(math.log10(max(seconds, 1e-9)) * LATENCY_BINS_PER_DECADE)
+
+
+def bin_seconds(index):
+    """Верхняя граница корзины времени хода в секундах"""
+    return 10 ** ((index + 1) / LATENCY_BINS_PER_DECADE)
+
+
+class Player:
+    """Прогон партий одной стратегии на одних правилах"""
+
+    def __init__(self, rules, strategy, fleet="random", seed=0, options=None):
+        self.rules = rules
+        self.strategy = strategy
+        self.ai_class = get_strategy(strategy).load()
+        self.options = dict(strategy_options(strategy), **(options or {}))
+        self.fleet = fleet
+        self.seed = seed
+        self.history = None
+        if fleet == "adversarial":
+            # Одна и та же история во всех процессах: подбор не зависит от разбиения партий
+            history = ShotHistory(None)
+            for game in range(ADVERSARY_GAMES):
+                _, _, shots, halo_mask = self.play(derive_seed(seed, "adversary", game), keep_shots=True)
+                history.record_game(rules, shots, halo_mask)
+            self.history = history
+
+    def place_fleet(self, session, seed):
+        """Расстановка флота, по которому стреляет ИИ"""
+        if self.fleet == "uniform":
+            session.boards[0].place_ships_randomly(uniform=True, rng=make_rng(seed, "fleet"))
+        elif self.fleet == "adversarial" and self.history is not None:
+            session.place_randomly(0, AdaptivePlacer(self.rules, self.history, rng=make_rng(seed, "fleet")))
+        else:
+            session.place_randomly(0)
+
+    def play(self, seed, keep_shots=False):
+        """Партия: (число выстрелов, времена ходов в секундах, клетки выстрелов, маска клеток вокруг потопленных)"""
+        session = GameSession(self.rules, seed)
+        self.place_fleet(session, seed)
+        session.place_randomly(1)
+        session.start(1)
+        ai = self.ai_class(self.rules, rng=session.make_rng("ai"), **self.options)
+        board = session.boards[0]
+        times, shots = [], []
+        try:
+            while not session.is_over:
+                session.current_player = 1
+                count = session.shots_per_turn()
+                started = time.perf_counter()
+                if count > 1:
+                    cells = ai.get_next_shots(board.snapshot(public=True), count)
+                else:
+                    cells = [ai.get_next_shot(board.snapshot(public=True))]
+                times.append(time.perf_counter() - started)
+                results = session.fire(cells)
+                for (x, y), (hit, message) in zip(cells, results):
+                    if message == "Потоплен!":
+                        ai.register_sunk()
+                    elif hit:
+                        ai.register_hit(x, y)
+                    else:
+                        ai.register_miss(x, y)
+                if keep_shots:
+                    shots.extend(cells)
+        finally:
+            getattr(ai, "close", lambda: None)()
+        return session.shots[1], times, shots, board.halo_mask
+
+
+# Игрок процесса пула (создается один раз на процесс)
+_player = None
+
+
+def _init_worker(rules, strategy, fleet, seed, options=None):
+    global _player
+    _player = Player(rules, strategy, fleet, seed, options)
+
+
+def play_chunk(chunk):
+    """Партии с номерами [start, start + count): счетчики выстрелов и времени ходов"""
+    start, count = chunk
+    shots, latency = Counter(), Counter()
+    worst = 0.0
+    for game in range(start, start + count):
+        game_shots, times, _, _ = _player.play(derive_seed(_player.seed, "game", game))
+        shots[game_shots] += 1
+        for seconds in times:
+            latency[latency_bin(seconds)] += 1
+        worst = max(worst, max(times, default=0.0))
+    return shots, latency, worst
+
+
+def percentile(counts, fraction):
+    """Значение, не превышаемое долей fraction наблюдений счетчика"""
+    total = sum(counts.values())
+    threshold = fraction * total
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen >= threshold:
+            return value
+    return None
+
+
+def run_tournament(rules, strategy, games, fleet="random", seed=1, processes=None, chunk=100, progress=None,
+                   options=None):
+    """Турнир стратегии: отчет (словарь, пригодный для JSON)
+
+    options - параметры конструктора ИИ, например из ai_config.json.
+    """
+    processes = multiprocessing.cpu_count() if processes is None else processes
+    chunks = [(start, min(chunk, games - start)) for start in range(0, games, chunk)]
+    shots, latency = Counter(), Counter()
+    worst = 0.0
+    if fleet == "uniform":
+        # Пробная расстановка до запуска пула: на плотной доске ошибка появится сразу
+        FleetPlacer(rules, rng=make_rng(seed, "uniform check")).layout(uniform=True)
+    started = time.perf_counter()
+    if processes > 0:
+        # spawn: процессы не наследуют состояние SDL родителя
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(processes, initializer=_init_worker,
+                          initargs=(rules, strategy, fleet, seed, options)) as pool:
+            results = pool.imap_unordered(play_chunk, chunks)
+            for done, result in enumerate(results, 1):
+                chunk_shots, chunk_latency, chunk_worst = result
+                shots.update(chunk_shots)
+                latency.update(chunk_latency)
+                worst = max(worst, chunk_worst)
+                if progress:
+                    progress(done, len(chunks))
+    else:
+        _init_worker(rules, strategy, fleet, seed, options)
+        for done, item in enumerate(chunks, 1):
+            chunk_shots, chunk_latency, chunk_worst = play_chunk(item)
+            shots.update(chunk_shots)
+            latency.update(chunk_latency)
+            worst = max(worst, chunk_worst)
+            if progress:
+                progress(done, len(chunks))
+    elapsed = time.perf_counter() - started
+
+    mean = sum(value * count for value, count in shots.items()) / games
+    variance = sum((value - mean) ** 2 * count for value, count in shots.items()) / games
+    return {
+        "strategy": strategy,
+        "rules": rules.key(),
+        "fleet": fleet,
+        "options": options or {},
+        "games": games,
+        "seed": seed,
+        "processes": processes,
+        "chunk": chunk,
+        "elapsed_s": round(elapsed, 3),
+        "games_per_second": round(games / elapsed, 1),
+        "shots": {
+            "mean": round(mean, 3),
+            "std": round(math.sqrt(variance), 3),
+            "min": min(shots),
+            "max": max(shots),
+            "p50": percentile(shots, 0.5),
+            "p90": percentile(shots, 0.9),
+            "p99": percentile(shots, 0.99),
+            "histogram": {str(value): shots[value] for value in sorted(shots)},
+        },
+        # Перцентили - верхние границы корзин, максимум - точный
+        "move_ms": {
+            "moves": sum(latency.values()),
+            "p50": round(bin_seconds(percentile(latency, 0.5)) * 1000, 4),
+            "p90": round(bin_seconds(percentile(latency, 0.9)) * 1000, 4),
+            "p99": round(bin_seconds(percentile(latency, 0.99)) * 1000, 4),
+            "p999": round(bin_seconds(percentile(latency, 0.999)) * 1000, 4),
+            "max": round(worst * 1000, 4),
+        },
+    }
+
+
+def main():
+    """Безголовый турнир стратегии ИИ: отчет JSON и проверка порогов"""
+    parser = argparse.ArgumentParser(description="Турнир стратегии ИИ без окна")
+    parser.add_argument("--ai", choices=sorted(STRATEGIES), default="classic", help="стратегия ИИ")
+    parser.add_argument("--games", type=int, default=10000, help="количество партий")
+    parser.add_argument("--fleet", choices=FLEETS, default="random", help="расстановка соперника")
+    parser.add_argument("--touch", action="store_true", help="корабли могут касаться")
+    parser.add_argument("--bend", action="store_true", help="изогнутые корабли")
+    parser.add_argument("--salvo", action="store_true", help="режим залпа")
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count(), help="число процессов")
+    parser.add_argument("--chunk", type=int, default=100, help="партий в одной задаче пула")
+    parser.add_argument("--seed", type=int, default=1, help="зерно генератора случайных чисел")
+    parser.add_argument("--config", default=CONFIG_FILE,
+                        help="файл настроек ИИ, как в игре (пустая строка - настройки по умолчанию)")
+    parser.add_argument("--output", default=None, help="файл отчета JSON (по умолчанию - вывод на экран)")
+    parser.add_argument("--max-shots", type=float, default=None,
+                        help="ошибка, если в среднем выстрелов до победы больше")
+    parser.add_argument("--max-move-ms", type=float, default=None, help="ошибка, если p99 времени хода больше")
+    args = parser.parse_args()
+
+    rules = Rules(allow_touching=args.touch, allow_bending=args.bend, salvo=args.salvo)
+    # ИИ с теми же параметрами, что создает игра (Game.create_ai)
+    options = AIConfig(args.config).params(rules, args.ai) if args.config else {}
+
+    def progress(done, total):
+        print(f"\rЗадач выполнено: {done}/{total}", end="", file=sys.stderr, flush=True)
+
+    try:
+        report = run_tournament(rules, args.ai, args.games, args.fleet, args.seed, args.processes, args.chunk,
+                                progress, options)
+    except UniformPlacementError as e:
+        # Подмена другой расстановкой исказила бы сравнение, поэтому турнир прерывается
+        print(f"\nОшибка: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(file=sys.stderr)
+    text = json.dumps(report, ensure_ascii=False, indent=4)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    failures = []
+    if args.max_shots is not None and report["shots"]["mean"] > args.max_shots:
+        failures.append(f"в среднем {report['shots']['mean']} выстрелов > {args.max_shots}")
+    if args.max_move_ms is not None and report["move_ms"]["p99"] > args.max_move_ms:
+        failures.append(f"p99 хода {report['move_ms']['p99']} мс > {args.max_move_ms} мс")
+    if failures:
+        print("Порог не пройден: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
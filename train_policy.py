@@ -0,0 +1,144 @@
+import argparse
+import multiprocessing
+import time
+import numpy as np
+from ai_density import mask_to_array
+from ai_policy import POLICY_DIR, PolicyAI, PolicyNet, encode, latest_weights, weights_path
+from engine import GameSession
+from rules import Rules
+from seeding import derive_seed
+
+
+def play_games(rules, hidden, params, seed, games, explore):
+    """Партии сети против случайных расстановок
+
+    Возвращает плоскости входа всех позиций (M, H, W, C), цели - клетки
+    кораблей, еще не пораженные в позиции (M, H, W), и число выстрелов в
+    каждой партии.
+    """
+    net = PolicyNet(hidden, params=params)
+    planes, targets, shots = [], [], []
+    for game in range(games):
+        session = GameSession(rules, derive_seed(seed, "game", game))
+        session.place_randomly(0)
+        session.place_randomly(1)
+        session.start(1)
+        ai = PolicyAI(rules, rng=session.make_rng("ai"), net=net, explore=explore)
+        board = session.boards[0]
+        while not session.is_over:
+            session.current_player = 1
+            snapshot = board.snapshot(public=True)
+            planes.append(encode(snapshot, rules))
+            targets.append(board.ship_mask & snapshot.unknown_mask)
+            x, y = ai.get_next_shot(snapshot)
+            session.shoot(x, y)
+        shots.append(session.shots[1])
+    targets = np.array([mask_to_array(mask, rules.width, rules.height) for mask in targets])
+    return np.array(planes), targets, shots
+
+
+def _play_task(task):
+    return play_games(*task)
+
+
+class Adam:
+    """Оптимизатор Adam для словаря параметров сети"""
+
+    def __init__(self, params, lr=1e-3, beta1=0.9, beta2=0.999, eps=1e-8):
+        self.lr = lr
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+        self.steps = 0
+        self.m = {name: np.zeros_like(value) for name, value in params.items()}
+        self.v = {name: np.zeros_like(value) for name, value in params.items()}
+
+    def step(self, params, grads):
+        self.steps += 1
+        correction1 = 1 - self.beta1 ** self.steps
+        correction2 = 1 - self.beta2 ** self.steps
+        for name, grad in grads.items():
+            self.m[name] = self.beta1 * self.m[name] + (1 - self.beta1) * grad
+            self.v[name] = self.beta2 * self.v[name] + (1 - self.beta2) * grad * grad
+            params[name] -= (self.lr * (self.m[name] / correction1)
+                             / (np.sqrt(self.v[name] / correction2) + self.eps)).astype(np.float32)
+
+
+def train_epoch(net, optimizer, planes, targets, batch_size, rng):
+    """Эпоха обучения на позициях; средняя ошибка (бинарная кросс-энтропия по неизвестным клеткам)"""
+    order = rng.permutation(len(planes))
+    losses = []
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        x, y = planes[batch], targets[batch]
+        mask = x[..., 0]
+        logits = net.forward(x, keep=True)
+        # Ошибка считается только по неизвестным клеткам: в них сеть и выбирает выстрел
+        count = mask.sum()
+        losses.append(float((mask * (np.logaddexp(0, logits) - y * logits)).sum() / count))
+        probabilities = 1 / (1 + np.exp(-logits))
+        optimizer.step(net.params, net.backward(mask * (probabilities - y) / count))
+    return float(np.mean(losses))
+
+
+def main():
+    """Обучение сети ИИ в партиях против самой себя на процессоре"""
+    parser = argparse.ArgumentParser(description="Обучение сети ИИ самоигрой")
+    parser.add_argument("--touch", action="store_true", help="корабли могут касаться")
+    parser.add_argument("--bend", action="store_true", help="изогнутые корабли")
+    parser.add_argument("--generations", type=int, default=10, help="количество поколений")
+    parser.add_argument("--games", type=int, default=200, help="партий за поколение")
+    parser.add_argument("--epochs", type=int, default=2, help="эпох обучения за поколение")
+    parser.add_argument("--batch", type=int, default=64, help="размер пакета")
+    parser.add_argument("--lr", type=float, default=1e-3, help="шаг обучения")
+    parser.add_argument("--explore", type=float, default=0.1, help="доля случайных ходов в партиях")
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count(), help="число процессов")
+    parser.add_argument("--fresh", action="store_true", help="начать с новой сети, а не с последних весов")
+    parser.add_argument("--seed", type=int, default=1, help="зерно генератора случайных чисел")
+    parser.add_argument("--dir", default=POLICY_DIR, help="каталог весов")
+    args = parser.parse_args()
+
+    rules = Rules(allow_touching=args.touch, allow_bending=args.bend)
+    net, version = PolicyNet(seed=args.seed), 0
+    latest = None if args.fresh else latest_weights(rules, args.dir)
+    if latest is not None:
+        loaded, meta = PolicyNet.load(latest[0])
+        # Веса других правил не продолжаются: версии ведутся для каждых правил отдельно
+        if meta["rules"] == rules.key():
+            net, version = loaded, meta["version"]
+            print(f"Продолжение обучения с версии {version}: {latest[0]}")
+    optimizer = Adam(net.params, args.lr)
+    rng = np.random.default_rng(args.seed)
+    slots = max(1, args.processes)
+    # spawn: процессы не наследуют состояние SDL родителя
+    pool = multiprocessing.get_context("spawn").Pool(args.processes) if args.processes > 0 else None
+    try:
+        for generation in range(args.generations):
+            started = time.perf_counter()
+            seed = derive_seed(args.seed, "generation", version + 1)
+            per_slot = -(-args.games // slots)
+            tasks = [(rules, net.hidden, net.params, derive_seed(seed, "slot", slot), per_slot, args.explore)
+                     for slot in range(slots)]
+            results = pool.map(_play_task, tasks) if pool is not None else [_play_task(task) for task in tasks]
+            planes = np.concatenate([result[0] for result in results])
+            targets = np.concatenate([result[1] for result in results]).astype(np.float32)
+            shots = [count for result in results for count in result[2]]
+            play_seconds = time.perf_counter() - started
+
+            for _ in range(args.epochs):
+                loss = train_epoch(net, optimizer, planes, targets, args.batch, rng)
+            version += 1
+            path = net.save(weights_path(rules, version, args.dir), version, rules, games=len(shots),
+                            positions=len(planes), loss=loss, avg_shots=float(np.mean(shots)),
+                            explore=args.explore)
+            print(f"Версия {version}: {len(shots)} партий, в среднем {np.mean(shots):.1f} выстрелов, "
+                  f"{len(planes)} позиций, ошибка {loss:.4f}, партии {play_seconds:.1f} с, "
+                  f"всего {time.perf_counter() - started:.1f} с -> {path}")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+if __name__ == "__main__":
+    main()
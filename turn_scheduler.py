@@ -0,0 +1,87 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Состояния планировщика
+IDLE = "idle"
+WAITING = "waiting"
+THINKING = "thinking"
+
+
+class TurnScheduler:
+    """Ход компьютера, разбитый на шаги игрового цикла
+
+    schedule запоминает задачу (функцию без аргументов, обычно выбор
+    клеток ИИ по снимку доски) и через delay секунд запускает ее в
+    отдельном потоке. Игровой цикл каждый кадр вызывает poll, пока тот не
+    вернет результат, и за это время продолжает рисовать и обрабатывать
+    события. cancel отбрасывает запланированный ход: результат уже
+    запущенной задачи будет проигнорирован.
+    """
+
+    def __init__(self, delay=0.5, threaded=True):
+        self.delay = delay
+        # threaded=False - задача выполняется прямо в poll (без потоков)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="computer-turn") if threaded else None
+        self.state = IDLE
+        self._task = None
+        self._future = None
+        self._ready_at = 0
+
+    @property
+    def busy(self):
+        """Ход запланирован или выполняется"""
+        return self.state != IDLE
+
+    @property
+    def thinking(self):
+        """Задача уже запущена"""
+        return self.state == THINKING
+
+    def schedule(self, task, now=None):
+        """Запуск задачи через delay секунд (предыдущая отменяется)"""
+        self.cancel()
+        self._task = task
+        self._ready_at = (time.monotonic() if now is None else now) + self.delay
+        self.state = WAITING
+
+    def cancel(self):
+        """Отмена запланированного хода"""
+        if self._future is not None:
+            self._future.cancel()
+        self._task = None
+        self._future = None
+        self.state = IDLE
+
+    def poll(self, now=None):
+        """Шаг кадра: результат задачи, когда он готов, иначе None"""
+        if self.state == WAITING and (time.monotonic() if now is None else now) >= self._ready_at:
+            task, self._task = self._task, None
+            self.state = THINKING
+            if self._executor is None:
+                self.state = IDLE
+                return task()
+            self._future = self._executor.submit(task)
+
+        if self.state == THINKING and self._future.done():
+            future, self._future = self._future, None
+            self.state = IDLE
+            # Исключение задачи передается в игровой цикл
+            return future.result()
+        return None
+
+    def run_after(self, func):
+        """Вызов func после уже запущенной задачи (в потоке планировщика)
+
+        Нужен, чтобы освобождать ресурсы (например, процессы ИИ), которыми
+        отмененная, но еще работающая задача может пользоваться.
+        """
+        if self._executor is None:
+            func()
+        else:
+            self._executor.submit(func)
+
+    def shutdown(self):
+        """Остановка потока (запущенная задача дорабатывает)"""
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)